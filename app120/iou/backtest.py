@@ -0,0 +1,423 @@
+"""
+Rolling multi-week IOU backtest for 120m data.
+
+analyze_iou works on a single two-week file anchored at its first 18:00
+candle. This module slides that anchor across a long (multi-year) series
+week by week and produces the same per-window IOU / XYZ results as
+uploading each two-week slice separately, without slicing the data:
+
+- DC flags and a non-DC rank index are computed once for the whole series;
+  offset starts and sequence allocations become rank arithmetic.
+- News data is loaded once and shared by all windows.
+- Windows are independent, so they run in parallel worker processes.
+
+Usage:
+    python -m app120.iou.backtest --csv 120m_2023_2025.csv --sequence S1 --limit 0.1 --format jsonl
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .counter import (
+    Candle,
+    IOUResult,
+    MINUTES_PER_STEP,
+    DEFAULT_START_TOD,
+    SEQUENCES_FULL,
+    SEQUENCES_FILTERED,
+    compute_dc_flags,
+    load_candles,
+    fmt_ts,
+    _iou_at,
+)
+from .web import (
+    load_news_data_from_directory,
+    news_affects_xyz,
+)
+from news_converter.index import parse_currencies
+
+
+DEFAULT_NEWS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "news_data",
+)
+
+
+@dataclass
+class BacktestIndex:
+    """DC flags and non-DC rank index shared by every window."""
+    candles: List[Candle]
+    timestamps: List[datetime]
+    dc_flags: List[Optional[bool]]
+    non_dc: List[int]  # indices of non-DC candles, ascending
+    rank: List[int]  # rank[i] = number of non-DC candles with index < i
+
+
+@dataclass
+class WindowResult:
+    """IOU / XYZ result of one backtest window."""
+    anchor_idx: int
+    start: datetime
+    end: datetime
+    candle_count: int
+    ious: Dict[int, List[IOUResult]]
+    news_free: Dict[int, int] = field(default_factory=dict)
+    with_news: Dict[int, int] = field(default_factory=dict)
+    xyz_set: List[int] = field(default_factory=list)
+    eliminated: List[int] = field(default_factory=list)
+
+    @property
+    def iou_count(self) -> int:
+        return sum(len(v) for v in self.ious.values())
+
+
+def build_index(candles: List[Candle]) -> BacktestIndex:
+    dc_flags = compute_dc_flags(candles)
+    non_dc: List[int] = []
+    rank: List[int] = [0] * (len(candles) + 1)
+    for i, flag in enumerate(dc_flags):
+        if not flag:
+            non_dc.append(i)
+        rank[i + 1] = len(non_dc)
+    return BacktestIndex(
+        candles=candles,
+        timestamps=[c.ts for c in candles],
+        dc_flags=dc_flags,
+        non_dc=non_dc,
+        rank=rank,
+    )
+
+
+def find_window_anchors(candles: List[Candle]) -> List[int]:
+    """First 18:00 candle of every trading week (weeks start on Sunday)."""
+    anchors: List[int] = []
+    seen_weeks = set()
+    for i, c in enumerate(candles):
+        if c.ts.hour != DEFAULT_START_TOD.hour or c.ts.minute != DEFAULT_START_TOD.minute:
+            continue
+        week_start = c.ts.date() - timedelta(days=(c.ts.weekday() + 1) % 7)
+        if week_start in seen_weeks:
+            continue
+        seen_weeks.add(week_start)
+        anchors.append(i)
+    return anchors
+
+
+class _Window:
+    """Rank-based view of index[anchor:end] that behaves like a sliced file."""
+
+    def __init__(self, index: BacktestIndex, anchor: int, end: int) -> None:
+        self.index = index
+        self.anchor = anchor
+        self.end = end
+        last = end - 1
+        last_ts = index.timestamps[last]
+        # The last candle of a slice is always a week close (never DC) when it is 16:00
+        self.last_override = bool(index.dc_flags[last]) and last_ts.hour == 16 and last_ts.minute == 0
+
+    def is_dc(self, i: int) -> bool:
+        if i == self.anchor:
+            return False
+        if i == self.end - 1 and self.last_override:
+            return False
+        return bool(self.index.dc_flags[i])
+
+    def nth_non_dc_after(self, pos: int, m: int) -> Optional[int]:
+        """Index of the m-th (1-based) non-DC candle strictly after ``pos``."""
+        index = self.index
+        g = index.rank[pos + 1] + m - 1
+        limit = index.rank[self.end]
+        if g < limit:
+            return index.non_dc[g]
+        if self.last_override and g == limit:
+            return self.end - 1
+        return None
+
+    def first_at_or_after(self, ts: datetime) -> Optional[int]:
+        i = bisect.bisect_left(self.index.timestamps, ts, self.anchor, self.end)
+        return i if i < self.end else None
+
+
+def analyze_window(
+    index: BacktestIndex,
+    anchor: int,
+    end: int,
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+) -> Dict[int, List[IOUResult]]:
+    """Equivalent of analyze_iou(candles[anchor:end]) using the shared index.
+
+    IOUResult indices are relative to the window start, like a sliced file.
+    """
+    window = _Window(index, anchor, end)
+    candles = index.candles
+    seq_values_full = SEQUENCES_FULL[sequence]
+    seq_values_filtered = set(SEQUENCES_FILTERED[sequence])
+    base_ts = candles[anchor].ts.replace(second=0, microsecond=0)
+    results: Dict[int, List[IOUResult]] = {}
+
+    for offset in range(-3, 4):
+        iou_list: List[IOUResult] = []
+        results[offset] = iou_list
+
+        start_idx: Optional[int] = None
+        if offset == 0:
+            start_idx = anchor
+        elif offset > 0:
+            start_idx = window.nth_non_dc_after(anchor, offset)
+
+        missing_steps = 0
+        if start_idx is None:
+            # Same fallback as analyze_iou: first candle >= target, count missing steps
+            target_ts = base_ts + timedelta(minutes=MINUTES_PER_STEP * offset)
+            start_idx = window.first_at_or_after(target_ts)
+            if start_idx is None:
+                continue
+            delta_minutes = int((candles[start_idx].ts - target_ts).total_seconds() // 60)
+            missing_steps = max(0, delta_minutes) // MINUTES_PER_STEP
+
+        actual_start_count = missing_steps + 1
+        seq_compute = [actual_start_count]
+        seq_compute.extend(v for v in seq_values_full if v > missing_steps and v != actual_start_count)
+
+        allocated: List[Tuple[int, int]] = [(actual_start_count, start_idx)]
+        prev_landing = start_idx
+        for val in seq_compute[1:]:
+            landing = window.nth_non_dc_after(start_idx, val - actual_start_count)
+            if landing is None:
+                break
+            assigned = landing
+            if landing - 1 > prev_landing and window.is_dc(landing - 1):
+                assigned = landing - 1
+            allocated.append((val, assigned))
+            prev_landing = landing
+
+        for seq_val, idx in allocated:
+            if seq_val not in seq_values_filtered or idx <= anchor:
+                continue
+            iou = _iou_at(candles, idx, seq_val, limit, tolerance)
+            if iou is None:
+                continue
+            iou.index -= anchor
+            iou.prev_index -= anchor
+            iou_list.append(iou)
+
+    return results
+
+
+def apply_xyz(
+    result: WindowResult,
+    events_by_date: Optional[Dict[str, List[Dict[str, Any]]]],
+    currencies: Optional[Iterable[str]] = None,
+) -> None:
+    """Fill news counters and the XYZ set (offsets without news-free IOUs)."""
+    for offset in range(-3, 4):
+        news_free = 0
+        with_news = 0
+        for iou in result.ious[offset]:
+            if events_by_date and news_affects_xyz(
+                events_by_date, iou.timestamp, MINUTES_PER_STEP, currencies=currencies
+            ):
+                with_news += 1
+            else:
+                news_free += 1
+        result.news_free[offset] = news_free
+        result.with_news[offset] = with_news
+        if news_free > 0:
+            result.eliminated.append(offset)
+        else:
+            result.xyz_set.append(offset)
+
+
+# Worker-process state, set once per process by _init_worker
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(index: BacktestIndex, events_by_date, params: Dict[str, Any]) -> None:
+    _WORKER["index"] = index
+    _WORKER["events_by_date"] = events_by_date
+    _WORKER["params"] = params
+
+
+def _run_window(span: Tuple[int, int]) -> WindowResult:
+    index: BacktestIndex = _WORKER["index"]
+    params = _WORKER["params"]
+    anchor, end = span
+    ious = analyze_window(
+        index, anchor, end, params["sequence"], params["limit"], params["tolerance"]
+    )
+    result = WindowResult(
+        anchor_idx=anchor,
+        start=index.timestamps[anchor],
+        end=index.timestamps[end - 1],
+        candle_count=end - anchor,
+        ious=ious,
+    )
+    apply_xyz(result, _WORKER["events_by_date"], params["currencies"])
+    return result
+
+
+# A window counts as complete once the data reaches the Friday of its last week
+FINAL_DAY_BEFORE_END = timedelta(days=2, hours=18)
+
+
+def window_spans(index: BacktestIndex, window_weeks: int = 2, step_weeks: int = 1) -> List[Tuple[int, int]]:
+    """
+    (anchor, end) index pairs; end is exclusive. Windows the series does not
+    cover up to the last trading day (Friday) of their final week are
+    skipped: a cut-off window has few candles and an inflated XYZ set.
+    """
+    anchors = find_window_anchors(index.candles)
+    spans: List[Tuple[int, int]] = []
+    last_ts = index.timestamps[-1] if index.timestamps else None
+    for k in range(0, len(anchors), max(1, step_weeks)):
+        anchor = anchors[k]
+        end_ts = index.timestamps[anchor] + timedelta(days=7 * window_weeks)
+        # end_ts is the next Sunday 18:00; the final week's Friday starts 2d18h before it
+        if last_ts < end_ts - FINAL_DAY_BEFORE_END:
+            break
+        end = bisect.bisect_left(index.timestamps, end_ts, anchor)
+        if end - anchor < 2:
+            continue
+        spans.append((anchor, end))
+    return spans
+
+
+def run_backtest(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+    window_weeks: int = 2,
+    step_weeks: int = 1,
+    events_by_date: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    workers: Optional[int] = None,
+    currencies: Optional[Iterable[str]] = None,
+) -> Iterable[WindowResult]:
+    """Yield one WindowResult per window, in chronological order."""
+    index = build_index(candles)
+    spans = window_spans(index, window_weeks, step_weeks)
+    params = {
+        "sequence": sequence,
+        "limit": limit,
+        "tolerance": tolerance,
+        "currencies": frozenset(currencies) if currencies is not None else None,
+    }
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(spans) <= 1:
+        _init_worker(index, events_by_date, params)
+        for span in spans:
+            yield _run_window(span)
+        return
+    chunksize = max(1, len(spans) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(index, events_by_date, params),
+    ) as pool:
+        yield from pool.map(_run_window, spans, chunksize=chunksize)
+
+
+def _offset_str(o: int) -> str:
+    return f"{o:+d}" if o != 0 else "0"
+
+
+def window_to_record(result: WindowResult, sequence: str, limit: float) -> Dict[str, Any]:
+    return {
+        "start": fmt_ts(result.start),
+        "end": fmt_ts(result.end),
+        "candles": result.candle_count,
+        "sequence": sequence,
+        "limit": limit,
+        "iou_count": result.iou_count,
+        "xyz": result.xyz_set,
+        "eliminated": result.eliminated,
+        "offsets": {
+            _offset_str(o): {
+                "news_free": result.news_free.get(o, 0),
+                "with_news": result.with_news.get(o, 0),
+                "ious": [fmt_ts(i.timestamp) for i in result.ious[o]],
+            }
+            for o in range(-3, 4)
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        prog="app120.iou.backtest",
+        description="120m IOU rolling backtest (haftalık kayan anchor)",
+    )
+    p.add_argument("--csv", required=True, help="Uzun dönem CSV dosyası (120m mumlar)")
+    p.add_argument("--sequence", choices=["S1", "S2"], default="S1", help="Sequence (varsayılan: S1)")
+    p.add_argument("--limit", type=float, default=0.1, help="IOU limit değeri (varsayılan: 0.1)")
+    p.add_argument("--tolerance", type=float, default=0.005, help="Tolerance (varsayılan: 0.005)")
+    p.add_argument("--weeks", type=int, default=2, help="Pencere uzunluğu, hafta (varsayılan: 2)")
+    p.add_argument("--step-weeks", type=int, default=1, help="Kaydırma adımı, hafta (varsayılan: 1)")
+    p.add_argument("--workers", type=int, default=None, help="İşlemci sayısı (varsayılan: tüm çekirdekler)")
+    p.add_argument("--news-dir", default=DEFAULT_NEWS_DIR, help="Haber JSON klasörü")
+    p.add_argument("--no-news", action="store_true", help="Haber verisini kullanma")
+    p.add_argument(
+        "--currencies",
+        default="",
+        help="Haber para birimleri, ör. USD,JPY (varsayılan: CSV adındaki parite; * = tümü)",
+    )
+    p.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="Çıktı formatı")
+    p.add_argument("--output", default="-", help="Çıktı dosyası (varsayılan: stdout)")
+    args = p.parse_args(argv)
+
+    candles = load_candles(args.csv)
+    if not candles:
+        print("Uyarı: veri yüklenemedi ya da boş", file=sys.stderr)
+        return 1
+    events_by_date = None if args.no_news else load_news_data_from_directory(args.news_dir)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        writer = None
+        if args.format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(["start", "end", "candles", "iou_count", "xyz", "eliminated"])
+        windows = 0
+        for result in run_backtest(
+            candles,
+            args.sequence,
+            args.limit,
+            args.tolerance,
+            window_weeks=args.weeks,
+            step_weeks=args.step_weeks,
+            events_by_date=events_by_date,
+            workers=args.workers,
+            currencies=parse_currencies(args.currencies, args.csv),
+        ):
+            windows += 1
+            if writer is not None:
+                writer.writerow([
+                    fmt_ts(result.start),
+                    fmt_ts(result.end),
+                    result.candle_count,
+                    result.iou_count,
+                    " ".join(_offset_str(o) for o in result.xyz_set),
+                    " ".join(_offset_str(o) for o in result.eliminated),
+                ])
+            else:
+                out.write(json.dumps(window_to_record(result, args.sequence, args.limit)) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{windows} pencere işlendi", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
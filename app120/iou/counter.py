@@ -1,8 +1,13 @@
 import argparse
+import bisect
 import csv
+import math
+import os
 from dataclasses import dataclass
 from datetime import datetime, time as dtime, timedelta
-from typing import List, Optional, Tuple, Dict
+from typing import Callable, List, Optional, Tuple, Dict
+
+from pairscan.scanner import IOVResult, passes_limit, scan_signed_pairs
 
 
 MINUTES_PER_STEP = 120
@@ -321,6 +326,58 @@ def determine_offset_start(
         return None, None, "before-data"
 
 
+def is_iou_excluded(ts: datetime) -> bool:
+    """
+    IOU/IOV restrictions:
+        - 18:00 cannot be IOU (all days)
+        - 20:00 cannot be IOU (all days)
+        - Friday 16:00 cannot be IOU (all Fridays)
+    """
+    if ts.hour == 18 and ts.minute == 0:
+        return True
+    if ts.hour == 20 and ts.minute == 0:
+        return True
+    if ts.weekday() == 4 and ts.hour == 16 and ts.minute == 0:
+        return True
+    return False
+
+
+def _iou_at(
+    candles: List[Candle],
+    idx: int,
+    seq_val: int,
+    limit: float,
+    tolerance: float,
+) -> Optional[IOUResult]:
+    """Return the IOUResult for candle ``idx`` or None if it does not qualify."""
+    candle = candles[idx]
+    prev_candle = candles[idx - 1]
+    
+    if is_iou_excluded(candle.ts):
+        return None
+    
+    oc = candle.close - candle.open
+    prev_oc = prev_candle.close - prev_candle.open
+    
+    # Check IOU criteria
+    if not passes_limit(oc, prev_oc, limit, tolerance):
+        return None
+    
+    # 3. OC and PrevOC must have SAME signs (opposite of IOV)
+    if not ((oc > 0 and prev_oc > 0) or (oc < 0 and prev_oc < 0)):
+        return None
+    
+    return IOUResult(
+        seq_value=seq_val,
+        index=idx,
+        timestamp=candle.ts,
+        oc=oc,
+        prev_oc=prev_oc,
+        prev_index=idx - 1,
+        prev_timestamp=prev_candle.ts,
+    )
+
+
 def analyze_iou(
     candles: List[Candle],
     sequence: str,
@@ -332,18 +389,30 @@ def analyze_iou(
     
     Returns: Dict[offset] -> List[IOUResult]
     """
-    results: Dict[int, List[IOUResult]] = {}
+    return select_ious(collect_iou_candidates(candles, sequence), limit, tolerance)
+
+
+def allocate_filtered(
+    candles: List[Candle],
+    sequence: str,
+) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    Allocate the filtered sequence values for all offsets (-3 to +3).
+    
+    Returns: Dict[offset] -> List[(seq_value, candle index)]
+    """
+    allocated: Dict[int, List[Tuple[int, int]]] = {}
     
     start_tod = DEFAULT_START_TOD
     base_idx, _ = find_start_index(candles, start_tod)
     dc_flags = compute_dc_flags(candles)
     
-    # Use FULL sequence for allocation, then filter for IOU analysis
+    # Use FULL sequence for allocation, then filter for IOU/IOV analysis
     seq_values_full = SEQUENCES_FULL[sequence]
     seq_values_filtered = SEQUENCES_FILTERED[sequence]
     
     for offset in range(-3, 4):
-        iou_list: List[IOUResult] = []
+        alloc_list: List[Tuple[int, int]] = []
         
         start_idx, target_ts, offset_status = determine_offset_start(candles, base_idx, offset, MINUTES_PER_STEP, dc_flags)
         base_ts = candles[base_idx].ts.replace(second=0, microsecond=0)
@@ -371,7 +440,7 @@ def analyze_iou(
                 missing_steps = max(0, delta_minutes // MINUTES_PER_STEP)
             else:
                 # Really no data to work with
-                results[offset] = iou_list
+                allocated[offset] = alloc_list
                 continue
         
         # Build compute sequence (app120 style)
@@ -395,62 +464,521 @@ def analyze_iou(
             if v <= missing_steps:
                 seq_map[v] = SequenceAllocation(None, None, False)
         
-        # Analyze only filtered sequence values
+        # Keep only filtered sequence values
         for seq_val in seq_values_filtered:
             alloc = seq_map.get(seq_val)
             if alloc is None or alloc.idx is None:
                 continue
-            
-            idx = alloc.idx
-            if idx <= 0 or idx >= len(candles):
-                continue
-            
-            candle = candles[idx]
-            prev_candle = candles[idx - 1]
-            
-            # IOU restriction: 18:00 cannot be IOU (all days)
-            ts = candle.ts
-            if ts.hour == 18 and ts.minute == 0:
-                continue  # Cannot be IOU
-            
-            # IOU restriction: 20:00 cannot be IOU (all days)
-            if ts.hour == 20 and ts.minute == 0:
-                continue  # Cannot be IOU
-            
-            # IOU restriction: Friday 16:00 cannot be IOU (all Fridays)
-            if ts.weekday() == 4 and ts.hour == 16 and ts.minute == 0:
-                continue  # Cannot be IOU
-            
-            oc = candle.close - candle.open
-            prev_oc = prev_candle.close - prev_candle.open
-            
-            # Check IOU criteria
-            # 1. Both |OC| and |PrevOC| must be >= limit
-            if abs(oc) < limit or abs(prev_oc) < limit:
-                continue  # Below limit, not IOU
-            
-            # 2. Skip if too close to limit (within ±tolerance for safety)
-            if abs(abs(oc) - limit) < tolerance or abs(abs(prev_oc) - limit) < tolerance:
-                continue  # Too close to limit, unreliable
-            
-            # 2. OC and PrevOC must have SAME signs (opposite of IOV)
-            if not ((oc > 0 and prev_oc > 0) or (oc < 0 and prev_oc < 0)):
-                continue
-            
-            # This is an IOU candle!
-            iou_list.append(IOUResult(
-                seq_value=seq_val,
-                index=idx,
-                timestamp=candle.ts,
-                oc=oc,
-                prev_oc=prev_oc,
-                prev_index=idx - 1,
-                prev_timestamp=prev_candle.ts,
-            ))
+            alloc_list.append((seq_val, alloc.idx))
         
-        results[offset] = iou_list
+        allocated[offset] = alloc_list
+    
+    return allocated
+
+
+def collect_iou_candidates(
+    candles: List[Candle],
+    sequence: str,
+) -> Dict[int, List[IOUResult]]:
+    """
+    Allocated candles that would be IOU for a limit of 0.
+    
+    These are the filtered sequence candles that pass the time restrictions
+    and have same-sign OC/PrevOC. Only the limit/tolerance check depends on
+    the limit, so one candidate pass serves any number of limits.
+    
+    Returns: Dict[offset] -> List[IOUResult]
+    """
+    iou_results, _ = scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        0.0,
+        0.0,
+        excluded=is_iou_excluded,
+        iou_cls=IOUResult,
+    )
+    return iou_results
+
+
+def analyze_iou_iov(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+) -> Tuple[Dict[int, List[IOUResult]], Dict[int, List[IOVResult]]]:
+    """
+    IOU and IOV candles for all offsets from a single allocation pass.
+    
+    IOV here uses the IOU time restrictions and tolerance; only the sign
+    rule differs (OC and PrevOC opposite).
+    
+    Returns: (Dict[offset] -> List[IOUResult], Dict[offset] -> List[IOVResult])
+    """
+    return scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        limit,
+        tolerance,
+        excluded=is_iou_excluded,
+        iou_cls=IOUResult,
+        iov_cls=IOVResult,
+    )
+
+
+def select_ious(
+    candidates: Dict[int, List[IOUResult]],
+    limit: float,
+    tolerance: float = 0.005,
+) -> Dict[int, List[IOUResult]]:
+    """Apply the limit/tolerance check to collect_iou_candidates output."""
+    return {
+        offset: [c for c in cands if passes_limit(c.oc, c.prev_oc, limit, tolerance)]
+        for offset, cands in candidates.items()
+    }
+
+
+def candidate_strengths(candidates: Dict[int, List[IOUResult]]) -> List[float]:
+    """Sorted min(|OC|, |PrevOC|) of every candidate."""
+    return sorted(min(abs(c.oc), abs(c.prev_oc)) for cands in candidates.values() for c in cands)
+
+
+def count_ious_at(strengths: List[float], limit: float, tolerance: float = 0.005) -> int:
+    """
+    IOU count for a limit, from sorted candidate strengths.
+    
+    A candidate passes when min(|OC|, |PrevOC|) >= limit + tolerance: values
+    in [limit, limit + tolerance) are dropped as too close to the limit, and
+    the larger of the two can never be closer to the limit than the smaller.
+    """
+    return len(strengths) - bisect.bisect_left(strengths, limit + tolerance)
+
+
+def calibrate_limit(
+    strengths: List[float],
+    tolerance: float = 0.005,
+    target_count: Optional[int] = None,
+    quantile: Optional[float] = None,
+) -> Optional[float]:
+    """
+    Pick a limit that yields ``target_count`` IOUs (or keeps the candidates
+    above the ``quantile`` of their strengths) from the sorted strengths:
+    the k-th strongest candidate is read directly (strengths[n - k]), and
+    bisect only widens the set past ties with it.
+    
+    The limit is placed in the middle of the gap between the last excluded
+    and the first included strength, so the tolerance band stays clear of
+    both. Returns None when there are no candidates.
+    
+    The target is not always reachable: ties take the nearest larger set,
+    and a limit needed below 0 is clamped to 0.0, which drops candidates
+    weaker than ``tolerance``. Compare count_ious_at() with
+    calibration_target() (see calibration_note) to detect a shortfall.
+    """
+    n = len(strengths)
+    if n == 0:
+        return None
+    k = calibration_target(n, target_count, quantile)
+
+    # Passing candidates need strength >= limit + tolerance:
+    # limit + tolerance must fall in (strengths[n-k-1], strengths[n-k]]
+    hi = strengths[n - k]
+    lo = strengths[n - k - 1] if k < n else 0.0
+    if lo == hi:
+        # Ties: count k is not reachable exactly; take the nearest larger set
+        lo_pos = bisect.bisect_left(strengths, hi)
+        lo = strengths[lo_pos - 1] if lo_pos > 0 else 0.0
+    limit = max(0.0, (lo + hi) / 2 - tolerance)
+    for digits in range(2, 9):
+        rounded = round(limit, digits)
+        if lo < rounded + tolerance <= hi:
+            return rounded
+    return limit
+
+
+def calibration_target(n: int, target_count: Optional[int] = None, quantile: Optional[float] = None) -> int:
+    """IOU count calibrate_limit aims for among ``n`` candidates."""
+    if target_count is None:
+        if quantile is None:
+            raise ValueError("target_count veya quantile gerekli")
+        q = min(max(quantile, 0.0), 1.0)
+        target_count = n - int(q * n)
+    return min(max(target_count, 1), n) if n else 0
+
+
+def calibration_note(limit: float, found: int, target: int) -> str:
+    """
+    "limit: …" note of a calibrated file; names the shortfall when fewer
+    than ``target`` IOUs came back (too few candidates, or candidates weaker
+    than the tolerance).
+    """
+    note = f"limit: {limit}"
+    if found < target:
+        note += f", hedef {target} IOU'ya ulaşılamadı ({found} bulundu)"
+    return note
+
+
+def analyze_iou_calibrated(
+    candles: List[Candle],
+    sequence: str,
+    tolerance: float = 0.005,
+    target_count: Optional[int] = None,
+    quantile: Optional[float] = None,
+    default_limit: float = 0.1,
+) -> Tuple[float, Dict[int, List[IOUResult]]]:
+    """
+    analyze_iou with a per-file limit chosen by calibrate_limit.
+    
+    Returns: (chosen limit, Dict[offset] -> List[IOUResult])
+    """
+    candidates = collect_iou_candidates(candles, sequence)
+    limit = calibrate_limit(candidate_strengths(candidates), tolerance, target_count, quantile)
+    if limit is None:
+        limit = default_limit
+    return limit, select_ious(candidates, limit, tolerance)
+
+
+@dataclass
+class LimitGrid:
+    """XYZ sets over a limit × tolerance grid (see evaluate_limit_grid)."""
+    limits: List[float]
+    tolerances: List[float]
+    xyz: Dict[Tuple[float, float], List[int]]  # (limit, tolerance) -> XYZ set
+    iou_counts: Dict[Tuple[float, float], int]
+    stability: Dict[int, float]  # offset -> share of cells where it is in XYZ
+
+
+def evaluate_limit_grid(
+    candidates: Dict[int, List[IOUResult]],
+    limits: List[float],
+    tolerances: List[float],
+    has_news: Callable[[IOUResult], bool],
+) -> LimitGrid:
+    """
+    XYZ set for every (limit, tolerance) pair from one candidate pass.
     
-    return results
+    News is looked up once per candidate; each cell then only re-applies the
+    limit/tolerance check. An offset leaves the XYZ set as soon as one
+    news-free candidate passes the cell's limit.
+    """
+    news_free: Dict[int, List[IOUResult]] = {}
+    with_news: Dict[int, List[IOUResult]] = {}
+    for offset, cands in candidates.items():
+        news_free[offset] = []
+        with_news[offset] = []
+        for c in cands:
+            (with_news if has_news(c) else news_free)[offset].append(c)
+
+    xyz: Dict[Tuple[float, float], List[int]] = {}
+    iou_counts: Dict[Tuple[float, float], int] = {}
+    in_xyz = {offset: 0 for offset in range(-3, 4)}
+    for limit in limits:
+        for tolerance in tolerances:
+            cell_xyz: List[int] = []
+            count = 0
+            for offset in range(-3, 4):
+                free = sum(
+                    1 for c in news_free.get(offset, []) if passes_limit(c.oc, c.prev_oc, limit, tolerance)
+                )
+                count += free + sum(
+                    1 for c in with_news.get(offset, []) if passes_limit(c.oc, c.prev_oc, limit, tolerance)
+                )
+                if free == 0:
+                    cell_xyz.append(offset)
+                    in_xyz[offset] += 1
+            xyz[(limit, tolerance)] = cell_xyz
+            iou_counts[(limit, tolerance)] = count
+
+    cells = max(1, len(limits) * len(tolerances))
+    return LimitGrid(
+        limits=list(limits),
+        tolerances=list(tolerances),
+        xyz=xyz,
+        iou_counts=iou_counts,
+        stability={offset: in_xyz[offset] / cells for offset in range(-3, 4)},
+    )
+
+
+# Most values one grid axis may have (the spec comes straight from a form field)
+GRID_AXIS_MAX = 50
+
+
+def parse_grid_range(spec: str) -> List[float]:
+    """
+    Parse "start:stop:step" (inclusive) or a comma list into floats.
+    Raises ValueError for non-finite values or more than GRID_AXIS_MAX values.
+    """
+    spec = spec.strip()
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        if not all(math.isfinite(x) for x in (start, stop, step)):
+            raise ValueError("Grid değerleri sonlu sayılar olmalı")
+        if step <= 0:
+            raise ValueError("Adım pozitif olmalı")
+        count = math.floor((stop - start) / step + 1e-6) + 1 if stop >= start else 0
+        if count > GRID_AXIS_MAX:
+            raise ValueError(f"Grid ekseni en fazla {GRID_AXIS_MAX} değer içerebilir ({count} istendi)")
+        return [round(start + i * step, 10) for i in range(count)]
+    values = [float(x) for x in spec.split(",") if x.strip()]
+    if not all(math.isfinite(x) for x in values):
+        raise ValueError("Grid değerleri sonlu sayılar olmalı")
+    if len(values) > GRID_AXIS_MAX:
+        raise ValueError(f"Grid ekseni en fazla {GRID_AXIS_MAX} değer içerebilir ({len(values)} istendi)")
+    return values
+
+
+def default_grid_axes(limit: float, tolerance: float) -> Tuple[List[float], List[float]]:
+    """Limits limit×0.5..1.5 (11 values) and tolerances 0..2×tolerance (5 values)."""
+    limits = [round(limit * (0.5 + 0.1 * i), 10) for i in range(11)]
+    tolerances = [round(tolerance * 0.5 * i, 10) for i in range(5)]
+    return limits, tolerances
+
+
+def format_limit_grid(grid: LimitGrid) -> str:
+    """Plain-text grid: one row per limit, each cell the XYZ set and IOU count."""
+    def fmt_set(offsets: List[int]) -> str:
+        return "{" + ",".join(f"{o:+d}" if o != 0 else "0" for o in offsets) + "}"
+
+    lines = ["limit \\ tol " + " | ".join(f"{t:g}" for t in grid.tolerances)]
+    for limit in grid.limits:
+        cells = [
+            f"{fmt_set(grid.xyz[(limit, t)])} ({grid.iou_counts[(limit, t)]})"
+            for t in grid.tolerances
+        ]
+        lines.append(f"{limit:g}: " + " | ".join(cells))
+    lines.append(
+        "Kararlılık: "
+        + ", ".join(
+            f"{o:+d}={grid.stability[o]:.0%}" if o != 0 else f"0={grid.stability[o]:.0%}"
+            for o in range(-3, 4)
+        )
+    )
+    return "\n".join(lines)
+
+
+class DCFlagTracker:
+    """
+    Incremental version of compute_dc_flags for candles arriving one at a time.
+    
+    A flag is final as soon as the next candle cannot change it. Only a 16:00
+    candle that would otherwise be DC waits for its successor (week-close gap
+    check); ``flush()`` treats the last candle as the end of data.
+    """
+
+    def __init__(self) -> None:
+        self.candles: List[Candle] = []
+        self.flags: List[Optional[bool]] = []
+        self.final_count = 0  # flags[:final_count] will not change anymore
+        self._pending = False
+
+    def push(self, candle: Candle) -> List[int]:
+        """Append a candle and return the indices whose flags became final."""
+        finalized: List[int] = []
+        if self._pending:
+            gap_minutes = (candle.ts - self.candles[-1].ts).total_seconds() / 60
+            self._finalize(cond=gap_minutes <= MINUTES_PER_STEP)
+            finalized.append(self.final_count - 1)
+
+        self.candles.append(candle)
+        i = len(self.candles) - 1
+        if i == 0:
+            self.flags.append(None)
+            self.final_count = 1
+            finalized.append(0)
+            return finalized
+
+        prev = self.candles[i - 1]
+        within = min(prev.open, prev.close) <= candle.close <= max(prev.open, prev.close)
+        cond = candle.high <= prev.high and candle.low >= prev.low and within
+        ts = candle.ts
+        if ts.hour == DEFAULT_START_TOD.hour and ts.minute == DEFAULT_START_TOD.minute:
+            cond = False
+        elif ts.hour == 20 and ts.minute == 0:
+            if ts.weekday() != 6:
+                cond = False
+        elif cond and ts.hour == 16 and ts.minute == 0:
+            # Week close depends on the gap to the next candle
+            self.flags.append(None)
+            self._pending = True
+            return finalized
+
+        self.flags.append(None)
+        self._finalize(cond)
+        finalized.append(i)
+        return finalized
+
+    def flush(self) -> List[int]:
+        """Finalize a pending week-close candle at the end of the data."""
+        if not self._pending:
+            return []
+        self._finalize(cond=False)
+        return [self.final_count - 1]
+
+    def _finalize(self, cond: bool) -> None:
+        i = self.final_count
+        # Ardışık DC yasak
+        if cond and i > 0 and self.flags[i - 1]:
+            cond = False
+        self.flags[i] = bool(cond)
+        self.final_count = i + 1
+        self._pending = False
+
+
+@dataclass
+class _OffsetCursor:
+    """Allocation cursor of one offset inside IOUTracker."""
+    offset: int
+    start_idx: Optional[int] = None
+    non_dc_seen: int = 0  # positive offsets: non-DC candles counted after base
+    seq_compute: Optional[List[int]] = None
+    pos: int = 0  # index in seq_compute of the next value to allocate
+    counted: int = 0
+    last_dc_idx: Optional[int] = None
+
+
+class IOUTracker:
+    """
+    Streaming IOU detection for candles appended one at a time.
+    
+    Each offset keeps its own allocation cursor, so every new candle costs a
+    constant amount of work. IOUs are emitted as soon as a filtered sequence
+    value is allocated to a qualifying candle and match analyze_iou on the
+    same data (apart from the end-of-data fallbacks analyze_iou applies).
+    
+    The DC flags live in a DCFlagTracker that can be shared with other live
+    consumers; pass an existing one as ``dc_state`` and call ``poll()`` after
+    feeding it, or let ``push()`` feed it.
+    """
+
+    def __init__(
+        self,
+        sequence: str,
+        limit: float,
+        tolerance: float = 0.005,
+        dc_state: Optional[DCFlagTracker] = None,
+    ) -> None:
+        self.sequence = sequence
+        self.limit = limit
+        self.tolerance = tolerance
+        self.dc = dc_state if dc_state is not None else DCFlagTracker()
+        self.base_idx: Optional[int] = None
+        self.results: Dict[int, List[IOUResult]] = {offset: [] for offset in range(-3, 4)}
+        self._seq_full = SEQUENCES_FULL[sequence]
+        self._seq_filtered = set(SEQUENCES_FILTERED[sequence])
+        self._cursors = [_OffsetCursor(offset) for offset in range(-3, 4)]
+        self._consumed = 0
+
+    @property
+    def candles(self) -> List[Candle]:
+        return self.dc.candles
+
+    def push(self, candle: Candle) -> List[Tuple[int, IOUResult]]:
+        """Feed one candle; return new (offset, IOUResult) pairs."""
+        self.dc.push(candle)
+        return self.poll()
+
+    def flush(self) -> List[Tuple[int, IOUResult]]:
+        """Finalize the last candle at the end of the data."""
+        self.dc.flush()
+        return self.poll()
+
+    def poll(self) -> List[Tuple[int, IOUResult]]:
+        """Consume every candle whose DC flag became final since the last call."""
+        emitted: List[Tuple[int, IOUResult]] = []
+        while self._consumed < self.dc.final_count:
+            idx = self._consumed
+            self._consumed += 1
+            if self.base_idx is None:
+                ts = self.candles[idx].ts
+                if ts.hour == DEFAULT_START_TOD.hour and ts.minute == DEFAULT_START_TOD.minute:
+                    self.base_idx = idx
+                    self._start_cursors(emitted)
+                continue
+            for cursor in self._cursors:
+                self._advance(cursor, idx, emitted)
+        for offset, iou in emitted:
+            self.results[offset].append(iou)
+        return emitted
+
+    def _start_cursors(self, emitted: List[Tuple[int, IOUResult]]) -> None:
+        base_idx = self.base_idx
+        flags = self.dc.flags
+        for cursor in self._cursors:
+            if cursor.offset > 0:
+                continue  # located while candles arrive
+            start_idx: Optional[int] = base_idx
+            missing_steps = 0
+            if cursor.offset < 0:
+                start_idx, _, _ = determine_offset_start(
+                    self.candles, base_idx, cursor.offset, MINUTES_PER_STEP, flags
+                )
+                if start_idx is None:
+                    base_ts = self.candles[base_idx].ts.replace(second=0, microsecond=0)
+                    target_ts = base_ts + timedelta(minutes=MINUTES_PER_STEP * cursor.offset)
+                    for i in range(base_idx + 1):
+                        if self.candles[i].ts.replace(second=0, microsecond=0) >= target_ts:
+                            start_idx = i
+                            break
+                    delta_minutes = int((self.candles[start_idx].ts - target_ts).total_seconds() // 60)
+                    missing_steps = max(0, delta_minutes) // MINUTES_PER_STEP
+            self._begin_allocation(cursor, start_idx, missing_steps, emitted)
+            # Catch up on candles that arrived between the offset start and base
+            for idx in range(start_idx + 1, base_idx + 1):
+                self._advance(cursor, idx, emitted)
+
+    def _begin_allocation(
+        self,
+        cursor: _OffsetCursor,
+        start_idx: int,
+        missing_steps: int,
+        emitted: List[Tuple[int, IOUResult]],
+    ) -> None:
+        actual_start_count = missing_steps + 1
+        seq_compute = [actual_start_count]
+        seq_compute.extend(v for v in self._seq_full if v > missing_steps and v != actual_start_count)
+        cursor.start_idx = start_idx
+        cursor.seq_compute = seq_compute
+        cursor.pos = 1
+        self._emit(cursor, start_idx, actual_start_count, emitted)
+
+    def _advance(self, cursor: _OffsetCursor, idx: int, emitted: List[Tuple[int, IOUResult]]) -> None:
+        is_dc = bool(self.dc.flags[idx])
+        if cursor.seq_compute is None:
+            # Positive offset: count non-DC candles after base
+            if is_dc:
+                return
+            cursor.non_dc_seen += 1
+            if cursor.non_dc_seen == cursor.offset:
+                self._begin_allocation(cursor, idx, 0, emitted)
+            return
+        if idx <= cursor.start_idx or cursor.pos >= len(cursor.seq_compute):
+            return
+        seq_val = cursor.seq_compute[cursor.pos]
+        steps_needed = seq_val - cursor.seq_compute[cursor.pos - 1]
+        if is_dc:
+            if cursor.counted == steps_needed - 1:
+                cursor.last_dc_idx = idx
+            return
+        cursor.counted += 1
+        if cursor.counted < steps_needed:
+            return
+        assigned_idx = cursor.last_dc_idx if cursor.last_dc_idx is not None else idx
+        cursor.pos += 1
+        cursor.counted = 0
+        cursor.last_dc_idx = None
+        self._emit(cursor, assigned_idx, seq_val, emitted)
+
+    def _emit(
+        self,
+        cursor: _OffsetCursor,
+        idx: int,
+        seq_val: int,
+        emitted: List[Tuple[int, IOUResult]],
+    ) -> None:
+        if seq_val not in self._seq_filtered or idx <= 0:
+            return
+        iou = _iou_at(self.candles, idx, seq_val, self.limit, self.tolerance)
+        if iou is not None:
+            emitted.append((cursor.offset, iou))
 
 
 def fmt_ts(dt: Optional[datetime]) -> str:
@@ -481,6 +1009,30 @@ def main(argv: Optional[List[str]] = None) -> int:
         default=0.1,
         help="IOU limit değeri (varsayılan: 0.1)",
     )
+    p.add_argument(
+        "--target-count",
+        type=int,
+        default=None,
+        help="Limiti dosya başına bu IOU sayısını verecek şekilde otomatik seç",
+    )
+    p.add_argument(
+        "--target-quantile",
+        type=float,
+        default=None,
+        help="Limiti aday mumların min(|OC|,|PrevOC|) dağılımının bu quantile'ına göre seç (ör. 0.8)",
+    )
+    p.add_argument(
+        "--grid",
+        action="store_true",
+        help="Limit × tolerance ızgarasında XYZ kararlılığını göster (haberler news_data/ klasöründen)",
+    )
+    p.add_argument("--grid-limits", default=None, help="Izgara limitleri: start:stop:step veya virgüllü liste")
+    p.add_argument("--grid-tolerances", default=None, help="Izgara toleransları: start:stop:step veya virgüllü liste")
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Mumları tek tek besleyip IOU'ları oluştukları anda yazdır",
+    )
     args = p.parse_args(argv)
 
     candles = load_candles(args.csv)
@@ -490,10 +1042,62 @@ def main(argv: Optional[List[str]] = None) -> int:
     print(f"Data: {len(candles)} candles")
     print(f"Range: {fmt_ts(candles[0].ts)} -> {fmt_ts(candles[-1].ts)}")
     print(f"Sequence: {args.sequence} (Filtered: {SEQUENCES_FILTERED[args.sequence]})")
-    print(f"Limit: {args.limit}")
+    limit = args.limit
+    calibrated: Optional[Dict[int, List[IOUResult]]] = None
+    if args.target_count is not None or args.target_quantile is not None:
+        limit, calibrated = analyze_iou_calibrated(
+            candles,
+            args.sequence,
+            target_count=args.target_count,
+            quantile=args.target_quantile,
+            default_limit=args.limit,
+        )
+        if args.target_count is not None:
+            target = args.target_count
+        else:
+            n = sum(len(c) for c in collect_iou_candidates(candles, args.sequence).values())
+            target = calibration_target(n, quantile=args.target_quantile)
+        found = sum(len(v) for v in calibrated.values())
+        print(f"Limit: {limit} (otomatik)")
+        if found < target:
+            print(f"Uyarı: hedef {target} IOU'ya ulaşılamadı ({found} bulundu)")
+    else:
+        print(f"Limit: {limit}")
     print()
 
-    results = analyze_iou(candles, args.sequence, args.limit)
+    if args.grid:
+        from .web import load_news_data_from_directory, iou_has_news
+
+        news_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "news_data")
+        events_by_date = load_news_data_from_directory(news_dir)
+        limits, tolerances = default_grid_axes(limit, 0.005)
+        try:
+            if args.grid_limits:
+                limits = parse_grid_range(args.grid_limits)
+            if args.grid_tolerances:
+                tolerances = parse_grid_range(args.grid_tolerances)
+        except ValueError as e:
+            print(f"Hata: {e}")
+            return 1
+        grid = evaluate_limit_grid(
+            collect_iou_candidates(candles, args.sequence),
+            limits,
+            tolerances,
+            lambda iou: iou_has_news(events_by_date, iou),
+        )
+        print(format_limit_grid(grid))
+        return 0
+
+    if args.stream:
+        tracker = IOUTracker(args.sequence, limit)
+        for candle in candles:
+            for offset, iou in tracker.push(candle):
+                print(f"[{fmt_ts(candle.ts)}] Offset {offset:+d}: Seq={iou.seq_value}, Time={fmt_ts(iou.timestamp)}, OC: {fmt_pip(iou.oc)}, PrevOC: {fmt_pip(iou.prev_oc)}")
+        for offset, iou in tracker.flush():
+            print(f"[end] Offset {offset:+d}: Seq={iou.seq_value}, Time={fmt_ts(iou.timestamp)}, OC: {fmt_pip(iou.oc)}, PrevOC: {fmt_pip(iou.prev_oc)}")
+        return 0
+
+    results = calibrated if calibrated is not None else analyze_iou(candles, args.sequence, limit)
     
     total_iou = sum(len(v) for v in results.values())
     print(f"Total IOU candles found: {total_iou}")
@@ -3,13 +3,19 @@ import argparse
 import html
 import io
 import csv
-import json
 import os
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Iterable, Tuple
+from datetime import datetime
 
 from .counter import (
     analyze_iou,
+    analyze_iou_calibrated,
+    calibration_note,
+    collect_iou_candidates,
+    default_grid_axes,
+    evaluate_limit_grid,
+    parse_grid_range,
+    LimitGrid,
     load_candles,
     fmt_ts,
     fmt_pip,
@@ -22,6 +28,8 @@ from .counter import (
 )
 from email.parser import BytesParser
 from email.policy import default as email_default
+from news_converter.index import NewsIndex, format_currencies, parse_currencies
+from news_converter.store import get_news_store
 
 
 def load_news_data_from_directory(
@@ -31,45 +39,16 @@ def load_news_data_from_directory(
     Load all ForexFactory news data from JSON files in a directory.
     Returns a dict: date_string -> list of events for that date.
     Automatically merges all JSON files in the directory.
+    Served from the process-wide news store (reloaded only when files change).
     """
-    if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
-        return {}
-
-    events_by_date: Dict[str, List[Dict[str, Any]]] = {}
-
-    try:
-        # Find all JSON files in directory
-        json_files = [f for f in os.listdir(directory_path) if f.endswith(".json")]
-
-        for json_file in json_files:
-            json_path = os.path.join(directory_path, json_file)
-            try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                # Index events by date
-                for day in data.get("days", []):
-                    date_str = day.get("date")  # e.g., "2025-03-17"
-                    events = day.get("events", [])
-                    if date_str:
-                        # Merge events if date already exists
-                        if date_str in events_by_date:
-                            events_by_date[date_str].extend(events)
-                        else:
-                            events_by_date[date_str] = events
-            except Exception:
-                # Skip invalid JSON files
-                continue
-
-        return events_by_date
-    except Exception:
-        return {}
+    return get_news_store(directory_path).snapshot().events_by_date
 
 
 def find_news_in_timerange(
     events_by_date: Dict[str, List[Dict[str, Any]]],
     start_ts: datetime,
     duration_minutes: int = 120,
+    currencies: Optional[Iterable[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Find news events that fall within [start_ts, start_ts + duration_minutes).
@@ -77,76 +56,39 @@ def find_news_in_timerange(
     News data is in UTC-4 (same as candle data).
 
     IMPORTANT: Uses candle year to match news (ignores JSON year).
+    Lookups go through a cached NewsIndex (bisect over pre-parsed events);
+    ``currencies`` limits them to those currency partitions.
     """
-    end_ts = start_ts + timedelta(minutes=duration_minutes)
-    matching = []
-
-    # For null events, extend search to 1 hour before candle start
-    extended_start_ts = start_ts - timedelta(hours=1)
-
-    # Get candle year to match with news (JSON might have different year)
-    candle_year = start_ts.year
-
-    # Check all dates in events_by_date with matching month-day
-    for date_str, events in events_by_date.items():
-        try:
-            # Parse JSON date (might be any year)
-            json_year, json_month, json_day = map(int, date_str.split("-"))
-
-            # Replace with candle year for comparison
-            adjusted_date = datetime(candle_year, json_month, json_day)
-
-            # Check if this date is relevant to our time range
-            if not (
-                adjusted_date.date() >= extended_start_ts.date() - timedelta(days=1)
-                and adjusted_date.date() <= end_ts.date() + timedelta(days=1)
-            ):
-                continue
-
-            for event in events:
-                time_24h = event.get("time_24h")
-
-                try:
-                    # Handle All Day events - they apply to the whole day
-                    if not time_24h:
-                        # All Day event - check if the date falls within our range
-                        event_date = datetime(candle_year, json_month, json_day)
-                        if (
-                            extended_start_ts.date()
-                            <= event_date.date()
-                            <= end_ts.date()
-                        ):
-                            matching.append(event)
-                        continue
-
-                    # Parse time_24h (e.g., "04:48")
-                    hour, minute = map(int, time_24h.split(":"))
-
-                    # Create event timestamp using candle year
-                    event_ts = datetime(candle_year, json_month, json_day, hour, minute)
-
-                    # Check if event has null values (speeches, statements)
-                    values = event.get("values", {})
-                    is_null_event = (
-                        values.get("actual") is None
-                        and values.get("forecast") is None
-                        and values.get("previous") is None
-                    )
+    return NewsIndex.of(events_by_date).find(start_ts, duration_minutes, currencies=currencies)
 
-                    # For null events: check 1 hour before candle to candle end
-                    # For regular events: check candle start to candle end
-                    if is_null_event:
-                        if extended_start_ts <= event_ts < end_ts:
-                            matching.append(event)
-                    else:
-                        if start_ts <= event_ts < end_ts:
-                            matching.append(event)
-                except Exception:
-                    continue
-        except Exception:
-            continue
 
-    return matching
+def news_affects_xyz(
+    events_by_date: Dict[str, List[Dict[str, Any]]],
+    start_ts: datetime,
+    duration_minutes: int = 120,
+    currencies: Optional[Iterable[str]] = None,
+) -> bool:
+    """
+    True when the find_news_in_timerange window has a NORMAL or SPEECH event
+    (the XYZ rule). Uses categories precomputed by NewsIndex.
+    """
+    return NewsIndex.of(events_by_date).has_news(start_ts, duration_minutes, currencies=currencies)
+
+
+def news_for_candles(
+    events_by_date: Dict[str, List[Dict[str, Any]]],
+    timestamps: Iterable[datetime],
+    duration_minutes: int = 120,
+    currencies: Optional[Iterable[str]] = None,
+) -> Dict[datetime, Tuple[bool, List[Dict[str, Any]]]]:
+    """
+    find_news_in_timerange + news_affects_xyz for many candles at once:
+    timestamp -> (affects XYZ, events), from one merge-join pass over the
+    sorted candle times and the NewsIndex.
+    """
+    stamps = sorted(set(timestamps))
+    flags, events = NewsIndex.of(events_by_date).scan(stamps, duration_minutes, currencies=currencies)
+    return dict(zip(stamps, zip(flags, events)))
 
 
 def categorize_news_event(event: Dict[str, Any]) -> str:
@@ -158,32 +100,10 @@ def categorize_news_event(event: Dict[str, Any]) -> str:
     - NORMAL: has values (actual/forecast/previous) - regardless of time
 
     Returns category string: 'HOLIDAY', 'SPEECH', 'ALLDAY', 'NORMAL', or 'UNKNOWN'
-    """
-    title = event.get("title", "").lower()
-    time_label = event.get("time_label", "").lower()
-    time_24h = event.get("time_24h")
-    values = event.get("values", {})
-
-    # Check if event has any values
-    has_values = any(
-        v is not None
-        for v in [values.get("actual"), values.get("forecast"), values.get("previous")]
-    )
-    is_null = not has_values
-    is_all_day = time_label == "all day" or time_24h is None
-
-    # Category decision tree
-    if "holiday" in title and is_all_day and is_null:
-        return "HOLIDAY"
-    elif has_values:
-        # If event has values, it's NORMAL (affects XYZ) - regardless of having time or being All Day
-        return "NORMAL"
-    elif time_24h and is_null:
-        return "SPEECH"
-    elif is_all_day and is_null:
-        return "ALLDAY"
 
-    return "UNKNOWN"
+    Indexed events reuse the category computed once by NewsIndex.
+    """
+    return NewsIndex.category_of(event)
 
 
 def format_news_events(events: List[Dict[str, Any]]) -> str:
@@ -231,6 +151,56 @@ def format_news_events(events: List[Dict[str, Any]]) -> str:
     return "var: " + "; ".join(parts)
 
 
+def iou_has_news(
+    events_by_date: Dict[str, List[Dict[str, Any]]],
+    iou: IOUResult,
+    currencies: Optional[Iterable[str]] = None,
+) -> bool:
+    """True when the IOU candle has a NORMAL or SPEECH event (XYZ rule)."""
+    return news_affects_xyz(events_by_date, iou.timestamp, 120, currencies=currencies)
+
+
+def render_limit_grid(grid: LimitGrid, title: str = "") -> str:
+    """
+    Compact heatmap of XYZ sets over limit (rows) × tolerance (columns).
+    Cell shade follows XYZ size; offset stability is listed below the table.
+    """
+    def fmt_set(offsets: List[int]) -> str:
+        return ", ".join(f"{o:+d}" if o != 0 else "0" for o in offsets) or "Ø"
+
+    rows = ""
+    for limit in grid.limits:
+        rows += f"<tr><th>{limit:g}</th>"
+        for tolerance in grid.tolerances:
+            xyz = grid.xyz[(limit, tolerance)]
+            shade = 255 - int(len(xyz) / 7 * 120)
+            rows += (
+                f"<td style='background:rgb({shade},{shade},255); font-size:11px;'>"
+                f"{html.escape(fmt_set(xyz))}<br>"
+                f"<span style='color:#666;'>{grid.iou_counts[(limit, tolerance)]} IOU</span></td>"
+            )
+        rows += "</tr>"
+
+    stability = " ".join(
+        f"<code style='background:#fff; padding:2px 6px; border-radius:4px;'>"
+        f"{o:+d}: {grid.stability[o]:.0%}</code>" if o != 0 else
+        f"<code style='background:#fff; padding:2px 6px; border-radius:4px;'>0: {grid.stability[o]:.0%}</code>"
+        for o in range(-3, 4)
+    )
+    header = "".join(f"<th>{t:g}</th>" for t in grid.tolerances)
+    return f"""
+    <div class='card' style='background:#f3f0ff; border-left:4px solid #6f42c1;'>
+      <h3>🧮 Limit × Tolerance Izgarası{f" - {html.escape(title)}" if title else ""}</h3>
+      <p>Her hücre o limit/tolerance için XYZ kümesini ve toplam IOU sayısını gösterir. Koyu hücre = büyük XYZ kümesi.</p>
+      <table>
+        <thead><tr><th>Limit \\ Tol</th>{header}</tr></thead>
+        <tbody>{rows}</tbody>
+      </table>
+      <p style='margin-top:8px;'><strong>Kararlılık (XYZ'de kalma oranı):</strong> {stability}</p>
+    </div>
+    """
+
+
 def load_candles_from_text(text: str) -> List[Candle]:
     sample = text[:4096]
     try:
@@ -343,11 +313,24 @@ def render_index() -> bytes:
         <input type='number' name='limit' step='0.001' value='0.1' min='0' required />
         <label>Tolerance (güvenlik payı):</label>
         <input type='number' name='tolerance' step='0.001' value='0.005' min='0' required />
+        <label>Hedef IOU Sayısı (opsiyonel, limiti otomatik seçer):</label>
+        <input type='number' name='target_count' step='1' min='1' />
         <div>
           <label>
             <input type='checkbox' name='xyz_analysis' checked /> XYZ Küme Analizi
           </label>
         </div>
+        <label>Haber Para Birimleri (boş: dosya adından, *: tümü):</label>
+        <input type='text' name='currencies' placeholder='USD,JPY' />
+        <div>
+          <label>
+            <input type='checkbox' name='limit_grid' /> Limit × Tolerance Izgarası (XYZ kararlılığı)
+          </label>
+        </div>
+        <label>Izgara Limitleri (opsiyonel, start:stop:step veya virgüllü):</label>
+        <input type='text' name='grid_limits' placeholder='0.05:0.15:0.01' />
+        <label>Izgara Toleransları (opsiyonel):</label>
+        <input type='text' name='grid_tolerances' placeholder='0,0.0025,0.005,0.0075,0.01' />
 
         <button type='submit'>Analiz Et</button>
       </form>
@@ -362,6 +345,7 @@ def render_index() -> bytes:
       </ul>
       <p><strong>Not:</strong> S1 için 1 ve 3 değerleri, S2 için 1 ve 5 değerleri analiz edilmez.</p>
       <p><strong>XYZ Analizi:</strong> Habersiz IOU içeren offsetler elenir, kalan offsetler XYZ kümesini oluşturur.</p>
+      <p><strong>Haber Para Birimleri:</strong> Boş bırakılırsa dosya adındaki pariteden alınır (ör. EURUSD → EUR, USD); "All" haberleri her zaman dahildir.</p>
     </div>
     """
     return page("app120_iou", body)
@@ -374,8 +358,16 @@ def render_results(
     results: Dict[int, List[IOUResult]],
     xyz_analysis: bool = False,
     events_by_date: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    target_count: Optional[int] = None,
+    found_count: Optional[int] = None,
+    limit_grid: Optional[LimitGrid] = None,
+    currencies: Optional[Iterable[str]] = None,
 ) -> bytes:
     total_iou = sum(len(v) for v in results.values())
+    limit_note = ""
+    if target_count:
+        found = total_iou if found_count is None else found_count
+        limit_note = f" (otomatik; {html.escape(calibration_note(limit, found, target_count))})"
 
     body = f"""
     <div class='card'>
@@ -383,9 +375,10 @@ def render_results(
       <div class='summary'>
         <strong>📁 Veri:</strong> {len(candles)} mum ({fmt_ts(candles[0].ts)} → {fmt_ts(candles[-1].ts)})<br>
         <strong>🔢 Sequence:</strong> {sequence} (Filtered: {", ".join(map(str, SEQUENCES_FILTERED[sequence]))})<br>
-        <strong>📏 Limit:</strong> {limit}<br>
+        <strong>📏 Limit:</strong> {limit}{limit_note}<br>
         <strong>🎯 Toplam IOU Mum:</strong> {total_iou}<br>
-        <strong>🎯 XYZ Analizi:</strong> {"✅ Aktif" if xyz_analysis else "❌ Pasif"}
+        <strong>🎯 XYZ Analizi:</strong> {"✅ Aktif" if xyz_analysis else "❌ Pasif"}<br>
+        <strong>💱 Haber Para Birimleri:</strong> {html.escape(format_currencies(currencies))}
       </div>
     </div>
     """
@@ -415,7 +408,7 @@ def render_results(
                 has_news = False
                 if xyz_analysis and events_by_date:
                     news_events = find_news_in_timerange(
-                        events_by_date, iou.timestamp, 120
+                        events_by_date, iou.timestamp, 120, currencies=currencies
                     )
                     news_text = format_news_events(news_events)
 
@@ -498,6 +491,9 @@ def render_results(
         </div>
         """
 
+    if limit_grid is not None:
+        body += render_limit_grid(limit_grid)
+
     body += """
     <div class='card'>
       <a href='/' style='text-decoration:none;'>
@@ -549,23 +545,42 @@ class Handler(BaseHTTPRequestHandler):
                 )
 
                 csv_text = None
+                csv_name = ""
+                currency_spec = ""
                 sequence = "S2"
                 limit = 0.1
                 tolerance = 0.005
+                target_count = None
                 xyz_analysis = False
+                limit_grid = False
+                grid_limits = ""
+                grid_tolerances = ""
 
                 for part in msg.iter_parts():
                     name = part.get_param("name", header="content-disposition")
                     if name == "csv":
                         csv_text = part.get_content()
+                        csv_name = part.get_filename() or ""
                     elif name == "sequence":
                         sequence = part.get_content().strip()
                     elif name == "limit":
                         limit = float(part.get_content().strip())
                     elif name == "tolerance":
                         tolerance = float(part.get_content().strip())
+                    elif name == "target_count":
+                        value = part.get_content().strip()
+                        if value:
+                            target_count = max(1, int(value))
                     elif name == "xyz_analysis":
                         xyz_analysis = True
+                    elif name == "limit_grid":
+                        limit_grid = True
+                    elif name == "grid_limits":
+                        grid_limits = part.get_content().strip()
+                    elif name == "grid_tolerances":
+                        grid_tolerances = part.get_content().strip()
+                    elif name == "currencies":
+                        currency_spec = part.get_content().strip()
 
                 if not csv_text:
                     raise ValueError("CSV dosyası yüklenemedi")
@@ -573,24 +588,49 @@ class Handler(BaseHTTPRequestHandler):
                 candles = load_candles_from_text(csv_text)
                 if not candles:
                     raise ValueError("CSV verisi boş")
+                currencies = parse_currencies(currency_spec, csv_name)
 
-                results = analyze_iou(candles, sequence, limit, tolerance)
+                if target_count:
+                    limit, results = analyze_iou_calibrated(
+                        candles, sequence, tolerance, target_count=target_count, default_limit=limit
+                    )
+                else:
+                    results = analyze_iou(candles, sequence, limit, tolerance)
 
-                # Load news data if xyz_analysis is enabled
+                # Load news data if xyz_analysis or the limit grid is enabled
                 events_by_date = None
-                if xyz_analysis:
+                if xyz_analysis or limit_grid:
                     news_dir = os.path.join(
                         os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
                         "news_data",
                     )
-                    events_by_date = load_news_data_from_directory(news_dir)
+                    news = get_news_store(news_dir).snapshot()
+                    events_by_date = news.events_by_date
+
+                grid = None
+                if limit_grid:
+                    limits, tolerances = default_grid_axes(limit, tolerance)
+                    if grid_limits:
+                        limits = parse_grid_range(grid_limits)
+                    if grid_tolerances:
+                        tolerances = parse_grid_range(grid_tolerances)
+                    grid = evaluate_limit_grid(
+                        collect_iou_candidates(candles, sequence),
+                        limits,
+                        tolerances,
+                        lambda iou: iou_has_news(events_by_date, iou, currencies),
+                    )
 
                 self.send_response(200)
                 self.send_header("Content-Type", "text/html; charset=utf-8")
                 self.end_headers()
                 self.wfile.write(
                     render_results(
-                        candles, sequence, limit, results, xyz_analysis, events_by_date
+                        candles, sequence, limit, results, xyz_analysis, events_by_date,
+                        target_count=target_count,
+                        found_count=sum(len(v) for v in results.values()),
+                        limit_grid=grid,
+                        currencies=currencies,
                     )
                 )
 
@@ -613,6 +653,8 @@ class Handler(BaseHTTPRequestHandler):
 
 def run(host: str, port: int):
     """Run function for appsuite integration"""
+    # Parse news_data/ once up front; requests reuse it until a file changes
+    get_news_store(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "news_data")).warm()
     server = HTTPServer((host, port), Handler)
     print(f"app120.iou web: http://{host}:{port}/")
     server.serve_forever()
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from datetime import datetime, time as dtime, timedelta
 from typing import List, Optional, Tuple, Dict
 
+from pairscan.scanner import IOVResult, scan_signed_pairs
+
 
 MINUTES_PER_STEP = 120
 DEFAULT_START_TOD = dtime(hour=18, minute=0)
@@ -31,18 +33,6 @@ SEQUENCES_FILTERED: Dict[str, List[int]] = {
 }
 
 
-@dataclass
-class IOVResult:
-    seq_value: int
-    offset: int
-    index: int
-    timestamp: datetime
-    oc: float
-    prev_oc: float
-    prev_index: int
-    prev_timestamp: datetime
-
-
 def normalize_key(name: str) -> str:
     return name.strip().strip('"').strip("'").lower()
 
@@ -321,17 +311,16 @@ def determine_offset_start(
         return None, None, "before-data"
 
 
-def analyze_iov(
+def allocate_filtered(
     candles: List[Candle],
     sequence: str,
-    limit: float,
-) -> Dict[int, List[IOVResult]]:
+) -> Dict[int, List[Tuple[int, int]]]:
     """
-    Analyze IOV candles for all offsets (-3 to +3).
+    Allocate the filtered sequence values for all offsets (-3 to +3).
     
-    Returns: Dict[offset] -> List[IOVResult]
+    Returns: Dict[offset] -> List[(seq_value, candle index)]
     """
-    results: Dict[int, List[IOVResult]] = {}
+    allocated: Dict[int, List[Tuple[int, int]]] = {}
     
     start_tod = DEFAULT_START_TOD
     base_idx, _ = find_start_index(candles, start_tod)
@@ -342,7 +331,7 @@ def analyze_iov(
     seq_values_filtered = SEQUENCES_FILTERED[sequence]
     
     for offset in range(-3, 4):
-        iov_list: List[IOVResult] = []
+        alloc_list: List[Tuple[int, int]] = []
         
         start_idx, target_ts, offset_status = determine_offset_start(candles, base_idx, offset, MINUTES_PER_STEP, dc_flags)
         base_ts = candles[base_idx].ts.replace(second=0, microsecond=0)
@@ -370,7 +359,7 @@ def analyze_iov(
                 missing_steps = max(0, delta_minutes // MINUTES_PER_STEP)
             else:
                 # Really no data to work with
-                results[offset] = iov_list
+                allocated[offset] = alloc_list
                 continue
         
         # Build compute sequence (app120 style)
@@ -394,46 +383,37 @@ def analyze_iov(
             if v <= missing_steps:
                 seq_map[v] = SequenceAllocation(None, None, False)
         
-        # Analyze only filtered sequence values
+        # Keep only filtered sequence values
         for seq_val in seq_values_filtered:
             alloc = seq_map.get(seq_val)
             if alloc is None or alloc.idx is None:
                 continue
-            
-            idx = alloc.idx
-            if idx <= 0 or idx >= len(candles):
-                continue
-            
-            candle = candles[idx]
-            prev_candle = candles[idx - 1]
-            
-            oc = candle.close - candle.open
-            prev_oc = prev_candle.close - prev_candle.open
-            
-            # Check IOV criteria
-            # 1. Both |OC| and |PrevOC| must be >= limit
-            if abs(oc) < limit or abs(prev_oc) < limit:
-                continue
-            
-            # 2. OC and PrevOC must have opposite signs
-            if (oc > 0 and prev_oc > 0) or (oc < 0 and prev_oc < 0):
-                continue
-            
-            # This is an IOV candle!
-            iov_list.append(IOVResult(
-                seq_value=seq_val,
-                offset=offset,
-                index=idx,
-                timestamp=candle.ts,
-                oc=oc,
-                prev_oc=prev_oc,
-                prev_index=idx - 1,
-                prev_timestamp=prev_candle.ts,
-            ))
+            alloc_list.append((seq_val, alloc.idx))
         
-        results[offset] = iov_list
+        allocated[offset] = alloc_list
     
-    return results
+    return allocated
+
+
+def analyze_iov(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+) -> Dict[int, List[IOVResult]]:
+    """
+    Analyze IOV candles for all offsets (-3 to +3).
+    
+    Returns: Dict[offset] -> List[IOVResult]
+    """
+    # IOV has no time restrictions and no tolerance band
+    _, iov_results = scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        limit,
+        0.0,
+        iov_cls=IOVResult,
+    )
+    return iov_results
 
 
 def fmt_ts(dt: Optional[datetime]) -> str:
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from datetime import datetime, time as dtime, timedelta, timezone
 from typing import List, Optional, Tuple, Dict
 
+from pairscan.scanner import IOVResult, scan_signed_pairs
+
 
 @dataclass
 class Candle:
@@ -726,33 +728,31 @@ class IOUResult:
     prev_timestamp: datetime
 
 
-def analyze_iou(
+def is_iou_excluded(ts: datetime) -> bool:
+    """18:00, 18:48 ve 19:36 mumları IOU/IOV olamaz."""
+    return (ts.hour == 18 and ts.minute in [0, 48]) or (ts.hour == 19 and ts.minute == 36)
+
+
+def allocate_filtered(
     candles: List[Candle],
     sequence: str,
-    limit: float,
-    tolerance: float = 0.005,
-) -> Dict[int, List[IOUResult]]:
+) -> Dict[int, List[Tuple[int, int]]]:
     """
-    Analyze IOU candles for all offsets (-3 to +3).
+    Allocate the filtered sequence values for all offsets (-3 to +3).
     
-    IOU Criteria:
-        1. |OC| >= limit
-        2. |PrevOC| >= limit
-        3. OC and PrevOC have SAME signs (++ or --)
-    
-    Returns: Dict[offset] -> List[IOUResult]
+    Returns: Dict[offset] -> List[(seq_value, candle index)]
     """
-    results: Dict[int, List[IOUResult]] = {}
+    allocated: Dict[int, List[Tuple[int, int]]] = {}
     
     base_idx, _ = find_start_index(candles, DEFAULT_START_TOD)
     dc_flags = compute_dc_flags(candles)
     
-    # Use FULL sequence for allocation, FILTERED for IOU check
+    # Use FULL sequence for allocation, FILTERED for IOU/IOV check
     seq_values_full = SEQUENCES[sequence]
     seq_values_filtered = SEQUENCES_FILTERED[sequence]
     
     for offset in range(-3, 4):
-        iou_list: List[IOUResult] = []
+        alloc_list: List[Tuple[int, int]] = []
         
         start_idx, target_ts, offset_status = determine_offset_start(candles, base_idx, offset, MINUTES_PER_STEP)
         base_ts = candles[base_idx].ts.replace(second=0, microsecond=0)
@@ -780,7 +780,7 @@ def analyze_iou(
                 missing_steps = max(0, delta_minutes // MINUTES_PER_STEP)
             else:
                 # No data to work with
-                results[offset] = iou_list
+                allocated[offset] = alloc_list
                 continue
         
         # Build compute sequence
@@ -804,54 +804,68 @@ def analyze_iou(
             if v <= missing_steps:
                 seq_map[v] = SequenceAllocation(None, None, False, False)
         
-        # Analyze only filtered sequence values
+        # Keep only filtered sequence values
         for seq_val in seq_values_filtered:
             alloc = seq_map.get(seq_val)
             if alloc is None or alloc.idx is None:
                 continue
-            
-            idx = alloc.idx
-            if idx <= 0 or idx >= len(candles):
-                continue
-            
-            candle = candles[idx]
-            prev_candle = candles[idx - 1]
-            
-            # 18:00, 18:48 ve 19:36 mumları IOU olamaz
-            if (candle.ts.hour == 18 and candle.ts.minute in [0, 48]) or \
-               (candle.ts.hour == 19 and candle.ts.minute == 36):
-                continue  # IOU olamaz
-            
-            oc = candle.close - candle.open
-            prev_oc = prev_candle.close - prev_candle.open
-            
-            # Check IOU criteria
-            # 1. Both |OC| and |PrevOC| must be >= limit
-            if abs(oc) < limit or abs(prev_oc) < limit:
-                continue  # Below limit, not IOU
-            
-            # 2. Skip if too close to limit (within ±tolerance for safety)
-            if abs(abs(oc) - limit) < tolerance or abs(abs(prev_oc) - limit) < tolerance:
-                continue  # Too close to limit, unreliable
-            
-            # 2. OC and PrevOC must have SAME signs (opposite of IOV)
-            if not ((oc > 0 and prev_oc > 0) or (oc < 0 and prev_oc < 0)):
-                continue
-            
-            # This is an IOU candle!
-            iou_list.append(IOUResult(
-                seq_value=seq_val,
-                index=idx,
-                timestamp=candle.ts,
-                oc=oc,
-                prev_oc=prev_oc,
-                prev_index=idx - 1,
-                prev_timestamp=prev_candle.ts,
-            ))
+            alloc_list.append((seq_val, alloc.idx))
         
-        results[offset] = iou_list
+        allocated[offset] = alloc_list
+    
+    return allocated
+
+
+def analyze_iou(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+) -> Dict[int, List[IOUResult]]:
+    """
+    Analyze IOU candles for all offsets (-3 to +3).
+    
+    IOU Criteria:
+        1. |OC| >= limit
+        2. |PrevOC| >= limit
+        3. OC and PrevOC have SAME signs (++ or --)
+    
+    Returns: Dict[offset] -> List[IOUResult]
+    """
+    iou_results, _ = scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        limit,
+        tolerance,
+        excluded=is_iou_excluded,
+        iou_cls=IOUResult,
+    )
+    return iou_results
+
+
+def analyze_iou_iov(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+) -> Tuple[Dict[int, List[IOUResult]], Dict[int, List[IOVResult]]]:
+    """
+    IOU and IOV candles for all offsets from a single allocation pass.
+    
+    IOV uses the same limit, tolerance and time restrictions as IOU; only
+    the sign rule differs (OC and PrevOC opposite).
     
-    return results
+    Returns: (Dict[offset] -> List[IOUResult], Dict[offset] -> List[IOVResult])
+    """
+    return scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        limit,
+        tolerance,
+        excluded=is_iou_excluded,
+        iou_cls=IOUResult,
+        iov_cls=IOVResult,
+    )
 
 
 if __name__ == "__main__":
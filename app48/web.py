@@ -4,8 +4,8 @@ import html
 import io
 import json
 import os
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Iterable, Tuple
+from datetime import datetime
 
 from .main import (
     Candle,
@@ -23,12 +23,31 @@ from .main import (
     insert_synthetic_48m,
     convert_12m_to_48m,
     analyze_iou,
+    analyze_iou_iov,
     IOUResult,
 )
 import csv
 from email.parser import BytesParser
 from email.policy import default as email_default
-from .pattern import find_valid_patterns, format_pattern_results
+from news_converter.index import NewsIndex, format_currencies, parse_currencies
+from news_converter.store import get_news_store
+from pairscan.scanner import render_iov_table
+from pattern_engine import (
+    ALL_OFFSETS_MASK,
+    DEFAULT_TOP_K,
+    PATTERN_PAGE_SIZE,
+    PatternAutomaton,
+    format_pattern_counts,
+    format_pattern_page,
+    format_pattern_results,
+    format_xyz_field,
+    get_pattern_handle,
+    parse_xyz_field,
+    pattern_page,
+    pattern_page_json,
+    store_pattern_handle,
+    suggest_jokers,
+)
 
 
 def load_candles_from_text(text: str) -> List[Candle]:
@@ -103,45 +122,16 @@ def load_news_data_from_directory(
     Load all ForexFactory news data from JSON files in a directory.
     Returns a dict: date_string -> list of events for that date.
     Automatically merges all JSON files in the directory.
+    Served from the process-wide news store (reloaded only when files change).
     """
-    if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
-        return {}
-
-    events_by_date: Dict[str, List[Dict[str, Any]]] = {}
-
-    try:
-        # Find all JSON files in directory
-        json_files = [f for f in os.listdir(directory_path) if f.endswith(".json")]
-
-        for json_file in json_files:
-            json_path = os.path.join(directory_path, json_file)
-            try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                # Index events by date
-                for day in data.get("days", []):
-                    date_str = day.get("date")  # e.g., "2025-03-17"
-                    events = day.get("events", [])
-                    if date_str:
-                        # Merge events if date already exists
-                        if date_str in events_by_date:
-                            events_by_date[date_str].extend(events)
-                        else:
-                            events_by_date[date_str] = events
-            except Exception:
-                # Skip invalid JSON files
-                continue
-
-        return events_by_date
-    except Exception:
-        return {}
+    return get_news_store(directory_path).snapshot().events_by_date
 
 
 def find_news_in_timerange(
     events_by_date: Dict[str, List[Dict[str, Any]]],
     start_ts: datetime,
     duration_minutes: int = 48,
+    currencies: Optional[Iterable[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Find news events that fall within [start_ts, start_ts + duration_minutes).
@@ -149,76 +139,39 @@ def find_news_in_timerange(
     News data is in UTC-4 (same as candle data).
 
     IMPORTANT: Uses candle year to match news (ignores JSON year).
+    Lookups go through a cached NewsIndex (bisect over pre-parsed events);
+    ``currencies`` limits them to those currency partitions.
     """
-    end_ts = start_ts + timedelta(minutes=duration_minutes)
-    matching = []
-
-    # For null events, extend search to 1 hour before candle start
-    extended_start_ts = start_ts - timedelta(hours=1)
+    return NewsIndex.of(events_by_date).find(start_ts, duration_minutes, currencies=currencies)
 
-    # Get candle year to match with news (JSON might have different year)
-    candle_year = start_ts.year
-
-    # Check all dates in events_by_date with matching month-day
-    for date_str, events in events_by_date.items():
-        try:
-            # Parse JSON date (might be any year)
-            json_year, json_month, json_day = map(int, date_str.split("-"))
-
-            # Replace with candle year for comparison
-            adjusted_date = datetime(candle_year, json_month, json_day)
-
-            # Check if this date is relevant to our time range
-            if not (
-                adjusted_date.date() >= extended_start_ts.date() - timedelta(days=1)
-                and adjusted_date.date() <= end_ts.date() + timedelta(days=1)
-            ):
-                continue
-
-            for event in events:
-                time_24h = event.get("time_24h")
-
-                try:
-                    # Handle All Day events - they apply to the whole day
-                    if not time_24h:
-                        # All Day event - check if the date falls within our range
-                        event_date = datetime(candle_year, json_month, json_day)
-                        if (
-                            extended_start_ts.date()
-                            <= event_date.date()
-                            <= end_ts.date()
-                        ):
-                            matching.append(event)
-                        continue
 
-                    # Parse time_24h (e.g., "04:48")
-                    hour, minute = map(int, time_24h.split(":"))
+def news_affects_xyz(
+    events_by_date: Dict[str, List[Dict[str, Any]]],
+    start_ts: datetime,
+    duration_minutes: int = 48,
+    currencies: Optional[Iterable[str]] = None,
+) -> bool:
+    """
+    True when the find_news_in_timerange window has a NORMAL or SPEECH event
+    (the XYZ rule). Uses categories precomputed by NewsIndex.
+    """
+    return NewsIndex.of(events_by_date).has_news(start_ts, duration_minutes, currencies=currencies)
 
-                    # Create event timestamp using candle year
-                    event_ts = datetime(candle_year, json_month, json_day, hour, minute)
 
-                    # Check if event has null values (speeches, statements)
-                    values = event.get("values", {})
-                    is_null_event = (
-                        values.get("actual") is None
-                        and values.get("forecast") is None
-                        and values.get("previous") is None
-                    )
-
-                    # For null events: check 1 hour before candle to candle end
-                    # For regular events: check candle start to candle end
-                    if is_null_event:
-                        if extended_start_ts <= event_ts < end_ts:
-                            matching.append(event)
-                    else:
-                        if start_ts <= event_ts < end_ts:
-                            matching.append(event)
-                except Exception:
-                    continue
-        except Exception:
-            continue
-
-    return matching
+def news_for_candles(
+    events_by_date: Dict[str, List[Dict[str, Any]]],
+    timestamps: Iterable[datetime],
+    duration_minutes: int = 48,
+    currencies: Optional[Iterable[str]] = None,
+) -> Dict[datetime, Tuple[bool, List[Dict[str, Any]]]]:
+    """
+    find_news_in_timerange + news_affects_xyz for many candles at once:
+    timestamp -> (affects XYZ, events), from one merge-join pass over the
+    sorted candle times and the NewsIndex.
+    """
+    stamps = sorted(set(timestamps))
+    flags, events = NewsIndex.of(events_by_date).scan(stamps, duration_minutes, currencies=currencies)
+    return dict(zip(stamps, zip(flags, events)))
 
 
 def categorize_news_event(event: Dict[str, Any]) -> str:
@@ -230,32 +183,10 @@ def categorize_news_event(event: Dict[str, Any]) -> str:
     - NORMAL: has values (actual/forecast/previous) - regardless of time
 
     Returns category string: 'HOLIDAY', 'SPEECH', 'ALLDAY', 'NORMAL', or 'UNKNOWN'
-    """
-    title = event.get("title", "").lower()
-    time_label = event.get("time_label", "").lower()
-    time_24h = event.get("time_24h")
-    values = event.get("values", {})
-
-    # Check if event has any values
-    has_values = any(
-        v is not None
-        for v in [values.get("actual"), values.get("forecast"), values.get("previous")]
-    )
-    is_null = not has_values
-    is_all_day = time_label == "all day" or time_24h is None
 
-    # Category decision tree
-    if "holiday" in title and is_all_day and is_null:
-        return "HOLIDAY"
-    elif has_values:
-        # If event has values, it's NORMAL (affects XYZ) - regardless of having time or being All Day
-        return "NORMAL"
-    elif time_24h and is_null:
-        return "SPEECH"
-    elif is_all_day and is_null:
-        return "ALLDAY"
-
-    return "UNKNOWN"
+    Indexed events reuse the category computed once by NewsIndex.
+    """
+    return NewsIndex.category_of(event)
 
 
 def format_news_events(events: List[Dict[str, Any]]) -> str:
@@ -493,6 +424,14 @@ def render_iou_index() -> bytes:
             <label>XYZ Özet Tablosu</label>
             <input type='checkbox' name='xyz_summary_table' />
           </div>
+          <div>
+            <label>Haber Para Birimleri</label>
+            <input type='text' name='currencies' placeholder='dosya adından' style='width:110px' />
+          </div>
+          <div>
+            <label>IOV (zıt işaret)</label>
+            <input type='checkbox' name='iov' />
+          </div>
         </div>
         <div style='margin-top:12px;'>
           <button type='submit'>Analiz Et</button>
@@ -502,6 +441,8 @@ def render_iou_index() -> bytes:
     <p><strong>IOU Kriterleri:</strong> |OC| ≥ limit VE |PrevOC| ≥ limit VE aynı işaret (++ veya --)</p>
     <p>2 haftalık değil, <strong>1 haftalık 48m veri</strong> kullanılır.</p>
     <p><strong>XYZ Analizi:</strong> Habersiz IOU içeren offsetler elenir, kalan offsetler XYZ kümesini oluşturur.</p>
+    <p><strong>Haber Para Birimleri:</strong> Boş bırakılırsa dosya adındaki pariteden alınır (ör. EURUSD → EUR, USD); <code>USD,JPY</code> gibi liste veya tüm para birimleri için <code>*</code> girilebilir. "All" haberleri her zaman dahildir.</p>
+    <p><strong>IOV:</strong> İşaretlenirse aynı tarama zıt işaretli (+- veya -+) OC/PrevOC mumlarını da listeler; limit, tolerance ve saat kuralları IOU ile aynıdır.</p>
     """
     return page("app48 - IOU", body, active_tab="iou")
 
@@ -672,6 +613,11 @@ class AppHandler(BaseHTTPRequestHandler):
                 self.send_error(404, "Favicon not found")
                 return
 
+        # Paged pattern results of an earlier /iou_analyze run (HTML or JSON)
+        if self.path.startswith("/patterns"):
+            self._serve_pattern_page()
+            return
+
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
         self.end_headers()
@@ -836,27 +782,27 @@ class AppHandler(BaseHTTPRequestHandler):
 
                 xyz_analysis = "xyz_analysis" in params
                 xyz_summary_table = "xyz_summary_table" in params
+                currency_spec = (params.get("currencies") or "").strip()
+                iov = "iov" in params
                 
                 # Get previous results if this is an appended analysis
                 previous_results = params.get("previous_results", "")
+                # Pattern frontier of the previous analysis, continued only when asked
+                pattern_token = params.get("pattern_token", "") if "continue_patterns" in params else ""
                 
                 # Load news data from directory (auto-detects all JSON files)
                 news_dir = os.path.join(
                     os.path.dirname(os.path.dirname(__file__)), "news_data"
                 )
-                events_by_date = load_news_data_from_directory(news_dir)
+                news = get_news_store(news_dir).snapshot()
+                events_by_date = news.events_by_date
                 
                 # Stage 1: If XYZ analysis enabled, render joker selection interface
                 if xyz_analysis:
-                    self._render_joker_selection(files, sequence, limit, xyz_analysis, events_by_date, previous_results)
+                    self._render_joker_selection(files, sequence, limit, xyz_analysis, events_by_date, previous_results, iov=iov, currency_spec=currency_spec, pattern_token=pattern_token)
                     return
 
-                # Count loaded files
-                json_files_count = 0
-                if os.path.exists(news_dir) and os.path.isdir(news_dir):
-                    json_files_count = len(
-                        [f for f in os.listdir(news_dir) if f.endswith(".json")]
-                    )
+                json_files_count = news.json_files_count
 
                 news_loaded = bool(events_by_date)
 
@@ -871,6 +817,7 @@ class AppHandler(BaseHTTPRequestHandler):
                   <div><strong>Haber Verisi:</strong> {f"✅ {json_files_count} JSON dosyası yüklendi ({len(events_by_date)} gün)" if news_loaded else "❌ news_data/ klasöründe JSON bulunamadı"}</div>
                   <div><strong>XYZ Analizi:</strong> {"✅ Aktif" if xyz_analysis else "❌ Pasif"}</div>
                   <div><strong>XYZ Özet Tablosu:</strong> {"✅ Aktif" if xyz_summary_table else "❌ Pasif"}</div>
+                  <div><strong>Haber Para Birimleri:</strong> {html.escape(currency_spec) if currency_spec else "dosya adından"}</div>
                 </div>
                 """
 
@@ -880,6 +827,7 @@ class AppHandler(BaseHTTPRequestHandler):
                 # Process each file
                 for file_idx, file_obj in enumerate(files, 1):
                     filename = file_obj.get("filename", f"Dosya {file_idx}")
+                    currencies = parse_currencies(currency_spec, filename)
                     raw = file_obj["data"]
                     text = (
                         raw.decode("utf-8", errors="replace")
@@ -905,12 +853,19 @@ class AppHandler(BaseHTTPRequestHandler):
                         candles, _ = insert_synthetic_48m(candles, start_day)
 
                         # Analyze IOU
-                        results = analyze_iou(candles, sequence, limit, tolerance)
+                        file_iov_html = ""
+                        if iov:
+                            results, iov_results = analyze_iou_iov(candles, sequence, limit, tolerance)
+                            if not xyz_summary_table:
+                                file_iov_html = render_iov_table(filename, iov_results)
+                        else:
+                            results = analyze_iou(candles, sequence, limit, tolerance)
                         total_iou = sum(len(v) for v in results.values())
 
                         if total_iou == 0:
                             if not xyz_summary_table:
                                 body += f"<div class='card' style='padding:10px;'><strong>📄 {html.escape(filename)}</strong> - <span style='color:#888;'>IOU yok</span></div>"
+                                body += file_iov_html
                             continue
 
                         # XYZ Analysis: Track news-free IOUs per offset for THIS file
@@ -926,35 +881,33 @@ class AppHandler(BaseHTTPRequestHandler):
                         if not xyz_summary_table:
                             body += f"""
                             <div class='card' style='padding:10px;'>
-                              <strong>📄 {html.escape(filename)}</strong> - {len(candles)} mum, <strong>{total_iou} IOU</strong>
+                              <strong>📄 {html.escape(filename)}</strong> - {len(candles)} mum, <strong>{total_iou} IOU</strong> · 💱 {html.escape(format_currencies(currencies))}
                               <table style='margin-top:8px;'>
                                 <tr><th>Ofs</th><th>Seq</th><th>Idx</th><th>Timestamp</th><th>OC</th><th>PrevOC</th><th>PIdx</th><th>Haber</th></tr>
                             """
 
+                        # All IOU candles of the file in one merge-join pass over the news index
+                        file_news = (
+                            news_for_candles(
+                                events_by_date,
+                                (iou.timestamp for ious in results.values() for iou in ious),
+                                48,
+                                currencies=currencies,
+                            )
+                            if news_loaded
+                            else {}
+                        )
                         for offset in range(-3, 4):
                             for iou in results[offset]:
                                 oc_fmt = format_pip(iou.oc)
                                 prev_oc_fmt = format_pip(iou.prev_oc)
 
-                                # Find news for this candle's timerange (48 minutes)
-                                news_events = (
-                                    find_news_in_timerange(
-                                        events_by_date, iou.timestamp, 48
-                                    )
-                                    if news_loaded
-                                    else []
-                                )
-                                news_text = format_news_events(news_events)
-
-                                # For XYZ analysis: NORMAL and SPEECH category events count as "news"
+                                # News for this candle's timerange (48 minutes), from the per-file scan
+                                # XYZ rule (has_news): NORMAL and SPEECH category events count as "news"
                                 # HOLIDAY, ALLDAY events are shown but don't affect XYZ filtering
                                 # SPEECH events (with 1-hour-before search) affect XYZ as they have market impact
-                                affecting_events = [
-                                    e
-                                    for e in news_events
-                                    if categorize_news_event(e) in ["NORMAL", "SPEECH"]
-                                ]
-                                has_news = bool(affecting_events)
+                                has_news, news_events = file_news.get(iou.timestamp, (False, []))
+                                news_text = format_news_events(news_events)
 
                                 # Track for XYZ analysis (per file)
                                 if xyz_analysis:
@@ -1019,6 +972,7 @@ class AppHandler(BaseHTTPRequestHandler):
 
                         if not xyz_summary_table:
                             body += "</div>"
+                            body += file_iov_html
 
                         # Collect data for summary table
                         if xyz_summary_table and xyz_analysis:
@@ -1432,16 +1386,61 @@ class AppHandler(BaseHTTPRequestHandler):
                 page("Hata", f"<p>Hata: {msg}</p><p><a href='/'>&larr; Geri</a></p>")
             )
 
+    def _serve_pattern_page(self):
+        """GET /patterns?h=<handle>&page=N&size=M (HTML) or /patterns.json (same query)."""
+        from urllib.parse import parse_qs, urlsplit
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        handle = query.get("h", [""])[0]
+        automaton = get_pattern_handle(handle)
+        if automaton is None:
+            msg = "Pattern sonucu bulunamadı (süresi dolmuş olabilir); analizi yeniden çalıştırın."
+            self.send_response(404)
+            if url.path == "/patterns.json":
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": msg}, ensure_ascii=False).encode("utf-8"))
+            else:
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(page("app48 - Hata", f"<div class='card'><h3>Hata</h3><p style='color:red;'>{msg}</p></div>", active_tab="iou"))
+            return
+        try:
+            page_no = int(query.get("page", ["1"])[0])
+            size = int(query.get("size", [str(PATTERN_PAGE_SIZE)])[0])
+        except ValueError:
+            page_no, size = 1, PATTERN_PAGE_SIZE
+        result_page = pattern_page(automaton, handle, page_no, size)
+        if url.path == "/patterns.json":
+            content_type = "application/json; charset=utf-8"
+            body = json.dumps(pattern_page_json(result_page), ensure_ascii=False).encode("utf-8")
+        else:
+            content_type = "text/html; charset=utf-8"
+            body = page(
+                "app48 - Pattern'ler",
+                f"<div class='card'><h3>🔍 Pattern Sonuçları</h3>{format_pattern_page(result_page)}</div>",
+                active_tab="iou",
+            )
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def _render_joker_selection(
-        self, files, sequence, limit, xyz_analysis, events_by_date, previous_results=""
+        self, files, sequence, limit, xyz_analysis, events_by_date, previous_results="", iov=False,
+        currency_spec="", pattern_token="",
     ):
         """Stage 1: Calculate XYZ for all files and show joker selection interface."""
         import base64
         
         # Calculate XYZ for each file
         file_xyz_results = []
+        iov_html = ""
         for file_idx, file_obj in enumerate(files):
             filename = file_obj.get("filename", f"Dosya {file_idx + 1}")
+            currencies = parse_currencies(currency_spec, filename)
             raw = file_obj["data"]
             text = (
                 raw.decode("utf-8", errors="replace")
@@ -1471,24 +1470,30 @@ class AppHandler(BaseHTTPRequestHandler):
                 )
                 candles, _ = insert_synthetic_48m(candles, start_day)
                 
-                results = analyze_iou(candles, sequence, limit)
+                if iov:
+                    results, iov_results = analyze_iou_iov(candles, sequence, limit)
+                    iov_html += render_iov_table(filename, iov_results)
+                else:
+                    results = analyze_iou(candles, sequence, limit)
                 total_iou = sum(len(v) for v in results.values())
                 
                 # Calculate XYZ set (even if zero IOUs)
                 file_xyz_data = {offset: {"news_free": 0, "with_news": 0} for offset in range(-3, 4)}
                 
                 if total_iou > 0:
+                    file_news = (
+                        news_for_candles(
+                            events_by_date,
+                            (iou.timestamp for ious in results.values() for iou in ious),
+                            48,
+                            currencies=currencies,
+                        )
+                        if events_by_date
+                        else {}
+                    )
                     for offset in range(-3, 4):
                         for iou in results[offset]:
-                            news_events = (
-                                find_news_in_timerange(events_by_date, iou.timestamp, 48)
-                                if events_by_date
-                                else []
-                            )
-                            affecting_events = [
-                                e for e in news_events if categorize_news_event(e) in ["NORMAL", "SPEECH"]
-                            ]
-                            has_news = bool(affecting_events)
+                            has_news = file_news.get(iou.timestamp, (False, []))[0]
                             
                             if has_news:
                                 file_xyz_data[offset]["with_news"] += 1
@@ -1522,15 +1527,40 @@ class AppHandler(BaseHTTPRequestHandler):
         if not file_xyz_results:
             raise ValueError("Hiçbir dosyada IOU bulunamadı")
         
+        # Smallest joker set that still yields a complete pattern (pre-checked below);
+        # a carried-over frontier makes the new files continue the earlier pattern
+        frontier = PatternAutomaton.from_token(pattern_token) if pattern_token else None
+        suggestion = suggest_jokers(
+            [(f["filename"], f["xyz_set"]) for f in file_xyz_results], frontier=frontier
+        )
+        suggested_jokers = set(suggestion.jokers) if suggestion else set()
+        if suggestion and suggested_jokers:
+            names = ", ".join(html.escape(file_xyz_results[i]["filename"]) for i in suggestion.jokers)
+            suggestion_html = (
+                f"<p>💡 <strong>Önerilen joker ({len(suggested_jokers)}):</strong> {names} "
+                f"— tamamlanmış pattern için gereken en az joker; işaretli olarak geldi.</p>"
+            )
+        elif suggestion:
+            suggestion_html = "<p>💡 Joker gerekmeden tamamlanmış pattern mevcut.</p>"
+        else:
+            suggestion_html = ""
+        if frontier is not None:
+            suggestion_html = (
+                f"<p>🔗 Önceki analizin pattern'i sürdürülüyor ({len(frontier.layers)} dosya); "
+                f"yeni dosyalar onun devamı olarak değerlendirilecek.</p>"
+            ) + suggestion_html
+        
         # Render joker selection page
         body = f"""
         <div class='card'>
           <h3>🎯 Joker Dosya Seçimi</h3>
           <p>Her dosya için XYZ kümesi hesaplandı. İstediğiniz dosyayı <strong>Joker</strong> yaparak tüm offsetlerde kullanılabilir hale getirebilirsiniz.</p>
+          {suggestion_html}
           <form method='post' action='/iou_analyze'>
             <input type='hidden' name='sequence' value='{html.escape(sequence)}' />
             <input type='hidden' name='limit' value='{limit}' />
             <input type='hidden' name='previous_results' value='{html.escape(previous_results)}' />
+            <input type='hidden' name='pattern_token' value='{html.escape(pattern_token)}' />
             <table style='margin-top:12px;'>
               <tr>
                 <th>Dosya Adı</th>
@@ -1553,10 +1583,10 @@ class AppHandler(BaseHTTPRequestHandler):
               <tr>
                 <td>{html.escape(file_data["filename"])}{note_html}</td>
                 <td><code>{html.escape(xyz_str)}</code></td>
-                <td><input type='checkbox' name='joker_{idx}' value='1' /></td>
+                <td><input type='checkbox' name='joker_{idx}' value='1'{' checked' if idx in suggested_jokers else ''} /></td>
               </tr>
               <input type='hidden' name='file_{idx}_name' value='{html.escape(file_data["filename"])}' />
-              <input type='hidden' name='file_{idx}_xyz' value='{html.escape(",".join(map(str, file_data["xyz_set"])))}' />
+              <input type='hidden' name='file_{idx}_xyz' value='{format_xyz_field(file_data["xyz_set"])}' />
               <input type='hidden' name='file_{idx}_data' value='{file_data["data_base64"]}' />
             """
         
@@ -1570,6 +1600,8 @@ class AppHandler(BaseHTTPRequestHandler):
         </div>
         """
         
+        body += iov_html
+        
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
         self.end_headers()
@@ -1608,19 +1640,25 @@ class AppHandler(BaseHTTPRequestHandler):
             
             if is_joker:
                 # Joker: all offsets
-                xyz_set = list(range(-3, 4))
+                xyz_set = ALL_OFFSETS_MASK
             else:
-                # Normal: use calculated XYZ
-                if xyz_str:
-                    xyz_set = [int(x.strip()) for x in xyz_str.split(",") if x.strip()]
-                else:
-                    xyz_set = []
+                # Normal: calculated XYZ as a 7-bit mask (older comma lists still parse)
+                xyz_set = parse_xyz_field(xyz_str)
             
             pattern_xyz_data.append((filename, xyz_set))
         
-        # Run pattern analysis
-        pattern_results = find_valid_patterns(pattern_xyz_data, max_branches=1000)
-        pattern_html = format_pattern_results(pattern_results)
+        # Run pattern analysis, continuing the previous frontier when one was carried over
+        pattern_token = params.get("pattern_token", "")
+        automaton = PatternAutomaton.from_token(pattern_token) if pattern_token else PatternAutomaton([])
+        prior_file_count = len(automaton.layers)
+        automaton.extend(pattern_xyz_data)
+        pattern_counts = automaton.counts()
+        pattern_results = automaton.top_k(DEFAULT_TOP_K)
+        # Kept server-side so /patterns can page through all of them
+        pattern_handle = store_pattern_handle(automaton)
+        pattern_html = format_pattern_counts(pattern_counts) + format_pattern_results(
+            pattern_results, total=pattern_counts.total, handle=pattern_handle
+        )
         
         # Extract final offsets from all patterns
         final_offsets = []
@@ -1636,7 +1674,8 @@ class AppHandler(BaseHTTPRequestHandler):
             # Get unique offsets (preserve order of first occurrence)
             unique_offsets = []
             seen = set()
-            for offset in final_offsets:
+            # Shown patterns first, then last offsets of the patterns not listed
+            for offset in final_offsets + sorted(pattern_counts.by_last_offset):
                 if offset not in seen:
                     unique_offsets.append(offset)
                     seen.add(offset)
@@ -1646,7 +1685,7 @@ class AppHandler(BaseHTTPRequestHandler):
             final_offsets_summary = f"""
             <div class='card' style='padding:10px; background:#fff7ed; border:1px solid #f97316;'>
               <h3>📌 Pattern Son Değerleri</h3>
-              <p><strong>{len(final_offsets)} pattern tespit edildi.</strong> Benzersiz son offsetler: <code>{', '.join(offset_strs)}</code></p>
+              <p><strong>{pattern_counts.total} pattern tespit edildi.</strong> Benzersiz son offsetler: <code>{', '.join(offset_strs)}</code></p>
             </div>
             """
         
@@ -1658,11 +1697,17 @@ class AppHandler(BaseHTTPRequestHandler):
             except:
                 previous_html = ""
         
+        continued_html = (
+            f"<div><strong>Sürdürülen Önceki Dosya:</strong> {prior_file_count}</div>"
+            if prior_file_count else ""
+        )
+        
         # Build current results
         current_results = f"""
         <div class='card' style='border: 2px solid #10b981;'>
           <h3>📊 Pattern Analiz Sonuçları</h3>
           <div><strong>Dosya Sayısı:</strong> {file_count}</div>
+          {continued_html}
           <div><strong>Sequence:</strong> {html.escape(sequence)}</div>
           <div><strong>Limit:</strong> {limit}</div>
         </div>
@@ -1687,6 +1732,7 @@ class AppHandler(BaseHTTPRequestHandler):
           <p>Üstteki sonuçlar korunarak yeni analiz ekleyebilirsiniz.</p>
           <form method='post' action='/iou' enctype='multipart/form-data'>
             <input type='hidden' name='previous_results' value='{html.escape(all_results_base64)}' />
+            <input type='hidden' name='pattern_token' value='{automaton.to_token()}' />
             <div class='row'>
               <div>
                 <label>CSV Dosyaları (1 haftalık 48m) - En fazla 25 dosya</label>
@@ -1711,6 +1757,10 @@ class AppHandler(BaseHTTPRequestHandler):
                 <label>Pattern Analizi</label>
                 <input type='checkbox' name='pattern_analysis' checked />
               </div>
+              <div>
+                <label>Pattern'i Sürdür</label>
+                <input type='checkbox' name='continue_patterns' />
+              </div>
             </div>
             <div style='margin-top:12px;'>
               <button type='submit'>Ek Analiz Yap</button>
@@ -1731,6 +1781,8 @@ class AppHandler(BaseHTTPRequestHandler):
 
 
 def run(host: str, port: int):
+    # Parse news_data/ once up front; requests reuse it until a file changes
+    get_news_store(os.path.join(os.path.dirname(os.path.dirname(__file__)), "news_data")).warm()
     httpd = HTTPServer((host, port), AppHandler)
     print(f"app48 web: http://{host}:{port}/")
     httpd.serve_forever()
@@ -22,7 +22,9 @@ from ..counter import (
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+
+from pairscan.scanner import IOVResult, scan_signed_pairs
 
 # Filtered sequences (exclude early values for IOU)
 SEQUENCES_FILTERED: Dict[str, List[int]] = {
@@ -43,17 +45,31 @@ class IOUResult:
     prev_timestamp: datetime
 
 
-def analyze_iou(
+def is_iou_excluded(ts: datetime) -> bool:
+    """
+    - 18:00 mumları asla IOU/IOV olamaz
+    - 19:36 mumları Pazar günleri hariç asla IOU/IOV olamaz
+    - Cuma günündeki 16:24 mumları asla IOU/IOV olamaz
+    """
+    if ts.hour == 18 and ts.minute == 0:
+        return True
+    if ts.hour == 19 and ts.minute == 36 and ts.weekday() != 6:  # 6 = Pazar
+        return True
+    if ts.hour == 16 and ts.minute == 24 and ts.weekday() == 4:  # 4 = Cuma
+        return True
+    return False
+
+
+def allocate_filtered(
     candles: List[Candle],
     sequence: str,
-    limit: float,
-    tolerance: float = 0.005,
-) -> Dict[int, List[IOUResult]]:
+) -> Dict[int, List[Tuple[int, int]]]:
     """
-    Analyze IOU candles for all offsets (-3 to +3).
-    Returns: Dict[offset] -> List[IOUResult]
+    Allocate the filtered sequence values for all offsets (-3 to +3).
+    
+    Returns: Dict[offset] -> List[(seq_value, candle index)]
     """
-    results: Dict[int, List[IOUResult]] = {}
+    allocated: Dict[int, List[Tuple[int, int]]] = {}
     
     start_tod = DEFAULT_START_TOD
     base_idx, _ = find_start_index(candles, start_tod)
@@ -63,7 +79,7 @@ def analyze_iou(
     seq_values_filtered = SEQUENCES_FILTERED[sequence]
     
     for offset in range(-3, 4):
-        iou_list: List[IOUResult] = []
+        alloc_list: List[Tuple[int, int]] = []
         
         start_idx, target_ts, offset_status = determine_offset_start(candles, base_idx, offset, dc_flags, MINUTES_PER_STEP)
         base_ts = candles[base_idx].ts.replace(second=0, microsecond=0)
@@ -88,7 +104,7 @@ def analyze_iou(
                     delta_minutes = 0
                 missing_steps = max(0, delta_minutes // MINUTES_PER_STEP)
             else:
-                results[offset] = iou_list
+                allocated[offset] = alloc_list
                 continue
         
         actual_start_count = missing_steps + 1
@@ -108,58 +124,62 @@ def analyze_iou(
             if v <= missing_steps:
                 seq_map[v] = SequenceAllocation(None, None, False)
         
+        # Keep only filtered sequence values
         for seq_val in seq_values_filtered:
             alloc = seq_map.get(seq_val)
             if alloc is None or alloc.idx is None:
                 continue
-            
-            idx = alloc.idx
-            if idx <= 0 or idx >= len(candles):
-                continue
-            
-            candle = candles[idx]
-            prev_candle = candles[idx - 1]
-            
-            ts = candle.ts
-            # 18:00 mumları asla IOU olamaz
-            if ts.hour == 18 and ts.minute == 0:
-                continue
-            
-            # 19:36 mumları Pazar günleri hariç asla IOU olamaz
-            if ts.hour == 19 and ts.minute == 36:
-                if ts.weekday() != 6:  # 6 = Pazar
-                    continue
-            
-            # Cuma günündeki 16:24 mumları asla IOU olamaz
-            if ts.hour == 16 and ts.minute == 24:
-                if ts.weekday() == 4:  # 4 = Cuma
-                    continue
-            
-            oc = candle.close - candle.open
-            prev_oc = prev_candle.close - prev_candle.open
-            
-            if abs(oc) < limit or abs(prev_oc) < limit:
-                continue
-            
-            if abs(abs(oc) - limit) < tolerance or abs(abs(prev_oc) - limit) < tolerance:
-                continue
-            
-            if not ((oc > 0 and prev_oc > 0) or (oc < 0 and prev_oc < 0)):
-                continue
-            
-            iou_list.append(IOUResult(
-                seq_value=seq_val,
-                index=idx,
-                timestamp=candle.ts,
-                oc=oc,
-                prev_oc=prev_oc,
-                prev_index=idx - 1,
-                prev_timestamp=prev_candle.ts,
-            ))
+            alloc_list.append((seq_val, alloc.idx))
         
-        results[offset] = iou_list
+        allocated[offset] = alloc_list
     
-    return results
+    return allocated
+
+
+def analyze_iou(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+) -> Dict[int, List[IOUResult]]:
+    """
+    Analyze IOU candles for all offsets (-3 to +3).
+    Returns: Dict[offset] -> List[IOUResult]
+    """
+    iou_results, _ = scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        limit,
+        tolerance,
+        excluded=is_iou_excluded,
+        iou_cls=IOUResult,
+    )
+    return iou_results
+
+
+def analyze_iou_iov(
+    candles: List[Candle],
+    sequence: str,
+    limit: float,
+    tolerance: float = 0.005,
+) -> Tuple[Dict[int, List[IOUResult]], Dict[int, List[IOVResult]]]:
+    """
+    IOU and IOV candles for all offsets from a single allocation pass.
+    
+    IOV uses the same limit, tolerance and time restrictions as IOU; only
+    the sign rule differs (OC and PrevOC opposite).
+    
+    Returns: (Dict[offset] -> List[IOUResult], Dict[offset] -> List[IOVResult])
+    """
+    return scan_signed_pairs(
+        candles,
+        allocate_filtered(candles, sequence),
+        limit,
+        tolerance,
+        excluded=is_iou_excluded,
+        iou_cls=IOUResult,
+        iov_cls=IOVResult,
+    )
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -0,0 +1,476 @@
+"""
+Interval index over news_data events.
+
+The IOU apps look up news for every IOU candle. Instead of walking every
+date key and re-parsing dates/times per lookup, NewsIndex parses all
+events once into sorted minute arrays and answers window queries with
+bisect (O(log n + hits)).
+
+Two lookups are supported, matching the two find_news_in_timerange
+variants in the apps:
+    - year-agnostic: JSON year is ignored, events are placed in the candle
+      year by (month, day). Positions are minutes of the leap reference year
+      2000 so one array serves every candle year; Feb 29 events are dropped
+      for non-leap candle years and query bounds outside the candle year
+      are clamped.
+    - exact: events keep their own year.
+
+Result lists keep the original events_by_date iteration order.
+
+Each event's category (HOLIDAY/SPEECH/ALLDAY/NORMAL/UNKNOWN) and whether
+it affects the XYZ set (NORMAL or SPEECH) are computed once at index time;
+has_news() answers the XYZ question from those flags without building the
+result list.
+
+Both lookups accept a currency set. Per-currency partitions (same sorted
+arrays, filtered) are built on first use; events whose currency is not an
+ISO code ("All", parser leftovers) sit in a shared partition that every
+currency set includes.
+"""
+
+import bisect
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+REF_YEAR = 2000  # leap year: every (month, day) has a slot
+_REF_ORDINAL = date(REF_YEAR, 1, 1).toordinal()
+_YEAR_END = 367 * 1440  # past the last minute of any year
+
+
+def _is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _ref_minute(month: int, day: int, hour: int = 0, minute: float = 0) -> float:
+    """Minutes since Jan 1 of the reference year."""
+    return (date(REF_YEAR, month, day).toordinal() - _REF_ORDINAL) * 1440 + hour * 60 + minute
+
+
+def _dt_minutes(dt: datetime) -> float:
+    return dt.hour * 60 + dt.minute + dt.second / 60.0 + dt.microsecond / 60e6
+
+
+def _abs_minute(dt: datetime) -> float:
+    return dt.toordinal() * 1440 + _dt_minutes(dt)
+
+
+def _year_pos(year: int):
+    """Reference-year position for a candle year; other years are clamped."""
+    def pos(dt: datetime) -> float:
+        if dt.year < year:
+            return -1.0
+        if dt.year > year:
+            return float(_YEAR_END)
+        return _ref_minute(dt.month, dt.day) + _dt_minutes(dt)
+    return pos
+
+
+CATEGORIES = ["UNKNOWN", "HOLIDAY", "SPEECH", "ALLDAY", "NORMAL"]
+AFFECTS_XYZ = frozenset(["NORMAL", "SPEECH"])
+
+
+def categorize_event(event: Dict[str, Any]) -> str:
+    """
+    Same decision tree as categorize_news_event in the apps:
+    HOLIDAY / NORMAL (has values) / SPEECH (timed, null) / ALLDAY / UNKNOWN.
+    """
+    title = event.get("title", "").lower()
+    time_label = event.get("time_label", "").lower()
+    time_24h = event.get("time_24h")
+    values = event.get("values", {})
+
+    has_values = any(
+        v is not None
+        for v in [values.get("actual"), values.get("forecast"), values.get("previous")]
+    )
+    is_null = not has_values
+    is_all_day = time_label == "all day" or time_24h is None
+
+    if "holiday" in title and is_all_day and is_null:
+        return "HOLIDAY"
+    elif has_values:
+        return "NORMAL"
+    elif time_24h and is_null:
+        return "SPEECH"
+    elif is_all_day and is_null:
+        return "ALLDAY"
+    return "UNKNOWN"
+
+
+def _safe_category(event: Dict[str, Any]) -> str:
+    try:
+        return categorize_event(event)
+    except Exception:
+        return "UNKNOWN"
+
+
+# Currencies present in the ForexFactory calendars under news_data/
+NEWS_CURRENCIES = frozenset(["USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD", "NZD", "CNY"])
+_CURRENCY_CODE = re.compile(r"^[A-Z]{3}$")
+_PAIR = re.compile(r"(?<![A-Z])([A-Z]{3})[/_\-]?([A-Z]{3})(?![A-Z])")
+
+
+def _partition_key(currency: Any) -> Optional[str]:
+    """ISO-like code for per-currency partitions; None for the shared one."""
+    if isinstance(currency, str) and _CURRENCY_CODE.match(currency):
+        return currency
+    return None
+
+
+def currencies_from_filename(filename: str) -> Optional[FrozenSet[str]]:
+    """
+    News currencies of the instrument in a file name, e.g.
+    "EURUSD_120m.csv" -> {EUR, USD}, "xauusd-72.csv" -> {USD}.
+    None when no pair with a news currency is found (no filtering).
+    """
+    stem = os.path.splitext(os.path.basename(filename or ""))[0].upper()
+    for m in _PAIR.finditer(stem):
+        found = frozenset(c for c in m.groups() if c in NEWS_CURRENCIES)
+        if found:
+            return found
+    return None
+
+
+def parse_currencies(spec: Optional[str], filename: str = "") -> Optional[FrozenSet[str]]:
+    """
+    Currency set from the /iou form field: "USD,JPY" -> {USD, JPY};
+    empty -> from the file name; "*" or "ALL" -> None (every currency).
+    """
+    spec = (spec or "").strip().upper()
+    if not spec:
+        return currencies_from_filename(filename)
+    if spec in ("*", "ALL"):
+        return None
+    codes = frozenset(c for c in re.split(r"[\s,;/]+", spec) if _CURRENCY_CODE.match(c))
+    return codes or None
+
+
+def format_currencies(currencies: Optional[Iterable[str]]) -> str:
+    return ", ".join(sorted(currencies)) if currencies else "Tümü"
+
+
+class _Entry:
+    __slots__ = ("seq", "event", "is_null", "feb29", "category", "affects")
+
+    def __init__(
+        self, seq: int, event: Dict[str, Any], is_null: bool, feb29: bool, category: str
+    ):
+        self.seq = seq
+        self.event = event
+        self.is_null = is_null
+        self.feb29 = feb29
+        self.category = category
+        self.affects = category in AFFECTS_XYZ
+
+
+class _Partition:
+    """The sorted arrays of NewsIndex restricted to one currency key."""
+
+    def __init__(self, index: "NewsIndex", key: Optional[str]):
+        def keep(entry: _Entry) -> bool:
+            return _partition_key(entry.event.get("currency")) == key
+
+        ref = [(k, e) for k, e in zip(index._ref_keys, index._ref_entries) if keep(e)]
+        abs_ = [(k, e) for k, e in zip(index._abs_keys, index._abs_entries) if keep(e)]
+        self._ref_keys = [k for k, _ in ref]
+        self._ref_entries = [e for _, e in ref]
+        self._abs_keys = [k for k, _ in abs_]
+        self._abs_entries = [e for _, e in abs_]
+        self._allday_md = {}
+        self._allday_date = {}
+        for md, entries in index._allday_md.items():
+            kept = [e for e in entries if keep(e)]
+            if kept:
+                self._allday_md[md] = kept
+        for day, entries in index._allday_date.items():
+            kept = [e for e in entries if keep(e)]
+            if kept:
+                self._allday_date[day] = kept
+
+
+class NewsIndex:
+    """Sorted, pre-parsed view of an events_by_date mapping."""
+
+    _parts: Optional[Dict[Optional[str], _Partition]] = None
+
+    def __init__(self, events_by_date: Dict[str, List[Dict[str, Any]]]):
+        ref_timed: List[Tuple[float, int, _Entry]] = []
+        abs_timed: List[Tuple[float, int, _Entry]] = []
+        self._allday_md: Dict[Tuple[int, int], List[_Entry]] = {}
+        self._allday_date: Dict[date, List[_Entry]] = {}
+        # id(event) -> (event, category) for every indexed event
+        self._categories: Dict[int, Tuple[Dict[str, Any], str]] = {}
+        self.event_count = 0
+
+        seq = 0
+        for date_str, events in events_by_date.items():
+            try:
+                year, month, day = map(int, date_str.split("-"))
+                date(REF_YEAR, month, day)  # invalid month/day: skipped like before
+            except Exception:
+                continue
+            try:
+                exact_day: Optional[date] = date(year, month, day)
+            except Exception:
+                exact_day = None
+            feb29 = month == 2 and day == 29
+
+            for event in events:
+                seq += 1
+                self.event_count += 1
+                category = _safe_category(event)
+                self._categories[id(event)] = (event, category)
+                try:
+                    time_24h = event.get("time_24h")
+                    if not time_24h:
+                        entry = _Entry(seq, event, True, feb29, category)
+                        self._allday_md.setdefault((month, day), []).append(entry)
+                        if exact_day is not None:
+                            self._allday_date.setdefault(exact_day, []).append(entry)
+                        continue
+
+                    hour, minute = map(int, time_24h.split(":"))
+                    if not (0 <= hour < 24 and 0 <= minute < 60):
+                        continue
+                    values = event.get("values", {})
+                    is_null = (
+                        values.get("actual") is None
+                        and values.get("forecast") is None
+                        and values.get("previous") is None
+                    )
+                except Exception:
+                    continue
+
+                entry = _Entry(seq, event, is_null, feb29, category)
+                ref_timed.append((_ref_minute(month, day, hour, minute), seq, entry))
+                if exact_day is not None:
+                    abs_timed.append((exact_day.toordinal() * 1440 + hour * 60 + minute, seq, entry))
+
+        ref_timed.sort(key=lambda t: (t[0], t[1]))
+        abs_timed.sort(key=lambda t: (t[0], t[1]))
+        self._ref_keys = [t[0] for t in ref_timed]
+        self._ref_entries = [t[2] for t in ref_timed]
+        self._abs_keys = [t[0] for t in abs_timed]
+        self._abs_entries = [t[2] for t in abs_timed]
+
+    def find(
+        self,
+        start_ts: datetime,
+        duration_minutes: int = 120,
+        year_agnostic: bool = True,
+        currencies: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Events in [start_ts, start_ts + duration_minutes).
+        Null-valued events (speeches, statements) also match from 1 hour
+        before start_ts; All Day events match every date in that range.
+        With ``currencies`` only those partitions (plus "All") are scanned.
+        """
+        hits = [
+            e
+            for part in self._partitions(currencies)
+            for e in self._window(start_ts, duration_minutes, year_agnostic, part)
+        ]
+        hits.sort(key=lambda e: e.seq)
+        return [e.event for e in hits]
+
+    def has_news(
+        self,
+        start_ts: datetime,
+        duration_minutes: int = 120,
+        year_agnostic: bool = True,
+        currencies: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """True when the find() window holds a NORMAL or SPEECH event (XYZ rule)."""
+        return any(
+            e.affects
+            for part in self._partitions(currencies)
+            for e in self._window(start_ts, duration_minutes, year_agnostic, part)
+        )
+
+    def scan(
+        self,
+        timestamps: List[datetime],
+        duration_minutes: int = 120,
+        year_agnostic: bool = True,
+        currencies: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[bool], List[List[Dict[str, Any]]]]:
+        """
+        Bulk find() + has_news() for sorted candle start times.
+
+        Walks the candles and the sorted event minutes together (merge join),
+        so a whole file costs O(candles + events + hits) instead of one
+        bisect pair per candle. Returns (affects_xyz flags, event lists),
+        both aligned with ``timestamps``.
+        """
+        hits: List[List[_Entry]] = [[] for _ in timestamps]
+        for part in self._partitions(currencies):
+            self._scan_part(part, timestamps, duration_minutes, year_agnostic, hits)
+        flags: List[bool] = []
+        events: List[List[Dict[str, Any]]] = []
+        for entries in hits:
+            entries.sort(key=lambda e: e.seq)
+            flags.append(any(e.affects for e in entries))
+            events.append([e.event for e in entries])
+        return flags, events
+
+    def _scan_part(
+        self,
+        part: Any,
+        timestamps: List[datetime],
+        duration_minutes: int,
+        year_agnostic: bool,
+        hits: List[List[_Entry]],
+    ) -> None:
+        if year_agnostic:
+            keys, entries = part._ref_keys, part._ref_entries
+        else:
+            keys, entries = part._abs_keys, part._abs_entries
+        duration = timedelta(minutes=duration_minutes)
+        hour = timedelta(hours=1)
+        one_day = timedelta(days=1)
+        count = len(keys)
+        i = j = 0
+        year = None
+        skip_feb29 = False
+        pos = _abs_minute
+        prev_ts = None
+
+        for n, start_ts in enumerate(timestamps):
+            if prev_ts is not None and start_ts < prev_ts:
+                raise ValueError("scan() expects timestamps in ascending order")
+            prev_ts = start_ts
+            if year_agnostic and start_ts.year != year:
+                # Reference positions restart every candle year
+                year = start_ts.year
+                skip_feb29 = not _is_leap(year)
+                pos = _year_pos(year)
+                i = j = 0
+
+            end_ts = start_ts + duration
+            extended_start_ts = start_ts - hour
+            lo_null = pos(extended_start_ts)
+            lo = pos(start_ts)
+            hi = pos(end_ts)
+            while i < count and keys[i] < lo_null:
+                i += 1
+            if j < i:
+                j = i
+            while j < count and keys[j] < hi:
+                j += 1
+            out = hits[n]
+            for k in range(i, j):
+                entry = entries[k]
+                if skip_feb29 and entry.feb29:
+                    continue
+                if entry.is_null or keys[k] >= lo:
+                    out.append(entry)
+
+            day = extended_start_ts.date()
+            last = end_ts.date()
+            while day <= last:
+                if year_agnostic:
+                    if day.year == year:
+                        out.extend(part._allday_md.get((day.month, day.day), ()))
+                else:
+                    out.extend(part._allday_date.get(day, ()))
+                day += one_day
+
+    def _partitions(self, currencies: Optional[Iterable[str]]) -> List[Any]:
+        if currencies is None:
+            return [self]
+        parts = self._parts
+        if parts is None:
+            parts = self._parts = {}
+        out = []
+        for key in [None] + sorted(set(currencies)):
+            part = parts.get(key)
+            if part is None:
+                part = parts[key] = _Partition(self, key)
+            out.append(part)
+        return out
+
+    def category(self, event: Dict[str, Any]) -> str:
+        """Precomputed category of an indexed event (computed on the fly otherwise)."""
+        known = self._categories.get(id(event))
+        if known is not None and known[0] is event:
+            return known[1]
+        return categorize_event(event)
+
+    def _window(self, start_ts: datetime, duration_minutes: int, year_agnostic: bool, part: Any):
+        """Unordered entries of the find() window within one partition."""
+        end_ts = start_ts + timedelta(minutes=duration_minutes)
+        extended_start_ts = start_ts - timedelta(hours=1)
+
+        if year_agnostic:
+            skip_feb29 = not _is_leap(start_ts.year)
+            pos = _year_pos(start_ts.year)
+            keys, entries = part._ref_keys, part._ref_entries
+        else:
+            skip_feb29 = False
+            pos = _abs_minute
+            keys, entries = part._abs_keys, part._abs_entries
+
+        lo_null = pos(extended_start_ts)
+        lo = pos(start_ts)
+        hi = pos(end_ts)
+        i = bisect.bisect_left(keys, lo_null)
+        j = bisect.bisect_left(keys, hi)
+        for k in range(i, j):
+            entry = entries[k]
+            if skip_feb29 and entry.feb29:
+                continue
+            if entry.is_null or keys[k] >= lo:
+                yield entry
+
+        # All Day events: every date from the extended start to the end
+        day = extended_start_ts.date()
+        last = end_ts.date()
+        while day <= last:
+            if year_agnostic:
+                if day.year == start_ts.year:
+                    yield from part._allday_md.get((day.month, day.day), [])
+            else:
+                yield from part._allday_date.get(day, [])
+            day += timedelta(days=1)
+
+    # One index per loaded events_by_date object. Callers keep passing the
+    # plain mapping; the index is built on first lookup and reused.
+    _cache: List[Tuple[Dict[str, List[Dict[str, Any]]], "NewsIndex"]] = []
+    _cache_lock = threading.Lock()
+    _CACHE_SIZE = 8
+
+    @classmethod
+    def of(cls, events_by_date: Dict[str, List[Dict[str, Any]]]) -> "NewsIndex":
+        """Cached index for an events_by_date mapping (by identity)."""
+        if isinstance(events_by_date, NewsIndex):
+            return events_by_date
+        for source, index in cls._cache:
+            if source is events_by_date:
+                return index
+        return cls.remember(events_by_date, cls(events_by_date))
+
+    @classmethod
+    def category_of(cls, event: Dict[str, Any]) -> str:
+        """Category of an event from any cached index, else computed directly."""
+        key = id(event)
+        for _, index in cls._cache:
+            known = index._categories.get(key)
+            if known is not None and known[0] is event:
+                return known[1]
+        return categorize_event(event)
+
+    @classmethod
+    def remember(
+        cls, events_by_date: Dict[str, List[Dict[str, Any]]], index: "NewsIndex"
+    ) -> "NewsIndex":
+        """Register an index built elsewhere (e.g. from a snapshot) for of()."""
+        with cls._cache_lock:
+            cls._cache = [(events_by_date, index)] + [
+                item for item in cls._cache if item[0] is not events_by_date
+            ][: cls._CACHE_SIZE - 1]
+        return index
@@ -1,12 +1,19 @@
 """
 Markdown news format parser for ForexFactory-style news data.
 Converts from markdown format to JSON structure.
+
+Parsing is a single streaming pass: each line is classified once with
+precompiled patterns (classify_line) and iter_events yields events as they
+are read, so a file can be converted line by line:
+
+    python -m news_converter.parser 3augto6sep.md -o news_data/3augto6sep.json
 """
 
+import io
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
@@ -16,6 +23,9 @@ MONTHS = {
 }
 
 
+_TIME_12H_RE = re.compile(r'(\d{1,2}):(\d{2})(am|pm)')
+
+
 @dataclass
 class NewsEvent:
     """Single news event."""
@@ -47,7 +57,7 @@ def parse_time_12h_to_24h(time_str: str) -> Optional[str]:
         return None
     
     # Match patterns like "2:30am", "10:00pm"
-    match = re.match(r'(\d{1,2}):(\d{2})(am|pm)', time_str)
+    match = _TIME_12H_RE.match(time_str)
     if not match:
         return None
     
@@ -99,170 +109,190 @@ def infer_year_from_date_range(first_month: str, last_month: str) -> int:
         return current_year
 
 
-def parse_markdown_to_json(md_content: str, filename: str = "unknown") -> Dict[str, Any]:
+# Precompiled line patterns. _LINE_RE tells date / time / currency lines
+# apart in one match; the separate patterns cover the rare overlaps.
+_DATE_RE = re.compile(r'([A-Z][a-z]{2})\s+(\d{1,2})$')
+_TIME_RE = re.compile(r'^(\d{1,2}:\d{2}[ap]m|All Day|Tentative|Day \d+)$', re.IGNORECASE)
+_CURRENCY_RE = re.compile(r'^([A-Z]{3})[\s\t]*$')
+_LINE_RE = re.compile(
+    r'(?:(?P<month>[A-Z][a-z]{2})\s+(?P<day>\d{1,2})'
+    r'|(?P<time>(?i:\d{1,2}:\d{2}[ap]m|All Day|Tentative|Day \d+))'
+    r'|(?P<currency>[A-Z]{3}))$'
+)
+_WEEKDAY_SET = frozenset(WEEKDAYS)
+
+# Line kinds
+_EMPTY, _WEEKDAY, _DATE, _TIME, _CURRENCY, _OTHER = range(6)
+
+
+def classify_line(raw: str) -> Tuple[int, str, Any, bool]:
     """
-    Parse markdown news format to JSON structure.
-    
-    Args:
-        md_content: The markdown content as string
-        filename: Source filename for metadata
-        
-    Returns:
-        Dictionary with meta and days structure
+    (kind, stripped text, payload, is_value) for one line.
+    payload: (month_str, day) for dates, the label for times, the code for
+    currencies. is_value: the line may hold an event's values.
     """
-    lines = md_content.strip().split('\n')
-    
+    text = raw.strip()
+    if not text:
+        return _EMPTY, text, None, False
+    if text in _WEEKDAY_SET:
+        return _WEEKDAY, text, None, False
+    m = _LINE_RE.match(text)
+    if m is None:
+        # Currency lines are matched on the raw line; leading blanks fail
+        return _OTHER, text, None, True
+    month = m.group("month")
+    if month is not None:
+        if month in MONTHS:
+            return _DATE, text, (month, int(m.group("day"))), False
+        # "Day 1" style labels look like dates too
+        t = _TIME_RE.match(text)
+        if t:
+            return _TIME, text, t.group(1), False
+        if _CURRENCY_RE.match(raw):
+            return _CURRENCY, text, text, False
+        return _OTHER, text, None, False
+    time_label = m.group("time")
+    if time_label is not None:
+        return _TIME, text, time_label, False
+    if raw.startswith(text):
+        return _CURRENCY, text, text, False
+    return _OTHER, text, None, True
+
+
+def iter_lines(md_content: str) -> Iterator[str]:
+    """Lines of ``md_content`` split on '\\n' only, without building a list."""
+    for line in io.StringIO(md_content, newline="\n"):
+        yield line[:-1] if line.endswith("\n") else line
+
+
+def _trimmed(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Same lines as the document after str.strip(): leading and trailing
+    blank lines are dropped and the first line is left-stripped.
+    """
+    pending_blank: List[str] = []
+    started = False
+    for line in lines:
+        if not line.strip():
+            if started:
+                pending_blank.append(line)
+            continue
+        if not started:
+            started = True
+            line = line.lstrip()
+        if pending_blank:
+            yield from pending_blank
+            pending_blank = []
+        yield line
+
+
+def parse_values(value_line: str) -> Dict[str, Optional[str]]:
+    """Tab-separated actual/forecast/previous; two values mean (actual, previous)."""
+    values: Dict[str, Optional[str]] = {"actual": None, "forecast": None, "previous": None}
+    parts = [p.strip() for p in value_line.split('\t') if p.strip()]
+    if len(parts) == 3:
+        values["actual"] = parts[0]
+        values["forecast"] = parts[1]
+        values["previous"] = parts[2]
+    elif len(parts) == 2:
+        # Two values: interpret as (actual, previous)
+        values["actual"] = parts[0]
+        values["previous"] = parts[1]
+    elif len(parts) == 1:
+        values["actual"] = parts[0]
+    return values
+
+
+def iter_events(lines: Iterable[str], months_seen: Optional[List[str]] = None) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """
+    Streaming tokenizer: yields (month_str, day, event_dict) per event as
+    the lines are read. ``event_dict`` has every output key except the
+    final "date" (the year is only known at the end). Months are appended
+    to ``months_seen`` in first-seen order for year inference.
+    """
+    if months_seen is None:
+        months_seen = []
     current_weekday = None
     current_date = None
     current_time_label = None
     current_time_24h = None
-    
-    days_dict: Dict[str, DayEvents] = {}
-    events_list: List[NewsEvent] = []
-    
-    # Track months for year inference
-    months_seen = []
-    
-    i = 0
-    while i < len(lines):
-        line_raw = lines[i]
-        line = line_raw.strip()
-        
-        # Skip empty lines
-        if not line:
-            i += 1
-            continue
-        
-        # Check if it's a weekday line
-        if line in WEEKDAYS:
-            current_weekday = line
-            i += 1
-            continue
-        
-        # Check if it's a date line (e.g., "Aug 3")
-        # But not "Day 1", "Day 2", etc.
-        date_match = re.match(r'([A-Z][a-z]{2})\s+(\d{1,2})$', line)
-        if date_match and date_match.group(1) in MONTHS:
-            month_str = date_match.group(1)
-            day = int(date_match.group(2))
-            
-            if month_str not in months_seen:
-                months_seen.append(month_str)
-            
-            # We'll set the full date later once we know the year
-            current_date = (month_str, day)
-            i += 1
-            continue
-        
-        # Check if it's a time label
-        time_match = re.match(r'^(\d{1,2}:\d{2}[ap]m|All Day|Tentative|Day \d+)$', line, re.IGNORECASE)
-        if time_match:
-            current_time_label = time_match.group(1)
-            current_time_24h = parse_time_12h_to_24h(current_time_label)
-            i += 1
-            continue
-        
-        # Check if it's a currency line (3 capital letters, possibly with tabs/spaces after)
-        # Use the raw line to detect tabs
-        # Accept both with and without trailing whitespace (some MD files may not have tabs)
-        currency_match = re.match(r'^([A-Z]{3})[\s\t]*$', line_raw)
-        if currency_match:
-            currency = currency_match.group(1)
-            i += 1
-            
-            # Next line should be the title
-            if i < len(lines):
-                title = lines[i].strip()
-                i += 1
-                
-                # Next line might have values (3 tab-separated values)
-                values = {"actual": None, "forecast": None, "previous": None}
-                if i < len(lines):
-                    value_line = lines[i].strip()
-                    # Check if this line is actually a time label (not a value)
-                    is_time_label = re.match(r'^(\d{1,2}:\d{2}[ap]m|All Day|Tentative|Day \d+)$', value_line, re.IGNORECASE)
-                    # Check if it's a currency line (next event)
-                    is_currency = re.match(r'^([A-Z]{3})[\s\t]*$', lines[i] if i < len(lines) else "")
-                    
-                    if value_line and not value_line in WEEKDAYS and not re.match(r'([A-Z][a-z]{2})\s+(\d{1,2})$', value_line) and not is_time_label and not is_currency:
-                        # Parse values
-                        parts = [p.strip() for p in value_line.split('\t') if p.strip()]
-                        if len(parts) == 3:
-                            values["actual"] = parts[0]
-                            values["forecast"] = parts[1]
-                            values["previous"] = parts[2]
-                        elif len(parts) == 2:
-                            # Two values: interpret as (actual, previous)
-                            values["actual"] = parts[0]
-                            values["forecast"] = None
-                            values["previous"] = parts[1]
-                        elif len(parts) == 1:
-                            values["actual"] = parts[0]
-                        
-                        i += 1
-                
-                # Create event
-                if current_date and current_weekday:
-                    # We'll finalize the date string later
-                    event = NewsEvent(
-                        date=f"{current_date[0]}-{current_date[1]}",  # Temporary
-                        weekday=current_weekday,
-                        currency=currency,
-                        title=title,
-                        time_label=current_time_label or "All Day",
-                        time_24h=current_time_24h,
-                        values=values
-                    )
-                    events_list.append(event)
-            continue
-        
-        # If nothing matched, move to next line
-        i += 1
-    
+
+    source = map(classify_line, _trimmed(lines))
+    pushed = None
+    while True:
+        if pushed is not None:
+            line, pushed = pushed, None
+        else:
+            line = next(source, None)
+            if line is None:
+                return
+        kind, text, payload, _ = line
+
+        if kind == _WEEKDAY:
+            current_weekday = text
+        elif kind == _DATE:
+            if payload[0] not in months_seen:
+                months_seen.append(payload[0])
+            current_date = payload
+        elif kind == _TIME:
+            current_time_label = payload
+            current_time_24h = parse_time_12h_to_24h(payload)
+        elif kind == _CURRENCY:
+            # Next line is the title, the one after may hold the values
+            title_line = next(source, None)
+            if title_line is None:
+                return
+            values = {"actual": None, "forecast": None, "previous": None}
+            value_line = next(source, None)
+            if value_line is not None:
+                if value_line[3]:
+                    values = parse_values(value_line[1])
+                else:
+                    pushed = value_line
+            if current_date and current_weekday:
+                yield current_date[0], current_date[1], {
+                    "date": None,
+                    "weekday": current_weekday,
+                    "currency": payload,
+                    "title": title_line[1],
+                    "time_label": current_time_label or "All Day",
+                    "time_24h": current_time_24h,
+                    "values": values,
+                }
+
+
+def parse_markdown_lines(lines: Iterable[str], filename: str = "unknown") -> Dict[str, Any]:
+    """
+    Parse an iterable of Markdown lines (e.g. an open file) to the JSON
+    structure in one pass. Events go straight into per-day buckets.
+    """
+    months_seen: List[str] = []
+    # (month, day) -> [weekday, events] in first-seen order
+    days: Dict[Tuple[int, int], List[Any]] = {}
+    for month_str, day, event in iter_events(lines, months_seen):
+        key = (MONTHS[month_str], day)
+        bucket = days.get(key)
+        if bucket is None:
+            days[key] = [event["weekday"], [event]]
+        else:
+            bucket[1].append(event)
+
     # Infer year from the month range
     if months_seen:
         year = infer_year_from_date_range(months_seen[0], months_seen[-1])
     else:
         year = datetime.now().year
-    
-    # Convert events to proper date strings and group by date
-    for event in events_list:
-        month_str, day = event.date.split('-')
-        month_num = MONTHS[month_str]
-        date_str = f"{year}-{month_num:02d}-{int(day):02d}"
-        event.date = date_str
-        
-        if date_str not in days_dict:
-            days_dict[date_str] = DayEvents(date=date_str, weekday=event.weekday, events=[])
-        
-        days_dict[date_str].events.append(event)
-    
-    # Sort days by date
-    sorted_dates = sorted(days_dict.keys())
-    
-    # Build final structure
+
     days_output = []
-    for date_str in sorted_dates:
-        day_data = days_dict[date_str]
-        days_output.append({
-            "date": day_data.date,
-            "weekday": day_data.weekday,
-            "events": [
-                {
-                    "date": e.date,
-                    "weekday": e.weekday,
-                    "currency": e.currency,
-                    "title": e.title,
-                    "time_label": e.time_label,
-                    "time_24h": e.time_24h,
-                    "values": e.values
-                }
-                for e in day_data.events
-            ]
-        })
-    
-    total_events = sum(len(day["events"]) for day in days_output)
-    
+    total_events = 0
+    for (month_num, day) in sorted(days):
+        weekday, events = days[(month_num, day)]
+        date_str = f"{year}-{month_num:02d}-{day:02d}"
+        for event in events:
+            event["date"] = date_str
+        total_events += len(events)
+        days_output.append({"date": date_str, "weekday": weekday, "events": events})
+
     # Build meta section
     meta = {
         "source": "markdown_import",
@@ -278,8 +308,55 @@ def parse_markdown_to_json(md_content: str, filename: str = "unknown") -> Dict[s
             "events": total_events
         }
     }
-    
+
     return {
         "meta": meta,
         "days": days_output
     }
+
+
+def parse_markdown_to_json(md_content: str, filename: str = "unknown") -> Dict[str, Any]:
+    """
+    Parse markdown news format to JSON structure.
+    
+    Args:
+        md_content: The markdown content as string
+        filename: Source filename for metadata
+        
+    Returns:
+        Dictionary with meta and days structure
+    """
+    return parse_markdown_lines(iter_lines(md_content), filename)
+
+
+def convert_file(md_path: str, json_path: str) -> Dict[str, Any]:
+    """Read a Markdown export line by line and write its JSON; returns meta."""
+    import json
+    import os
+
+    with open(md_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        result = parse_markdown_lines(
+            (line[:-1] if line.endswith("\n") else line for line in f),
+            os.path.basename(md_path),
+        )
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return result["meta"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="news_converter.parser", description="MD -> JSON news converter (CLI)")
+    parser.add_argument("md", help="ForexFactory tarzı Markdown dosyası")
+    parser.add_argument("-o", "--output", help="JSON çıktı yolu (varsayılan: .md yerine .json)")
+    args = parser.parse_args(argv)
+
+    output = args.output or (args.md[:-3] if args.md.endswith(".md") else args.md) + ".json"
+    meta = convert_file(args.md, output)
+    print(f"{output}: {meta['counts']['days']} gün, {meta['counts']['events']} olay (yıl {meta['assumptions']['year']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
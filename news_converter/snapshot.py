@@ -0,0 +1,341 @@
+"""
+Compiled binary news snapshot.
+
+A snapshot holds everything the IOU apps derive from news_data/*.json:
+the merged events (as string-table ids), a category byte and a null-values
+flag per event, and the pre-sorted NewsIndex arrays. Loading is one file
+read plus array.frombytes per column, so no JSON parsing or sorting
+happens on cold start or hot reload.
+
+It records the (name, mtime, size) of the JSON files it was built from and
+is ignored when they no longer match.
+
+    python -m news_converter.snapshot news_data
+"""
+
+import argparse
+import array
+import json
+import os
+import struct
+import sys
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from .index import CATEGORIES, NewsIndex, _Entry, categorize_event
+
+
+SNAPSHOT_NAME = ".news_snapshot.bin"
+MAGIC = b"NWSSNAP1"
+VERSION = 2  # 2: events deduplicated on load
+NONE_ID = 0xFFFFFFFF
+
+# Per-event string columns, in file order
+_STRING_FIELDS = ["date", "weekday", "currency", "title", "time_label", "time_24h"]
+_VALUE_FIELDS = ["actual", "forecast", "previous"]
+_EVENT_KEYS = set(_STRING_FIELDS) | {"values"}
+
+# Per-event flag bits
+_NULL = 1   # actual, forecast and previous are all None
+_FEB29 = 2  # listed under a Feb 29 date key
+
+# <magic, version, events, strings, days, json files, ref, abs, all-day, signature bytes>
+_HEADER = struct.Struct("<8sIIIIIIIII")
+
+
+def snapshot_path(directory: str) -> str:
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def json_files_signature(directory: str) -> List[List[Any]]:
+    """Sorted [name, mtime_ns, size] of the JSON files in ``directory``."""
+    out = []
+    for name in sorted(f for f in os.listdir(directory) if f.endswith(".json")):
+        st = os.stat(os.path.join(directory, name))
+        out.append([name, st.st_mtime_ns, st.st_size])
+    return out
+
+
+def _le(arr: array.array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(typecode: str, data: memoryview) -> array.array:
+    arr = array.array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _serializable(event: Any) -> bool:
+    if not isinstance(event, dict) or set(event) - _EVENT_KEYS:
+        return False
+    for key in _STRING_FIELDS:
+        if not isinstance(event.get(key), (str, type(None))):
+            return False
+    values = event.get("values")
+    if not isinstance(values, dict) or set(values) - set(_VALUE_FIELDS):
+        return False
+    return all(isinstance(values.get(k), (str, type(None))) for k in _VALUE_FIELDS)
+
+
+def build_snapshot(
+    events_by_date: Dict[str, List[Dict[str, Any]]],
+    json_files_count: int,
+    signature: List[List[Any]],
+) -> Optional[bytes]:
+    """
+    Serialize merged events plus their NewsIndex. Returns None when an
+    event does not fit the fixed schema (the JSON path is used instead).
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def sid(value: Optional[str]) -> int:
+        if value is None:
+            return NONE_ID
+        i = string_ids.get(value)
+        if i is None:
+            i = string_ids[value] = len(strings)
+            strings.append(value)
+        return i
+
+    flat: List[Dict[str, Any]] = []
+    day_order = array.array("I")  # date keys in events_by_date order
+    event_day = array.array("I")  # position in day_order per event
+    columns = {name: array.array("I") for name in _STRING_FIELDS + _VALUE_FIELDS}
+    has_key = array.array("H")  # bit per string/value field: key present
+    category = array.array("B")
+    flags = array.array("B")
+
+    for day_pos, (date_str, events) in enumerate(events_by_date.items()):
+        if not isinstance(date_str, str) or not isinstance(events, list):
+            return None
+        day_order.append(sid(date_str))
+        try:
+            month, day = map(int, date_str.split("-")[1:3])
+            feb29 = _FEB29 if (month, day) == (2, 29) else 0
+        except Exception:
+            feb29 = 0
+        for event in events:
+            if not _serializable(event):
+                return None
+            try:
+                category.append(CATEGORIES.index(categorize_event(event)))
+            except Exception:
+                return None
+            flat.append(event)
+            event_day.append(day_pos)
+            bits = 0
+            for n, name in enumerate(_STRING_FIELDS):
+                if name in event:
+                    bits |= 1 << n
+                columns[name].append(sid(event.get(name)))
+            values = event["values"]
+            for n, name in enumerate(_VALUE_FIELDS, len(_STRING_FIELDS)):
+                if name in values:
+                    bits |= 1 << n
+                columns[name].append(sid(values.get(name)))
+            is_null = all(values.get(k) is None for k in _VALUE_FIELDS)
+            flags.append(feb29 | (_NULL if is_null else 0))
+            has_key.append(bits)
+
+    position = {id(e): i for i, e in enumerate(flat)}
+    index = NewsIndex(events_by_date)
+    ref_keys = array.array("i", [int(k) for k in index._ref_keys])
+    ref_ids = array.array("I", [position[id(e.event)] for e in index._ref_entries])
+    abs_keys = array.array("q", [int(k) for k in index._abs_keys])
+    abs_ids = array.array("I", [position[id(e.event)] for e in index._abs_entries])
+    allday_ids = array.array("I")
+    allday_md = array.array("H")
+    allday_ord = array.array("I")
+    exact_of: Dict[int, int] = {}
+    for day, entries in index._allday_date.items():
+        for e in entries:
+            exact_of[id(e)] = day.toordinal()
+    for (month, day), entries in index._allday_md.items():
+        for e in entries:
+            allday_ids.append(position[id(e.event)])
+            allday_md.append(month * 32 + day)
+            allday_ord.append(exact_of.get(id(e), 0))
+
+    offsets = array.array("I", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+
+    sig_bytes = json.dumps(signature).encode("utf-8")
+    parts = [
+        _HEADER.pack(
+            MAGIC, VERSION, len(flat), len(strings), len(events_by_date), json_files_count,
+            len(ref_keys), len(abs_keys), len(allday_ids), len(sig_bytes),
+        ),
+        sig_bytes,
+        _le(day_order),
+        _le(event_day),
+    ]
+    parts += [_le(columns[name]) for name in _STRING_FIELDS + _VALUE_FIELDS]
+    parts += [
+        _le(has_key), _le(category), _le(flags),
+        _le(ref_keys), _le(ref_ids), _le(abs_keys), _le(abs_ids),
+        _le(allday_ids), _le(allday_md), _le(allday_ord),
+        _le(offsets), bytes(blob),
+    ]
+    return b"".join(parts)
+
+
+class LoadedSnapshot:
+    """Result of read_snapshot: merged events, counts and a ready NewsIndex."""
+
+    def __init__(self, events_by_date, json_files_count, index, category, flags):
+        self.events_by_date = events_by_date
+        self.json_files_count = json_files_count
+        self.index = index
+        self.category = category  # array('B'): index into CATEGORIES, per event in merge order
+        self.flags = flags        # array('B'): _NULL | _FEB29 bits
+
+
+def read_snapshot(path: str, signature: Optional[List[List[Any]]] = None) -> Optional[LoadedSnapshot]:
+    """
+    Load a snapshot. Returns None when the file is missing, malformed or
+    (if ``signature`` is given) built from different JSON files.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = memoryview(f.read())
+        (magic, version, n_events, n_strings, n_days, json_files_count,
+         n_ref, n_abs, n_allday, sig_len) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            return None
+        pos = _HEADER.size
+        stored_sig = json.loads(bytes(data[pos:pos + sig_len]).decode("utf-8"))
+        pos += sig_len
+        if signature is not None and stored_sig != signature:
+            return None
+
+        def take(typecode: str, count: int) -> array.array:
+            nonlocal pos
+            size = array.array(typecode).itemsize * count
+            arr = _from_le(typecode, data[pos:pos + size])
+            pos += size
+            return arr
+
+        day_order = take("I", n_days)
+        event_day = take("I", n_events)
+        columns = {name: take("I", n_events) for name in _STRING_FIELDS + _VALUE_FIELDS}
+        has_key = take("H", n_events)
+        category = take("B", n_events)
+        flags = take("B", n_events)
+        ref_keys = take("i", n_ref)
+        ref_ids = take("I", n_ref)
+        abs_keys = take("q", n_abs)
+        abs_ids = take("I", n_abs)
+        allday_ids = take("I", n_allday)
+        allday_md = take("H", n_allday)
+        allday_ord = take("I", n_allday)
+        offsets = take("I", n_strings + 1)
+        blob = bytes(data[pos:pos + offsets[-1]])
+        if len(blob) != offsets[-1]:
+            return None
+        strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n_strings)]
+        day_lists = [[] for _ in range(n_days)]
+        events_by_date = {strings[k]: day_lists[n] for n, k in enumerate(day_order)}
+    except Exception:
+        return None
+
+    def s(i: int) -> Optional[str]:
+        return None if i == NONE_ID else strings[i]
+
+    cols = [columns[name] for name in _STRING_FIELDS]
+    vcols = [columns[name] for name in _VALUE_FIELDS]
+    flat: List[Dict[str, Any]] = []
+    for i in range(n_events):
+        bits = has_key[i]
+        event: Dict[str, Any] = {}
+        for n, name in enumerate(_STRING_FIELDS):
+            if bits & (1 << n):
+                event[name] = s(cols[n][i])
+        event["values"] = {
+            name: s(vcols[n][i])
+            for n, name in enumerate(_VALUE_FIELDS)
+            if bits & (1 << (n + len(_STRING_FIELDS)))
+        }
+        flat.append(event)
+        day_lists[event_day[i]].append(event)
+
+    entries = [
+        _Entry(
+            i + 1, flat[i], bool(flags[i] & _NULL), bool(flags[i] & _FEB29),
+            CATEGORIES[category[i]],
+        )
+        for i in range(n_events)
+    ]
+    index = NewsIndex.__new__(NewsIndex)
+    index.event_count = n_events
+    index._categories = {id(e.event): (e.event, e.category) for e in entries}
+    index._ref_keys = ref_keys.tolist()
+    index._ref_entries = [entries[i] for i in ref_ids]
+    index._abs_keys = abs_keys.tolist()
+    index._abs_entries = [entries[i] for i in abs_ids]
+    index._allday_md = {}
+    index._allday_date = {}
+    for i, md, ordinal in zip(allday_ids, allday_md, allday_ord):
+        entry = entries[i]
+        month, day = divmod(md, 32)
+        entry.is_null = True
+        index._allday_md.setdefault((month, day), []).append(entry)
+        if ordinal:
+            index._allday_date.setdefault(date.fromordinal(ordinal), []).append(entry)
+    NewsIndex.remember(events_by_date, index)
+
+    return LoadedSnapshot(events_by_date, json_files_count, index, category, flags)
+
+
+def write_snapshot(directory: str) -> Optional[str]:
+    """Compile ``directory``/*.json into its snapshot file. Returns the path or None."""
+    from .store import load_events_by_date
+
+    signature = json_files_signature(directory)
+    events_by_date, json_files_count = load_events_by_date(directory)
+    payload = build_snapshot(events_by_date, json_files_count, signature)
+    if payload is None:
+        return None
+    path = snapshot_path(directory)
+    save_snapshot(path, payload)
+    return path
+
+
+def save_snapshot(path: str, payload: bytes) -> None:
+    """Write via a temp file so readers never see a partial snapshot."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="news_converter.snapshot", description="news_data JSON -> binary snapshot"
+    )
+    parser.add_argument("directory", nargs="?", default="news_data", help="JSON directory (default: news_data)")
+    args = parser.parse_args(argv)
+
+    path = write_snapshot(args.directory)
+    if path is None:
+        print("Snapshot yazılamadı (beklenmeyen olay formatı); JSON kullanılmaya devam edilecek.")
+        return 1
+    loaded = read_snapshot(path)
+    print(
+        f"{path}: {loaded.index.event_count} olay, {len(loaded.events_by_date)} gün, "
+        f"{loaded.json_files_count} JSON, {os.path.getsize(path)} bayt"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
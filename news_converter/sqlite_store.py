@@ -0,0 +1,370 @@
+"""
+Optional SQLite news store.
+
+news_data/*.json has to be loaded completely before any lookup, and the
+year-agnostic lookups fold every calendar year onto the candle year. The
+SQLite store keeps each event once with its own year and answers the same
+window queries as NewsIndex (find / has_news, year-agnostic or exact, with
+a currency set) through indexed range queries, so multi-year calendars can
+be queried without loading them into memory.
+
+    store = SqliteNewsStore("news.db")
+    store.import_directory("news_data")            # or import_news(converter_output)
+    store.find(datetime(2025, 3, 17, 14, 0), 120, currencies={"USD"})
+    store.events_between(date(2024, 1, 1), date(2024, 12, 31))  # events_by_date subset
+
+    python -m news_converter.sqlite_store news.db import news_data
+    python -m news_converter.sqlite_store news.db find "2025-03-17 14:00" --duration 120 --currencies USD
+
+Imports deduplicate like load_events_by_date: one row per (date, time_24h,
+currency, title); a re-imported event only replaces the stored one when it
+carries more values. Events that no lookup can match (bad date key or time)
+are skipped. Results come back in calendar order (date key, import order).
+Needs SQLite 3.24+ (row values, upsert).
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .index import AFFECTS_XYZ, REF_YEAR, _is_leap, _partition_key, _safe_category, format_currencies
+from .store import _value_count, event_key
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id          INTEGER PRIMARY KEY,
+    key         TEXT NOT NULL UNIQUE,   -- json of [date key, *store.event_key()]
+    date_key    TEXT NOT NULL,          -- events_by_date key, e.g. "2025-03-17"
+    year        INTEGER NOT NULL,
+    month       INTEGER NOT NULL,
+    day         INTEGER NOT NULL,
+    minute      INTEGER,                -- minute of day; NULL for All Day
+    ordinal     INTEGER,                -- date.toordinal(); NULL when the date does not exist
+    abs_minute  INTEGER,                -- ordinal * 1440 + minute (exact lookups)
+    currency    TEXT,                   -- ISO code; NULL for "All" and leftovers (always included)
+    is_null     INTEGER NOT NULL,       -- actual, forecast and previous are all None
+    affects     INTEGER NOT NULL,       -- NORMAL or SPEECH (XYZ rule)
+    category    TEXT NOT NULL,
+    value_count INTEGER NOT NULL,
+    source      TEXT,
+    event_json  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_md_minute_currency ON events (month, day, minute, currency);
+CREATE INDEX IF NOT EXISTS events_abs_minute ON events (abs_minute);
+CREATE INDEX IF NOT EXISTS events_ordinal ON events (ordinal, minute);
+"""
+
+_UPSERT = """
+INSERT INTO events (key, date_key, year, month, day, minute, ordinal, abs_minute, currency,
+                    is_null, affects, category, value_count, source, event_json)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    is_null = excluded.is_null, affects = excluded.affects, category = excluded.category,
+    value_count = excluded.value_count, source = excluded.source, event_json = excluded.event_json
+WHERE excluded.value_count > events.value_count
+"""
+
+# Window queries. {cols} is the select list, {cur} the optional currency filter.
+# Timed events in the candle year, positions as (month, day, minute). Row
+# values compare left to right, so a NULL minute can still pass the range.
+_REF_TIMED = """
+SELECT {cols} FROM events
+WHERE (month, day, minute) >= (?, ?, ?) AND (month, day, minute) < (?, ?, ?) AND minute IS NOT NULL
+  AND (is_null OR (month, day, minute) >= (?, ?, ?)) AND NOT (? AND month = 2 AND day = 29){cur}
+"""
+# All Day events of the (month, day) range in the candle year
+_REF_ALLDAY = """
+SELECT {cols} FROM events
+WHERE minute IS NULL AND (month, day) >= (?, ?) AND (month, day) <= (?, ?)
+  AND NOT (? AND month = 2 AND day = 29){cur}
+"""
+_ABS_TIMED = """
+SELECT {cols} FROM events
+WHERE abs_minute >= ? AND abs_minute < ? AND (is_null OR abs_minute >= ?){cur}
+"""
+_ABS_ALLDAY = """
+SELECT {cols} FROM events
+WHERE ordinal >= ? AND ordinal <= ? AND minute IS NULL{cur}
+"""
+_EVENT_COLS = "date_key, id, event_json"
+
+
+def _row_fields(date_str: str, event: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """Indexed columns of one event, or None when no lookup could match it."""
+    try:
+        year, month, day = map(int, date_str.split("-"))
+        date(REF_YEAR, month, day)
+    except Exception:
+        return None
+    try:
+        ordinal: Optional[int] = date(year, month, day).toordinal()
+    except Exception:
+        ordinal = None
+    values = event.get("values") or {}
+    is_null = all(values.get(k) is None for k in ("actual", "forecast", "previous"))
+    try:
+        time_24h = event.get("time_24h")
+        if not time_24h:
+            minute = None
+            is_null = True  # All Day events always use the extended window
+        else:
+            hour, mins = map(int, time_24h.split(":"))
+            if not (0 <= hour < 24 and 0 <= mins < 60):
+                return None
+            minute = hour * 60 + mins
+    except Exception:
+        return None
+    abs_minute = ordinal * 1440 + minute if ordinal is not None and minute is not None else None
+    category = _safe_category(event)
+    return (
+        year, month, day, minute, ordinal, abs_minute, _partition_key(event.get("currency")),
+        int(is_null), int(category in AFFECTS_XYZ), category,
+    )
+
+
+def _minute_ceil(dt: datetime) -> int:
+    """Smallest whole minute of day >= dt (event times are whole minutes)."""
+    return math.ceil(dt.hour * 60 + dt.minute + dt.second / 60.0 + dt.microsecond / 60e6)
+
+
+def _abs_ceil(dt: datetime) -> int:
+    return dt.toordinal() * 1440 + _minute_ceil(dt)
+
+
+def _ref_bound(dt: datetime, year: int) -> Tuple[int, int, int]:
+    """(month, day, minute) bound of dt in the candle year; other years are clamped."""
+    if dt.year < year:
+        return (0, 0, 0)
+    if dt.year > year:
+        return (13, 0, 0)
+    minute = _minute_ceil(dt)
+    if minute >= 1440:
+        nxt = dt.date() + timedelta(days=1)
+        if nxt.year > year:
+            return (13, 0, 0)
+        return (nxt.month, nxt.day, 0)
+    return (dt.month, dt.day, minute)
+
+
+class SqliteNewsStore:
+    """News events in one SQLite file, queried by (month, day, minute, currency) ranges."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # sqlite3 caches the prepared statements per connection
+            conn = sqlite3.connect(self.path, cached_statements=256)
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Import
+
+    def import_events_by_date(
+        self, events_by_date: Dict[str, List[Dict[str, Any]]], source: str = ""
+    ) -> Dict[str, int]:
+        """Upsert an events_by_date mapping. Returns {"seen", "written", "skipped"}."""
+        rows = []
+        skipped = 0
+        for date_str, events in events_by_date.items():
+            for event in events:
+                fields = _row_fields(date_str, event) if isinstance(event, dict) else None
+                if fields is None:
+                    skipped += 1
+                    continue
+                key = json.dumps([date_str, *event_key(date_str, event)], ensure_ascii=False)
+                rows.append(
+                    (key, date_str) + fields
+                    + (_value_count(event), source, json.dumps(event, ensure_ascii=False))
+                )
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(_UPSERT, rows)
+            written = conn.total_changes - before
+        return {"seen": len(rows) + skipped, "written": written, "skipped": skipped}
+
+    def import_news(self, data: Dict[str, Any], source: str = "") -> Dict[str, int]:
+        """Import one news_converter output document ({"days": [...]})."""
+        events_by_date: Dict[str, List[Dict[str, Any]]] = {}
+        for day in data.get("days", []):
+            date_str = day.get("date")
+            if date_str:
+                events_by_date.setdefault(date_str, []).extend(day.get("events", []))
+        return self.import_events_by_date(events_by_date, source)
+
+    def import_json_file(self, path: str) -> Dict[str, int]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return self.import_news(data, os.path.basename(path))
+
+    def import_directory(self, directory: str) -> Dict[str, int]:
+        """Import every JSON file of a news_data directory in name order (invalid files are skipped)."""
+        total = {"files": 0, "seen": 0, "written": 0, "skipped": 0}
+        for name in sorted(f for f in os.listdir(directory) if f.endswith(".json")):
+            try:
+                counts = self.import_json_file(os.path.join(directory, name))
+            except Exception:
+                continue
+            total["files"] += 1
+            for k, v in counts.items():
+                total[k] += v
+        return total
+
+    # Queries
+
+    def _currency_filter(self, currencies: Optional[Iterable[str]]) -> Tuple[str, List[str]]:
+        if currencies is None:
+            return "", []
+        codes = sorted(set(currencies))
+        marks = ", ".join("?" for _ in codes)
+        sql = f" AND (currency IS NULL OR currency IN ({marks}))" if codes else " AND currency IS NULL"
+        return sql, codes
+
+    def _window(
+        self,
+        cols: str,
+        start_ts: datetime,
+        duration_minutes: int,
+        year_agnostic: bool,
+        currencies: Optional[Iterable[str]],
+        extra: str = "",
+        limit: str = "",
+    ) -> List[Tuple[Any, ...]]:
+        cur, codes = self._currency_filter(currencies)
+        cur = extra + cur
+        end_ts = start_ts + timedelta(minutes=duration_minutes)
+        extended_start_ts = start_ts - timedelta(hours=1)
+        conn = self._connect()
+
+        if year_agnostic:
+            year = start_ts.year
+            skip_feb29 = int(not _is_leap(year))
+            timed = conn.execute(
+                _REF_TIMED.format(cols=cols, cur=cur) + limit,
+                _ref_bound(extended_start_ts, year) + _ref_bound(end_ts, year)
+                + _ref_bound(start_ts, year) + (skip_feb29,) + tuple(codes),
+            ).fetchall()
+            first = max(extended_start_ts.date(), date(year, 1, 1))
+            last = min(end_ts.date(), date(year, 12, 31))
+            allday: List[Tuple[Any, ...]] = []
+            if first <= last:
+                allday = conn.execute(
+                    _REF_ALLDAY.format(cols=cols, cur=cur) + limit,
+                    (first.month, first.day, last.month, last.day, skip_feb29) + tuple(codes),
+                ).fetchall()
+        else:
+            timed = conn.execute(
+                _ABS_TIMED.format(cols=cols, cur=cur) + limit,
+                (_abs_ceil(extended_start_ts), _abs_ceil(end_ts), _abs_ceil(start_ts)) + tuple(codes),
+            ).fetchall()
+            allday = conn.execute(
+                _ABS_ALLDAY.format(cols=cols, cur=cur) + limit,
+                (extended_start_ts.toordinal(), end_ts.toordinal()) + tuple(codes),
+            ).fetchall()
+        return timed + allday
+
+    def find(
+        self,
+        start_ts: datetime,
+        duration_minutes: int = 120,
+        year_agnostic: bool = True,
+        currencies: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Same window and matching rules as NewsIndex.find."""
+        rows = self._window(_EVENT_COLS, start_ts, duration_minutes, year_agnostic, currencies)
+        rows.sort(key=lambda r: (r[0], r[1]))
+        return [json.loads(r[2]) for r in rows]
+
+    def has_news(
+        self,
+        start_ts: datetime,
+        duration_minutes: int = 120,
+        year_agnostic: bool = True,
+        currencies: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """True when the find() window holds a NORMAL or SPEECH event (XYZ rule)."""
+        rows = self._window(
+            "id", start_ts, duration_minutes, year_agnostic, currencies,
+            extra=" AND affects", limit=" LIMIT 1",
+        )
+        return bool(rows)
+
+    def events_between(self, first: date, last: date) -> Dict[str, List[Dict[str, Any]]]:
+        """events_by_date for date keys in [first, last] (e.g. one candle year for NewsIndex)."""
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        rows = self._connect().execute(
+            "SELECT date_key, event_json FROM events WHERE date_key >= ? AND date_key <= ? "
+            "ORDER BY date_key, id",
+            (first.isoformat(), last.isoformat()),
+        )
+        for date_str, event_json in rows:
+            out.setdefault(date_str, []).append(json.loads(event_json))
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._connect().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT date_key), MIN(date_key), MAX(date_key), "
+            "COUNT(DISTINCT year) FROM events"
+        ).fetchone()
+        return {"events": row[0], "days": row[1], "first": row[2], "last": row[3], "years": row[4]}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="news_converter.sqlite_store", description="SQLite news store (import / query)"
+    )
+    parser.add_argument("db", help="SQLite file (created if missing)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="import news_converter JSON files or directories")
+    p_import.add_argument("paths", nargs="+")
+    p_find = sub.add_parser("find", help="events in a candle window")
+    p_find.add_argument("start", help='candle start, e.g. "2025-03-17 14:00"')
+    p_find.add_argument("--duration", type=int, default=120, help="window in minutes (default: 120)")
+    p_find.add_argument("--exact", action="store_true", help="match the event year too")
+    p_find.add_argument("--currencies", default="", help="e.g. USD,JPY (default: all)")
+    sub.add_parser("stats", help="row counts")
+    args = parser.parse_args(argv)
+
+    store = SqliteNewsStore(args.db)
+    if args.command == "import":
+        for path in args.paths:
+            if os.path.isdir(path):
+                counts = store.import_directory(path)
+            else:
+                counts = store.import_json_file(path)
+            print(f"{path}: {counts}")
+        print(store.stats())
+    elif args.command == "find":
+        from .index import parse_currencies
+
+        start = datetime.fromisoformat(args.start)
+        currencies = parse_currencies(args.currencies or "*")
+        events = store.find(start, args.duration, not args.exact, currencies)
+        print(f"{start} +{args.duration}dk · {format_currencies(currencies)}: {len(events)} olay")
+        for event in events:
+            print(f"  {event.get('date')} {event.get('time_24h') or 'All Day'} {event.get('currency')} {event.get('title')}")
+    else:
+        print(store.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
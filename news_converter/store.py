@@ -0,0 +1,275 @@
+"""
+Process-wide news store.
+
+The IOU routes used to re-read and json.load every file in news_data/ on
+each request. NewsStore loads a directory once and reloads it only when
+the directory mtime or a JSON file's mtime/size changes; every app (and,
+under appsuite, every app thread) shares the same store per directory.
+
+    store = get_news_store(news_dir)
+    news = store.snapshot()      # cheap: one listdir + stat per JSON file
+    news.events_by_date          # same mapping load_news_data_from_directory returned
+    news.index                   # NewsIndex for window lookups
+    news.json_files_count, news.day_count, news.event_count
+
+On reload the store prefers the compiled snapshot (news_converter.snapshot)
+when it was built from the current JSON files; otherwise it parses the JSON
+and rewrites the snapshot for the next start.
+
+New weeks can be published without a restart (news_converter /convert):
+
+    store.publish({"6octto12oct.json": json_data})
+
+publish() writes the files, builds the merged events and index off to the
+side and then swaps the new snapshot in. Requests that already hold the old
+snapshot keep using it; requests arriving while the build runs get the old
+one instead of starting a second load.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .index import NewsIndex
+
+
+Signature = Tuple[Any, ...]
+
+
+@dataclass
+class NewsSnapshot:
+    """Parsed news data of one directory state."""
+    directory: str
+    events_by_date: Dict[str, List[Dict[str, Any]]]
+    json_files_count: int
+    signature: Signature
+    loaded_at: float = 0.0
+    source: str = "json"  # "json" or "snapshot"
+    _index: Optional[NewsIndex] = field(default=None, repr=False)
+
+    @property
+    def day_count(self) -> int:
+        return len(self.events_by_date)
+
+    @property
+    def event_count(self) -> int:
+        return sum(len(v) for v in self.events_by_date.values())
+
+    @property
+    def index(self) -> NewsIndex:
+        if self._index is None:
+            self._index = NewsIndex.of(self.events_by_date)
+        return self._index
+
+
+def _json_files(directory: str) -> List[str]:
+    return [f for f in os.listdir(directory) if f.endswith(".json")]
+
+
+def directory_signature(directory: str) -> Signature:
+    """(dir mtime, (name, mtime, size) per JSON file); empty for a missing dir."""
+    if not os.path.isdir(directory):
+        return ()
+    try:
+        entries = []
+        for name in sorted(_json_files(directory)):
+            try:
+                st = os.stat(os.path.join(directory, name))
+                entries.append((name, st.st_mtime_ns, st.st_size))
+            except OSError:
+                entries.append((name, None, None))
+        return (os.stat(directory).st_mtime_ns, tuple(entries))
+    except OSError:
+        return ()
+
+
+def event_key(date_str: str, event: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Identity of an event across overlapping exports."""
+    return (event.get("date") or date_str, event.get("time_24h"), event.get("currency"), event.get("title"))
+
+
+def _value_count(event: Dict[str, Any]) -> int:
+    values = event.get("values") or {}
+    return sum(1 for k in ("actual", "forecast", "previous") if values.get(k) is not None)
+
+
+def load_events_by_date(directory: str) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+    """
+    Merge every JSON file in ``directory`` into date_string -> events.
+    Invalid files are skipped. Returns (events_by_date, json_files_count).
+
+    Exports often overlap (e.g. 2marto29mar / 2marto30mar), so events are
+    deduplicated on (date, time_24h, currency, title). Files are read in
+    name order; a duplicate only replaces the kept event when it carries
+    more values (e.g. a later export with the actual filled in).
+    """
+    if not os.path.exists(directory) or not os.path.isdir(directory):
+        return {}, 0
+
+    events_by_date: Dict[str, List[Dict[str, Any]]] = {}
+    # date_string -> event_key -> position in events_by_date[date_string]
+    positions: Dict[str, Dict[Tuple[Any, ...], int]] = {}
+    try:
+        json_files = sorted(_json_files(directory))
+    except OSError:
+        return {}, 0
+
+    for json_file in json_files:
+        json_path = os.path.join(directory, json_file)
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            for day in data.get("days", []):
+                date_str = day.get("date")  # e.g., "2025-03-17"
+                events = day.get("events", [])
+                if date_str:
+                    merged = events_by_date.setdefault(date_str, [])
+                    seen = positions.setdefault(date_str, {})
+                    for event in events:
+                        if not isinstance(event, dict):
+                            merged.append(event)
+                            continue
+                        key = event_key(date_str, event)
+                        pos = seen.get(key)
+                        if pos is None:
+                            seen[key] = len(merged)
+                            merged.append(event)
+                        elif _value_count(event) > _value_count(merged[pos]):
+                            merged[pos] = event
+        except Exception:
+            continue
+
+    return events_by_date, len(json_files)
+
+
+class NewsStore:
+    """Loads a news directory once; reloads when its signature changes."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.loads = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._publishing = False
+        self._snapshot: Optional[NewsSnapshot] = None
+
+    def snapshot(self) -> NewsSnapshot:
+        signature = directory_signature(self.directory)
+        current = self._snapshot
+        if current is not None and current.signature == signature:
+            self.hits += 1
+            return current
+        if current is not None and self._publishing:
+            # publish() wrote the files and is building; it swaps in shortly
+            self.hits += 1
+            return current
+
+        with self._lock:
+            current = self._snapshot
+            if current is not None and current.signature == signature:
+                self.hits += 1
+                return current
+            current = self._load(signature)
+            self._snapshot = current
+            self.loads += 1
+            return current
+
+    def _load(self, signature: Signature) -> NewsSnapshot:
+        from . import snapshot as compiled
+
+        json_signature = [list(entry) for entry in signature[1]] if signature else None
+        path = compiled.snapshot_path(self.directory)
+        loaded = compiled.read_snapshot(path, json_signature) if json_signature else None
+        if loaded is not None:
+            return NewsSnapshot(
+                directory=self.directory,
+                events_by_date=loaded.events_by_date,
+                json_files_count=loaded.json_files_count,
+                signature=signature,
+                loaded_at=time.time(),
+                source="snapshot",
+                _index=loaded.index,
+            )
+
+        events_by_date, json_files_count = load_events_by_date(self.directory)
+        if json_signature:
+            # Best effort: a read-only news_data just keeps using JSON
+            try:
+                payload = compiled.build_snapshot(events_by_date, json_files_count, json_signature)
+                if payload is not None:
+                    compiled.save_snapshot(path, payload)
+                    # Writing the snapshot bumps the directory mtime
+                    after = directory_signature(self.directory)
+                    if after and after[1] == signature[1]:
+                        signature = after
+            except Exception:
+                pass
+        return NewsSnapshot(
+            directory=self.directory,
+            events_by_date=events_by_date,
+            json_files_count=json_files_count,
+            signature=signature,
+            loaded_at=time.time(),
+        )
+
+    def publish(self, files: Dict[str, Dict[str, Any]]) -> NewsSnapshot:
+        """
+        Write converter output (file name -> JSON data) into the directory
+        and atomically replace the current snapshot with one built from it.
+        An existing file with the same name is overwritten.
+        """
+        names = {}
+        for name, data in files.items():
+            safe = os.path.basename(name or "")
+            if not safe.endswith(".json") or safe.startswith(".") or safe != name:
+                raise ValueError(f"Geçersiz dosya adı: {name}")
+            if not isinstance(data, dict) or not isinstance(data.get("days"), list):
+                raise ValueError(f"Geçersiz haber verisi: {name}")
+            names[safe] = data
+
+        with self._publish_lock:
+            self._publishing = True
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                for name, data in names.items():
+                    path = os.path.join(self.directory, name)
+                    tmp = os.path.join(self.directory, f".{name}.tmp")
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    os.replace(tmp, path)
+                fresh = self._load(directory_signature(self.directory))
+                fresh.index  # build before anyone can see it
+                with self._lock:
+                    self._snapshot = fresh
+                    self.loads += 1
+                return fresh
+            finally:
+                self._publishing = False
+
+    def warm(self) -> NewsSnapshot:
+        """Load the data and build the index up front (call from run())."""
+        news = self.snapshot()
+        news.index
+        return news
+
+
+_stores: Dict[str, NewsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_news_store(directory: str) -> NewsStore:
+    """Shared NewsStore for ``directory`` (one per absolute path per process)."""
+    key = os.path.abspath(directory)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = NewsStore(key)
+                _stores[key] = store
+    return store
@@ -6,10 +6,14 @@ import os
 from typing import List, Dict, Any
 
 from .parser import parse_markdown_to_json
+from .store import get_news_store
 from email.parser import BytesParser
 from email.policy import default as email_default
 
 
+NEWS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "news_data")
+
+
 def page(title: str, body: str) -> bytes:
     html_doc = f"""<!doctype html>
 <html>
@@ -46,6 +50,34 @@ def page(title: str, body: str) -> bytes:
     return html_doc.encode("utf-8")
 
 
+def render_published(converted_files: List[Dict[str, Any]], news: Any) -> bytes:
+    rows = []
+    for result in converted_files:
+        if result["success"]:
+            days = result["data"].get("days", [])
+            events = sum(len(d.get("events", [])) for d in days)
+            status = f"<span class='success'>✅ yayınlandı</span> ({len(days)} gün, {events} olay)"
+            name = result["filename"]
+        else:
+            status = f"<span class='error'>❌ {html.escape(result['error'])}</span>"
+            name = result["source"]
+        rows.append(
+            f"<tr><td>{html.escape(result['source'])}</td><td><code>{html.escape(name)}</code></td><td>{status}</td></tr>"
+        )
+    body = f"""
+    <div class='card'>
+      <h3>📤 Yayınlandı</h3>
+      <p>Haber deposu: {news.json_files_count} JSON dosyası, {news.day_count} gün, {news.event_count} olay</p>
+      <table>
+        <thead><tr><th>Kaynak</th><th>JSON</th><th>Durum</th></tr></thead>
+        <tbody>{''.join(rows)}</tbody>
+      </table>
+      <p style='margin-top:12px;'><a href='/'>← Geri</a></p>
+    </div>
+    """
+    return page("News Converter - Yayınlandı", body)
+
+
 def render_index() -> bytes:
     body = """
     <div class='card'>
@@ -58,7 +90,10 @@ def render_index() -> bytes:
           </div>
         </div>
         <div style='margin-top:12px;'>
-          <button type='submit'>Dönüştür ve İndir</button>
+          <label><input type='checkbox' name='publish' value='1' /> news_data/ klasörüne yayınla (IOU uygulamaları yeniden başlatmadan kullanır)</label>
+        </div>
+        <div style='margin-top:12px;'>
+          <button type='submit'>Dönüştür ve İndir / Yayınla</button>
         </div>
       </form>
     </div>
@@ -72,6 +107,7 @@ def render_index() -> bytes:
         <li>✅ Otomatik yıl tespiti (geçmiş ve gelecek tarihler)</li>
         <li>✅ 12 saat → 24 saat dönüşümü</li>
         <li>✅ Direkt indirme (tek dosya için .json, çoklu için .zip)</li>
+        <li>✅ Yayınla: JSON news_data/ klasörüne yazılır, haber indeksi arka planda kurulup tek adımda devreye alınır</li>
       </ul>
     </div>
     """
@@ -210,6 +246,26 @@ class NewsConverterHandler(BaseHTTPRequestHandler):
                         "source": filename
                     })
             
+            # Publish into news_data/ and swap the shared store's snapshot
+            if form_data["params"].get("publish"):
+                published = [r for r in converted_files if r["success"]]
+                if not published:
+                    raise ValueError("Yayınlanacak dönüştürülmüş dosya yok: " + "; ".join(
+                        f"{r['source']}: {r['error']}" for r in converted_files
+                    ))
+                news = get_news_store(NEWS_DIR).publish(
+                    {os.path.basename(r["filename"]): r["data"] for r in published}
+                )
+                for r in published:
+                    r["filename"] = os.path.basename(r["filename"])
+                body = render_published(converted_files, news)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
             # If single file, return JSON directly
             if len(converted_files) == 1:
                 result = converted_files[0]
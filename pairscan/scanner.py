@@ -0,0 +1,139 @@
+"""
+Shared signed-pair scanner for IOU / IOV analysis.
+
+Every app allocates its filtered sequence values per offset with its own
+DC and offset rules. What follows the allocation is the same everywhere:
+take the allocated candle and its predecessor, drop excluded times, check
+|OC| and |PrevOC| against the limit (with tolerance) and split by sign.
+IOU (same sign) and IOV (opposite sign) come out of the same pass.
+IOVResult and its HTML table are shared too; IOU results stay per app.
+"""
+
+import html
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# offset -> [(seq_value, candle index)] for the filtered sequence values
+Allocated = Dict[int, List[Tuple[int, int]]]
+
+
+@dataclass
+class IOVResult:
+    """Result of IOV (Inverse OC Value - opposite sign) analysis."""
+    seq_value: int
+    index: int
+    timestamp: datetime
+    oc: float
+    prev_oc: float
+    prev_index: int
+    prev_timestamp: datetime
+
+
+def passes_limit(oc: float, prev_oc: float, limit: float, tolerance: float) -> bool:
+    """|OC| and |PrevOC| >= limit and neither within ±tolerance of the limit."""
+    if abs(oc) < limit or abs(prev_oc) < limit:
+        return False
+    if abs(abs(oc) - limit) < tolerance or abs(abs(prev_oc) - limit) < tolerance:
+        return False
+    return True
+
+
+def same_sign(oc: float, prev_oc: float) -> bool:
+    return (oc > 0 and prev_oc > 0) or (oc < 0 and prev_oc < 0)
+
+
+def _takes_offset(cls: Optional[type]) -> bool:
+    try:
+        return cls is not None and any(f.name == "offset" for f in fields(cls))
+    except TypeError:
+        return False
+
+
+def scan_signed_pairs(
+    candles: List[Any],
+    allocated: Allocated,
+    limit: float,
+    tolerance: float = 0.005,
+    excluded: Optional[Callable[[datetime], bool]] = None,
+    iou_cls: Optional[type] = None,
+    iov_cls: Optional[type] = None,
+) -> Tuple[Dict[int, List[Any]], Dict[int, List[Any]]]:
+    """
+    Classify allocated candles as IOU or IOV in one pass.
+    
+    ``excluded(ts)`` returns True for candles that can never be a pair
+    (the app's time rules). Result objects are built with ``iou_cls`` /
+    ``iov_cls``; an ``offset`` field is filled in when the class has one.
+    Passing None for a class skips that side.
+    
+    Returns: (Dict[offset] -> List[IOU], Dict[offset] -> List[IOV])
+    """
+    iou_results: Dict[int, List[Any]] = {}
+    iov_results: Dict[int, List[Any]] = {}
+    iou_offset = _takes_offset(iou_cls)
+    iov_offset = _takes_offset(iov_cls)
+    
+    for offset in sorted(allocated):
+        iou_list: List[Any] = []
+        iov_list: List[Any] = []
+        
+        for seq_val, idx in allocated[offset]:
+            if idx <= 0 or idx >= len(candles):
+                continue
+            
+            candle = candles[idx]
+            prev_candle = candles[idx - 1]
+            if excluded is not None and excluded(candle.ts):
+                continue
+            
+            oc = candle.close - candle.open
+            prev_oc = prev_candle.close - prev_candle.open
+            if not passes_limit(oc, prev_oc, limit, tolerance):
+                continue
+            
+            if same_sign(oc, prev_oc):
+                cls, target, with_offset = iou_cls, iou_list, iou_offset
+            else:
+                cls, target, with_offset = iov_cls, iov_list, iov_offset
+            if cls is None:
+                continue
+            
+            values = dict(
+                seq_value=seq_val,
+                index=idx,
+                timestamp=candle.ts,
+                oc=oc,
+                prev_oc=prev_oc,
+                prev_index=idx - 1,
+                prev_timestamp=prev_candle.ts,
+            )
+            if with_offset:
+                values["offset"] = offset
+            target.append(cls(**values))
+        
+        iou_results[offset] = iou_list
+        iov_results[offset] = iov_list
+    
+    return iou_results, iov_results
+
+
+def render_iov_table(filename: str, iov_results: Dict[int, List[Any]]) -> str:
+    """Compact IOV (opposite-sign OC/PrevOC) table for one file."""
+    total_iov = sum(len(v) for v in iov_results.values())
+    if total_iov == 0:
+        return f"<div class='card' style='padding:10px;'><strong>🔁 {html.escape(filename)}</strong> - <span style='color:#888;'>IOV yok</span></div>"
+    rows = ""
+    for offset in sorted(iov_results):
+        for iov in iov_results[offset]:
+            rows += f"<tr><td>{offset:+d}</td><td>{iov.seq_value}</td><td>{iov.index}</td><td>{iov.timestamp.strftime('%m-%d %H:%M')}</td><td>{iov.oc:+.5f}</td><td>{iov.prev_oc:+.5f}</td><td>{iov.prev_index}</td></tr>"
+    return f"""
+    <div class='card' style='padding:10px;'>
+      <strong>🔁 {html.escape(filename)}</strong> - <strong>{total_iov} IOV</strong> <span style='color:#888;'>(zıt işaretli OC/PrevOC)</span>
+      <table style='margin-top:8px;'>
+        <tr><th>Ofs</th><th>Seq</th><th>Idx</th><th>Timestamp</th><th>OC</th><th>PrevOC</th><th>PIdx</th></tr>
+        {rows}
+      </table>
+    </div>
+    """
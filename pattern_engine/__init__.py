@@ -0,0 +1,68 @@
+"""
+Pattern engine shared by every app (app48, app72, app80, app90, app96,
+app120, app321): XYZ offset sets in, valid patterns out.
+
+Import from the package; engine.py is the implementation.
+"""
+
+from .engine import (
+    ALL_OFFSETS_MASK,
+    DEFAULT_TOP_K,
+    FRONTIER_TOKEN_VERSION,
+    PARALLEL_MIN_RESULTS,
+    PATTERN_HANDLE_LIMIT,
+    PATTERN_PAGE_SIZE,
+    PATTERN_PAGE_SIZE_MAX,
+    JokerSuggestion,
+    PatternAutomaton,
+    PatternCounts,
+    PatternPage,
+    PatternResult,
+    XyzSet,
+    count_patterns,
+    find_valid_patterns,
+    format_pattern_counts,
+    format_pattern_page,
+    format_pattern_results,
+    format_xyz_field,
+    get_pattern_handle,
+    mask_offsets,
+    parse_xyz_field,
+    pattern_page,
+    pattern_page_json,
+    store_pattern_handle,
+    suggest_jokers,
+    top_k_patterns,
+    xyz_mask,
+)
+
+__all__ = [
+    "ALL_OFFSETS_MASK",
+    "DEFAULT_TOP_K",
+    "FRONTIER_TOKEN_VERSION",
+    "PARALLEL_MIN_RESULTS",
+    "PATTERN_HANDLE_LIMIT",
+    "PATTERN_PAGE_SIZE",
+    "PATTERN_PAGE_SIZE_MAX",
+    "JokerSuggestion",
+    "PatternAutomaton",
+    "PatternCounts",
+    "PatternPage",
+    "PatternResult",
+    "XyzSet",
+    "count_patterns",
+    "find_valid_patterns",
+    "format_pattern_counts",
+    "format_pattern_page",
+    "format_pattern_results",
+    "format_xyz_field",
+    "get_pattern_handle",
+    "mask_offsets",
+    "parse_xyz_field",
+    "pattern_page",
+    "pattern_page_json",
+    "store_pattern_handle",
+    "suggest_jokers",
+    "top_k_patterns",
+    "xyz_mask",
+]
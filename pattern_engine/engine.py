@@ -0,0 +1,1172 @@
+"""
+Pattern Analysis for XYZ Offset Sequences (pattern_engine implementation)
+
+Analyzes multiple XYZ offset sets to find valid patterns.
+
+Pattern Rules:
+1. Each 0 acts as a reset point
+2. After each 0, can start with ±1 or ±3
+3. Once a sign is chosen, the triplet continues with that sign
+4. Valid triplets: +1→+2→+3, +3→+2→+1, -1→-2→-3, -3→-2→-1
+5. No gaps allowed (1→3 invalid)
+6. After triplet completion, must have 0 to reset
+"""
+
+from typing import Any, List, Dict, Set, Tuple, Optional, FrozenSet, Iterator, Iterable, Union
+from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import base64
+import hashlib
+import heapq
+import json
+import os
+import threading
+import zlib
+
+
+@dataclass
+class PatternResult:
+    """Final pattern result with completion status."""
+    pattern: List[int]  # The complete pattern sequence
+    file_sequence: List[Tuple[int, str]]  # [(file_idx, filename), ...]
+    is_complete: bool  # Whether pattern ends with 0
+    length: int  # Number of offsets in pattern
+    expected_next: Set[int]  # Valid next offsets for continuation
+
+
+@dataclass
+class PatternCounts:
+    """Exact number of valid patterns, computed without enumerating them."""
+    total: int
+    complete: int  # patterns ending with 0
+    incomplete: int
+    # (final state, sorted expected_next) -> number of patterns
+    by_final: Dict[Tuple[str, Tuple[int, ...]], int]
+    # last offset -> number of patterns
+    by_last_offset: Dict[int, int]
+
+
+@dataclass
+class PatternPage:
+    """One page of a stored pattern result (see pattern_page)."""
+    handle: str
+    page: int  # 1-based
+    pages: int
+    size: int
+    total: int
+    start: int  # 0-based index of results[0] in the full listing
+    filenames: List[str]
+    results: List[PatternResult]
+
+
+@dataclass
+class JokerSuggestion:
+    """Joker files that make a pattern possible (see suggest_jokers)."""
+    jokers: List[int]  # 0-based file indices to mark as joker
+    pattern: List[int]  # A pattern that uses exactly those jokers
+    is_complete: bool
+    length: int
+
+
+# Automaton state of a branch: (current_state, direction, expected_next).
+# Two branches with the same state accept exactly the same continuations.
+StateKey = Tuple[str, Optional[str], FrozenSet[int]]
+
+# Patterns listed on the IOU results page (count_patterns gives the total)
+DEFAULT_TOP_K = 100
+
+# Full enumerations producing at least this many patterns are split across
+# worker processes when find_valid_patterns() picks the worker count itself
+PARALLEL_MIN_RESULTS = 50_000
+
+# /patterns paging: default and largest page size, stored results per process
+PATTERN_PAGE_SIZE = DEFAULT_TOP_K
+PATTERN_PAGE_SIZE_MAX = 1000
+PATTERN_HANDLE_LIMIT = 32
+
+# Bumped whenever the state numbering or token layout changes
+FRONTIER_TOKEN_VERSION = 1
+# Tokens arrive in a hidden form field: cap the encoded text and the JSON it
+# inflates to (a few hundred bytes per file, so thousands of files fit)
+MAX_TOKEN_CHARS = 500_000
+MAX_TOKEN_BYTES = 2_000_000
+
+# XYZ sets as 7-bit masks: bit (offset + 3) is set when offset is in the set
+XyzSet = Union[int, Iterable[int]]
+ALL_OFFSETS_MASK = 0x7F
+# mask -> offsets of its set bits, ascending
+_MASK_OFFSETS: List[List[int]] = [
+    [bit - 3 for bit in range(7) if mask >> bit & 1] for mask in range(ALL_OFFSETS_MASK + 1)
+]
+
+
+def xyz_mask(offsets: XyzSet) -> int:
+    """7-bit mask of an XYZ set (masks are returned unchanged; offsets outside -3..+3 are ignored)."""
+    if isinstance(offsets, int):
+        return offsets & ALL_OFFSETS_MASK
+    mask = 0
+    for offset in offsets:
+        if -3 <= offset <= 3:
+            mask |= 1 << (offset + 3)
+    return mask
+
+
+def mask_offsets(mask: int) -> List[int]:
+    """Offsets of a mask, ascending."""
+    return list(_MASK_OFFSETS[mask & ALL_OFFSETS_MASK])
+
+
+def format_xyz_field(offsets: XyzSet) -> str:
+    """Hidden form field value for an XYZ set, e.g. "0x49"."""
+    return f"0x{xyz_mask(offsets):02x}"
+
+
+def parse_xyz_field(value: str) -> int:
+    """Mask from a hidden form field: "0x49" or the older comma list "-3,0,3"."""
+    value = (value or "").strip()
+    if not value:
+        return 0
+    if value.lower().startswith("0x"):
+        return int(value, 16) & ALL_OFFSETS_MASK
+    return xyz_mask(int(x.strip()) for x in value.split(",") if x.strip())
+
+
+def _auto_jokers(xyz_data: List[Tuple[str, XyzSet]]) -> List[Tuple[str, int]]:
+    """Masks per file; empty XYZ files (no IOUs) become jokers (all offsets -3..+3)."""
+    # This prevents empty files from killing all branches
+    processed = []
+    for filename, offsets in xyz_data:
+        mask = xyz_mask(offsets)
+        if not mask:
+            processed.append((f"{filename} [AUTO-JOKER]", ALL_OFFSETS_MASK))
+        else:
+            processed.append((filename, mask))
+    return processed
+
+
+def _get_next_state(current_state: str, offset: int) -> str:
+    """Determine next state based on current state and offset."""
+    if offset == 0:
+        return 'reset'
+    elif current_state == 'reset':
+        return 'plus_started' if offset > 0 else 'minus_started'
+    else:
+        return current_state
+
+
+def _get_expected_next(current_offset: int, current_state: str, direction: Optional[str]) -> Set[int]:
+    """Get valid next offsets based on current offset, state, and direction."""
+    if current_state == 'reset':
+        # After 0, can start with ±1 or ±3
+        return {-3, -1, 1, 3}
+    
+    if current_offset == 0:
+        # Just hit 0, can start new cycle
+        return {-3, -1, 1, 3}
+    
+    # In middle of cycle - MUST follow direction
+    if current_state == 'plus_started':
+        if direction == 'ascending':
+            # +1 → +2 → +3 → 0
+            if current_offset == 1:
+                return {2}
+            elif current_offset == 2:
+                return {3}
+            elif current_offset == 3:
+                return {0}
+        elif direction == 'descending':
+            # +3 → +2 → +1 → 0
+            if current_offset == 3:
+                return {2}
+            elif current_offset == 2:
+                return {1}
+            elif current_offset == 1:
+                return {0}
+    
+    elif current_state == 'minus_started':
+        if direction == 'ascending':
+            # -1 → -2 → -3 → 0
+            if current_offset == -1:
+                return {-2}
+            elif current_offset == -2:
+                return {-3}
+            elif current_offset == -3:
+                return {0}
+        elif direction == 'descending':
+            # -3 → -2 → -1 → 0
+            if current_offset == -3:
+                return {-2}
+            elif current_offset == -2:
+                return {-1}
+            elif current_offset == -1:
+                return {0}
+    
+    return set()
+
+
+def _initial_states(first_offsets: List[int]) -> List[Tuple[int, StateKey]]:
+    """(offset, state) of every starting branch, in exploration order."""
+    starts: List[Tuple[int, StateKey]] = []
+    # First file can start with ANY offset (data before is unknown)
+    for offset in first_offsets:
+        if offset == 0:
+            # Start with 0 - can branch to ±1 or ±3 next
+            starts.append((0, ('reset', None, frozenset({-3, -1, 1, 3}))))
+        elif offset in {-3, -1, 1, 3}:
+            # Start with ±1 or ±3: two possibilities
+            # 1) New triplet starting (normal flow)
+            # 2) Triplet ending (previous steps in unloaded data)
+            state = 'plus_started' if offset > 0 else 'minus_started'
+            direction = 'ascending' if offset in {1, -1} else 'descending'
+            expected = _get_expected_next(offset, state, direction)
+            starts.append((offset, (state, direction, frozenset(expected))))
+            # Previous steps were in unloaded data range: can jump directly to 0
+            starts.append((offset, (state, direction, frozenset({0}))))
+        elif offset in {-2, 2}:
+            # Start with ±2: direction unknown, try both
+            # NOTE: ±2 is in the MIDDLE of triplet, cannot jump to 0
+            state = 'plus_started' if offset > 0 else 'minus_started'
+            starts.append((offset, (state, 'ascending', frozenset({3 if offset > 0 else -3}))))
+            starts.append((offset, (state, 'descending', frozenset({1 if offset > 0 else -1}))))
+    return starts
+
+
+def _step(key: StateKey, offset: int) -> StateKey:
+    """State after appending ``offset`` (which must be in the expected set)."""
+    current_state, direction, _ = key
+    new_state = _get_next_state(current_state, offset)
+    # Direction: set on first non-zero in cycle, reset on 0
+    if offset == 0:
+        direction = None
+    elif current_state == 'reset':
+        direction = 'ascending' if offset in {1, -1} else 'descending'
+    return (new_state, direction, frozenset(_get_expected_next(offset, new_state, direction)))
+
+
+def _build_tables():
+    """
+    Number every state reachable from a start and precompute, per state,
+    its expected_next mask and the next state for each offset bit.
+    """
+    keys: List[StateKey] = []
+    ids: Dict[StateKey, int] = {}
+
+    def state_id(key: StateKey) -> int:
+        if key not in ids:
+            ids[key] = len(keys)
+            keys.append(key)
+        return ids[key]
+
+    starts = [[state_id(key) for _, key in _initial_states([bit - 3])] for bit in range(7)]
+    expected: List[int] = []
+    nxt: List[List[int]] = []
+    i = 0
+    while i < len(keys):
+        key = keys[i]
+        expected.append(xyz_mask(key[2]))
+        nxt.append([state_id(_step(key, bit - 3)) if bit - 3 in key[2] else -1 for bit in range(7)])
+        i += 1
+    return keys, starts, expected, nxt, [key[0] == 'reset' for key in keys]
+
+
+# _STATE_KEYS[s]: StateKey of state id s; _STARTS[bit]: start states of offset bit - 3 (first file)
+# _EXPECTED[s]: expected_next mask; _NEXT[s][bit]: state after offset bit - 3 (-1: not allowed)
+# _RESET[s]: state is 'reset' (the pattern so far ends on 0)
+_STATE_KEYS, _STARTS, _EXPECTED, _NEXT, _RESET = _build_tables()
+
+
+class PatternAutomaton:
+    """
+    Layered automaton of all valid patterns over a list of XYZ offset sets.
+
+    Layer i holds the distinct branch states after file i; equivalent
+    branches are merged, so building it costs O(files x states x 7)
+    regardless of how many patterns exist. Patterns are read back lazily by
+    walking the layers forward and only following edges that can still
+    reach an accepted final state.
+
+    XYZ sets are 7-bit masks and states are ids into the precomputed
+    transition table, so a step is ``_EXPECTED[s] & mask`` plus table
+    lookups. Offsets are explored in ascending order.
+    """
+
+    def __init__(self, xyz_data: List[Tuple[str, XyzSet]]):
+        self.xyz_data: List[Tuple[str, int]] = []
+        self.filenames: List[str] = []
+        self.file_sequence: List[Tuple[int, str]] = []  # 1-indexed for display
+        # layers[i]: state ids after file i; edges[i][n]: [(offset, node in layer i+1)]
+        self.layers: List[List[int]] = []
+        self.edges: List[List[List[Tuple[int, int]]]] = []
+        self.roots: List[Tuple[int, int]] = []  # (offset, node in layer 0)
+        # complete? -> completions[i][n] (see _completions), dropped by extend()
+        self._completion_cache: Dict[bool, List[List[int]]] = {}
+        self.extend(xyz_data)
+
+    def extend(self, xyz_data: List[Tuple[str, XyzSet]]) -> None:
+        """Append files; only the last layer (the frontier) is read."""
+        self._completion_cache = {}
+        for filename, mask in _auto_jokers(xyz_data):
+            self.xyz_data.append((filename, mask))
+            self.filenames.append(filename)
+            self.file_sequence.append((len(self.filenames), filename))
+            if not self.layers:
+                self._add_roots(mask)
+            else:
+                self._add_layer(mask)
+
+    def _add_roots(self, mask: int) -> None:
+        ids: Dict[int, int] = {}
+        layer: List[int] = []
+        for offset in _MASK_OFFSETS[mask]:
+            for state in _STARTS[offset + 3]:
+                if state not in ids:
+                    ids[state] = len(layer)
+                    layer.append(state)
+                self.roots.append((offset, ids[state]))
+        self.layers.append(layer)
+
+    def _add_layer(self, mask: int) -> None:
+        ids: Dict[int, int] = {}
+        next_layer: List[int] = []
+        out: List[List[Tuple[int, int]]] = []
+        for state in self.layers[-1]:
+            node_edges = []
+            row = _NEXT[state]
+            for offset in _MASK_OFFSETS[_EXPECTED[state] & mask]:
+                target = row[offset + 3]
+                if target not in ids:
+                    ids[target] = len(next_layer)
+                    next_layer.append(target)
+                node_edges.append((offset, ids[target]))
+            out.append(node_edges)
+        self.edges.append(out)
+        self.layers.append(next_layer)
+
+    def to_token(self) -> str:
+        """
+        Compact text form of the whole automaton (files, layers, edges) for
+        a hidden form field; from_token() + extend() continue from it.
+        """
+        payload = {
+            "v": FRONTIER_TOKEN_VERSION,
+            "files": self.xyz_data,
+            "roots": self.roots,
+            "layers": self.layers,
+            "edges": self.edges,
+        }
+        raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return base64.urlsafe_b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+    @classmethod
+    def from_token(cls, token: str) -> "PatternAutomaton":
+        """Rebuild an automaton from to_token(). Raises ValueError for a bad token."""
+        try:
+            token = token.strip()
+            if len(token) > MAX_TOKEN_CHARS:
+                raise ValueError("too long")
+            inflater = zlib.decompressobj()
+            raw = inflater.decompress(base64.urlsafe_b64decode(token.encode("ascii")), MAX_TOKEN_BYTES)
+            if inflater.unconsumed_tail:
+                raise ValueError("too large")
+            if not inflater.eof:
+                raise ValueError("truncated")
+            payload = json.loads(raw)
+            if payload.get("v") != FRONTIER_TOKEN_VERSION:
+                raise ValueError("version")
+            files = [(str(name), int(mask) & ALL_OFFSETS_MASK) for name, mask in payload["files"]]
+            layers = [[int(state) for state in layer] for layer in payload["layers"]]
+            roots = [(int(offset), int(node)) for offset, node in payload["roots"]]
+            edges = [
+                [[(int(offset), int(target)) for offset, target in node_edges] for node_edges in layer_edges]
+                for layer_edges in payload["edges"]
+            ]
+            # Shape checks so a tampered token fails here instead of mid-search
+            n_states = len(_STATE_KEYS)
+            if len(layers) != len(files) or len(edges) != max(len(layers) - 1, 0):
+                raise ValueError("shape")
+            if any(not 0 <= state < n_states for layer in layers for state in layer):
+                raise ValueError("state")
+            if layers and any(not 0 <= node < len(layers[0]) for _, node in roots):
+                raise ValueError("root")
+            for i, layer_edges in enumerate(edges):
+                if len(layer_edges) != len(layers[i]):
+                    raise ValueError("edges")
+                for node_edges in layer_edges:
+                    if any(not 0 <= target < len(layers[i + 1]) for _, target in node_edges):
+                        raise ValueError("target")
+        except Exception as e:
+            raise ValueError(f"Pattern token okunamadı ({e})") from None
+
+        automaton = cls([])
+        automaton.xyz_data = files
+        automaton.filenames = [name for name, _ in files]
+        automaton.file_sequence = [(i + 1, name) for i, name in enumerate(automaton.filenames)]
+        automaton.layers = layers
+        automaton.roots = roots
+        automaton.edges = edges
+        return automaton
+
+    def path_counts(self) -> List[List[int]]:
+        """counts[i][n]: number of distinct pattern prefixes ending in node n of layer i."""
+        if not self.layers:
+            return []
+        counts = [[0] * len(self.layers[0])]
+        for _, root in self.roots:
+            counts[0][root] += 1
+        for i, layer_edges in enumerate(self.edges):
+            nxt = [0] * len(self.layers[i + 1])
+            for node, node_edges in enumerate(layer_edges):
+                c = counts[i][node]
+                if c:
+                    for _, target in node_edges:
+                        nxt[target] += c
+            counts.append(nxt)
+        return counts
+
+    def counts(self) -> PatternCounts:
+        """Totals by final state and expected_next (one pass over the layers)."""
+        by_final: Dict[Tuple[str, Tuple[int, ...]], int] = {}
+        by_last_offset: Dict[int, int] = {}
+        complete = incomplete = 0
+        counts = self.path_counts()
+        if len(counts) == 1:
+            for offset, root in self.roots:
+                by_last_offset[offset] = by_last_offset.get(offset, 0) + 1
+        elif counts:
+            for node, node_edges in enumerate(self.edges[-1]):
+                c = counts[-2][node]
+                for offset, _ in node_edges:
+                    if c:
+                        by_last_offset[offset] = by_last_offset.get(offset, 0) + c
+        if counts:
+            for state, c in zip(self.layers[-1], counts[-1]):
+                if not c:
+                    continue
+                bucket = (_STATE_KEYS[state][0], tuple(_MASK_OFFSETS[_EXPECTED[state]]))
+                by_final[bucket] = by_final.get(bucket, 0) + c
+                if _RESET[state]:
+                    complete += c
+                else:
+                    incomplete += c
+        return PatternCounts(
+            total=complete + incomplete, complete=complete, incomplete=incomplete,
+            by_final=by_final, by_last_offset=by_last_offset,
+        )
+
+    def _alive(self, accept) -> List[List[bool]]:
+        """alive[i][n]: node n of layer i reaches a final state accepted by ``accept``."""
+        if not self.layers or not self.layers[-1]:
+            return [[False] * len(layer) for layer in self.layers]
+        alive = [[accept(state) for state in self.layers[-1]]]
+        for layer_edges in reversed(self.edges):
+            after = alive[0]
+            alive.insert(0, [any(after[t] for _, t in node_edges) for node_edges in layer_edges])
+        return alive
+
+    def _walk(
+        self, alive: List[List[bool]], seeds: Optional[List[Tuple[List[int], int, int]]] = None,
+    ) -> Iterator[Tuple[List[int], int]]:
+        """
+        (pattern, final state) of every accepted path, in exploration order.
+        ``seeds`` ([(prefix, layer, node)], see _seeds()) limits the walk to
+        those subtrees; by default every root is walked.
+        """
+        last = len(self.layers) - 1
+        if seeds is None:
+            seeds = [([offset], 0, root) for offset, root in self.roots]
+        for prefix, start, node in seeds:
+            if not alive[start][node]:
+                continue
+            path = list(prefix)
+            if start == last:
+                yield path, self.layers[last][node]
+                continue
+            stack = [iter(self.edges[start][node])]
+            while stack:
+                depth = start + len(stack)
+                for offset, target in stack[-1]:
+                    if alive[depth][target]:
+                        break
+                else:
+                    stack.pop()
+                    path.pop()
+                    continue
+                path.append(offset)
+                if depth == last:
+                    yield list(path), self.layers[last][target]
+                    path.pop()
+                else:
+                    stack.append(iter(self.edges[depth][target]))
+
+    def _seeds(self, alive: List[List[bool]], min_count: int) -> List[Tuple[List[int], int, int]]:
+        """
+        Live prefixes (prefix, layer, node) in exploration order, taken from
+        the first layer that has at least ``min_count`` of them (or the last
+        layer). Walking them in order gives exactly _walk()'s output.
+        """
+        seeds = [([offset], 0, root) for offset, root in self.roots if alive[0][root]]
+        depth = 0
+        while len(seeds) < min_count and depth < len(self.layers) - 1:
+            seeds = [
+                (prefix + [offset], depth + 1, target)
+                for prefix, _, node in seeds
+                for offset, target in self.edges[depth][node]
+                if alive[depth + 1][target]
+            ]
+            depth += 1
+        return seeds
+
+    def _result(self, path: List[int], state: int) -> PatternResult:
+        return PatternResult(
+            pattern=path,
+            file_sequence=self.file_sequence[:len(path)],
+            is_complete=path[-1] == 0,
+            length=len(path),
+            expected_next=set(_MASK_OFFSETS[_EXPECTED[state]]),
+        )
+
+    def _best(self, allow_partial: bool) -> List[List[Optional[Tuple[bool, int]]]]:
+        """
+        best[i][n]: rank key (not complete, -length) of the best result
+        reachable through node n of layer i, None when no result is.
+        This is the exact bound best-first search orders by.
+        """
+        if not self.layers:
+            return []
+        last = len(self.layers) - 1
+        best = [[(not _RESET[state], -(last + 1)) for state in self.layers[last]]]
+        for i in range(last - 1, -1, -1):
+            after = best[0]
+            row: List[Optional[Tuple[bool, int]]] = []
+            for n, node_edges in enumerate(self.edges[i]):
+                reachable = [after[t] for _, t in node_edges if after[t] is not None]
+                if reachable:
+                    row.append(min(reachable))
+                elif allow_partial and not node_edges:
+                    # Dead end: the pattern stops at this file
+                    row.append((not _RESET[self.layers[i][n]], -(i + 1)))
+                else:
+                    row.append(None)
+            best.insert(0, row)
+        return best
+
+    def top_k(self, k: int, allow_partial: bool = False) -> List[PatternResult]:
+        """
+        The first ``k`` patterns by (complete first, longer first), ties in
+        exploration order. Best-first over the layers with the exact bound
+        from _best(), so only the expanded prefixes of those k are visited.
+        With ``allow_partial`` branches that die before the last file are
+        ranked too (by the length they reached).
+        """
+        best = self._best(allow_partial)
+        if not best or k <= 0:
+            return []
+        last = len(self.layers) - 1
+        # (bound, exploration order, layer, node, (offset, parent trail))
+        heap = []
+        for r, (offset, root) in enumerate(self.roots):
+            if best[0][root] is not None:
+                heap.append((best[0][root], (r,), 0, root, (offset, None)))
+        heapq.heapify(heap)
+        out: List[PatternResult] = []
+        while heap and len(out) < k:
+            _, order, i, node, trail = heapq.heappop(heap)
+            node_edges = self.edges[i][node] if i < last else []
+            if not node_edges:
+                path = []
+                while trail is not None:
+                    path.append(trail[0])
+                    trail = trail[1]
+                path.reverse()
+                out.append(self._result(path, self.layers[i][node]))
+                continue
+            after = best[i + 1]
+            for e, (offset, target) in enumerate(node_edges):
+                if after[target] is not None:
+                    heapq.heappush(heap, (after[target], order + (e,), i + 1, target, (offset, trail)))
+        return out
+
+    def _class_alive(self, complete: bool) -> List[List[bool]]:
+        # Only 0 moves a branch to 'reset', so the final state tells completeness
+        return self._alive(lambda state: _RESET[state] == complete)
+
+    def _completions(self, complete: bool) -> List[List[int]]:
+        """
+        completions[i][n]: accepted patterns through node n of layer i, counted
+        from there to the last file (the backward twin of path_counts()).
+        """
+        cached = self._completion_cache.get(complete)
+        if cached is None:
+            if not self.layers:
+                return []
+            cached = [[int(_RESET[state] == complete) for state in self.layers[-1]]]
+            for layer_edges in reversed(self.edges):
+                after = cached[0]
+                cached.insert(0, [sum(after[t] for _, t in node_edges) for node_edges in layer_edges])
+            self._completion_cache[complete] = cached
+        return cached
+
+    def _walk_from(self, completions: List[List[int]], skip: int) -> Iterator[Tuple[List[int], int]]:
+        """
+        _walk() of the patterns counted in ``completions``, starting at the
+        ``skip``-th one. Whole subtrees before it are skipped by their counts,
+        so reaching any position costs O(files x 7).
+        """
+        last = len(self.layers) - 1
+        for offset, root in self.roots:
+            c = completions[0][root]
+            if skip >= c:
+                skip -= c
+                continue
+            # Descend to the skip-th pattern below this root
+            path = [offset]
+            stack = []
+            node = root
+            for depth in range(last):
+                it = iter(self.edges[depth][node])
+                for offset, target in it:
+                    c = completions[depth + 1][target]
+                    if skip < c:
+                        break
+                    skip -= c
+                path.append(offset)
+                stack.append(it)
+                node = target
+            skip = 0
+            yield list(path), self.layers[last][node]
+            path.pop()
+            # Then carry on like _walk(); the iterators resume after the chosen edges
+            while stack:
+                depth = len(stack)
+                for offset, target in stack[-1]:
+                    if completions[depth][target]:
+                        break
+                else:
+                    stack.pop()
+                    path.pop()
+                    continue
+                path.append(offset)
+                if depth == last:
+                    yield list(path), self.layers[last][target]
+                    path.pop()
+                else:
+                    stack.append(iter(self.edges[depth][target]))
+
+    def results_page(self, start: int, size: int) -> List[PatternResult]:
+        """
+        iter_results()[start:start + size] without producing the patterns
+        before ``start`` (the same order top_k() lists).
+        """
+        out: List[PatternResult] = []
+        if not self.layers or size <= 0:
+            return out
+        start = max(start, 0)
+        for complete in (True, False):
+            completions = self._completions(complete)
+            class_total = sum(completions[0][root] for _, root in self.roots)
+            if start >= class_total:
+                start -= class_total
+                continue
+            for path, state in islice(self._walk_from(completions, start), size - len(out)):
+                out.append(self._result(path, state))
+            start = 0
+            if len(out) >= size:
+                break
+        return out
+
+    def iter_results(self, workers: int = 1) -> Iterator[PatternResult]:
+        """
+        Every valid pattern: complete ones (ending on 0) first, then the rest.
+
+        With ``workers`` > 1 the walk is split into subtrees (_seeds()) that
+        worker processes enumerate; their chunks are yielded in seed order,
+        so the output is identical to the single-process walk.
+        """
+        if workers <= 1 or not self.layers:
+            for complete in (True, False):
+                for path, state in self._walk(self._class_alive(complete)):
+                    yield self._result(path, state)
+            return
+        alive = self._alive(lambda state: True)
+        seeds = self._seeds(alive, workers * 16)
+        if len(seeds) <= 1:
+            yield from self.iter_results()
+            return
+        tasks = [(complete, seed) for complete in (True, False) for seed in seeds]
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+        try:
+            for chunk in pool.map(_walk_seed, tasks):
+                yield from chunk
+        finally:
+            # Stop the remaining subtrees when the caller stops early
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Per-process automaton and liveness for iter_results(workers > 1)
+_worker_automaton: Optional[PatternAutomaton] = None
+_worker_alive: Dict[bool, List[List[bool]]] = {}
+
+
+def _init_worker(automaton: PatternAutomaton) -> None:
+    global _worker_automaton
+    _worker_automaton = automaton
+    _worker_alive.clear()
+    for complete in (True, False):
+        _worker_alive[complete] = automaton._class_alive(complete)
+
+
+def _walk_seed(task: Tuple[bool, Tuple[List[int], int, int]]) -> List[PatternResult]:
+    complete, seed = task
+    automaton = _worker_automaton
+    return [automaton._result(path, state) for path, state in automaton._walk(_worker_alive[complete], [seed])]
+
+
+def find_valid_patterns(
+    xyz_data: List[Tuple[str, XyzSet]],  # [(filename, xyz_offsets or mask), ...]
+    max_branches: Optional[int] = 1000,
+    workers: Optional[int] = None,
+) -> List[PatternResult]:
+    """
+    Find all valid patterns from multiple XYZ offset sets.
+    
+    Args:
+        xyz_data: List of (filename, xyz_offsets) tuples
+        max_branches: Maximum number of results to return (None: all). The
+            search itself is exact; this only bounds the returned list.
+        workers: Worker processes for the enumeration. None uses every CPU
+            when at least PARALLEL_MIN_RESULTS patterns will be returned
+            (the exact count is known up front) and one process otherwise.
+    
+    Returns:
+        List of valid PatternResult objects, complete patterns first
+    """
+    if not xyz_data:
+        return []
+    automaton = PatternAutomaton(xyz_data)
+    if workers is None:
+        wanted = automaton.counts().total
+        if max_branches is not None:
+            wanted = min(wanted, max_branches)
+        workers = (os.cpu_count() or 1) if wanted >= PARALLEL_MIN_RESULTS else 1
+    results = automaton.iter_results(workers)
+    if max_branches is not None:
+        results = islice(results, max_branches)
+    return list(results)
+
+
+def count_patterns(xyz_data: List[Tuple[str, XyzSet]]) -> PatternCounts:
+    """
+    Count the patterns find_valid_patterns would return (with no limit),
+    in time linear in the number of files.
+    """
+    return PatternAutomaton(xyz_data).counts()
+
+
+def top_k_patterns(
+    xyz_data: List[Tuple[str, XyzSet]],
+    k: int = DEFAULT_TOP_K,
+    allow_partial: bool = False,
+) -> List[PatternResult]:
+    """
+    Top ``k`` patterns in find_valid_patterns order (complete first, longer
+    first) without generating the rest. ``allow_partial`` also ranks
+    branches that end before the last file.
+    """
+    if not xyz_data:
+        return []
+    return PatternAutomaton(xyz_data).top_k(k, allow_partial)
+
+
+# handle -> automaton of a finished analysis, least recently used first
+_pattern_handles: "OrderedDict[str, PatternAutomaton]" = OrderedDict()
+_pattern_handles_lock = threading.Lock()
+
+
+def store_pattern_handle(automaton: PatternAutomaton) -> str:
+    """
+    Keep ``automaton`` in this process for paging (/patterns) and return its
+    handle. The same analysis gets the same handle; only the last
+    PATTERN_HANDLE_LIMIT results are kept.
+    """
+    handle = hashlib.sha1(automaton.to_token().encode("ascii")).hexdigest()[:16]
+    with _pattern_handles_lock:
+        _pattern_handles[handle] = automaton
+        _pattern_handles.move_to_end(handle)
+        while len(_pattern_handles) > PATTERN_HANDLE_LIMIT:
+            _pattern_handles.popitem(last=False)
+    return handle
+
+
+def get_pattern_handle(handle: str) -> Optional[PatternAutomaton]:
+    """The automaton stored under ``handle``, or None once it was dropped."""
+    with _pattern_handles_lock:
+        automaton = _pattern_handles.get(handle)
+        if automaton is not None:
+            _pattern_handles.move_to_end(handle)
+        return automaton
+
+
+def pattern_page(automaton: PatternAutomaton, handle: str, page: int = 1, size: int = PATTERN_PAGE_SIZE) -> PatternPage:
+    """Page ``page`` (1-based, clamped) of the automaton's patterns, ``size`` per page."""
+    size = min(max(size, 1), PATTERN_PAGE_SIZE_MAX)
+    total = automaton.counts().total
+    pages = max(1, -(-total // size))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * size
+    return PatternPage(
+        handle=handle, page=page, pages=pages, size=size, total=total, start=start,
+        filenames=list(automaton.filenames), results=automaton.results_page(start, size),
+    )
+
+
+def pattern_page_json(result_page: PatternPage) -> Dict[str, Any]:
+    """JSON form of a page; each pattern's offsets line up with ``files``."""
+    return {
+        "handle": result_page.handle,
+        "page": result_page.page,
+        "pages": result_page.pages,
+        "size": result_page.size,
+        "total": result_page.total,
+        "files": result_page.filenames,
+        "patterns": [
+            {
+                "index": result_page.start + i + 1,
+                "pattern": result.pattern,
+                "is_complete": result.is_complete,
+                "expected_next": sorted(result.expected_next),
+            }
+            for i, result in enumerate(result_page.results)
+        ],
+    }
+
+
+def suggest_jokers(
+    xyz_data: List[Tuple[str, XyzSet]],
+    budget: Optional[int] = None,
+    frontier: Optional[PatternAutomaton] = None,
+) -> Optional[JokerSuggestion]:
+    """
+    Pick joker files in one pass over the pattern automaton.
+
+    budget None: the smallest set of jokers for which a complete pattern
+    (over all files, ending on 0) exists. With a budget: the longest
+    pattern reachable with at most ``budget`` jokers (complete preferred at
+    equal length, then fewer jokers).
+
+    Each file is a step where an offset from its XYZ set costs 0 and any
+    other offset costs 1 (the file becomes a joker). Per layer only the
+    cheapest way into each state is kept, and states over the budget are
+    dropped, so this is a shortest path over O(files x states) nodes.
+    Returns None when nothing qualifies (empty input or no start).
+
+    With ``frontier`` (an automaton of earlier files, e.g. from a token) the
+    search starts from its last layer: ``pattern`` and ``jokers`` then refer
+    to the new files only, ``length`` counts the earlier files too.
+    """
+    data = _auto_jokers(xyz_data)
+    if not data:
+        return None
+
+    def order(mask: int) -> List[Tuple[int, bool]]:
+        # (offset, is_joker): the file's own offsets first so ties favour fewer jokers
+        return [(o, False) for o in _MASK_OFFSETS[mask]] + [
+            (o, True) for o in _MASK_OFFSETS[ALL_OFFSETS_MASK ^ mask]
+        ]
+
+    # state id -> (jokers used, trail of (offset, is_joker, parent))
+    layer: Dict[int, Tuple[int, Optional[tuple]]] = {}
+    if frontier is not None and frontier.layers:
+        for state in frontier.layers[-1]:
+            layer[state] = (0, None)
+        prior, first = len(frontier.layers), 0
+    else:
+        for offset, joker in order(data[0][1]):
+            cost = int(joker)
+            if budget is not None and cost > budget:
+                continue
+            for state in _STARTS[offset + 3]:
+                if state not in layer:
+                    layer[state] = (cost, (offset, joker, None))
+        prior, first = 0, 1
+
+    best: Optional[Tuple[Tuple[int, bool, int], int, Optional[tuple]]] = None
+
+    def consider(depth: int) -> None:
+        nonlocal best
+        for state, (cost, trail) in layer.items():
+            rank = (depth, _RESET[state], -cost)
+            if best is None or rank > best[0]:
+                best = (rank, state, trail)
+
+    depth = prior + first
+    if budget is not None and first:
+        consider(depth)
+    for i in range(first, len(data)):
+        choices = order(data[i][1])
+        nxt: Dict[int, Tuple[int, tuple]] = {}
+        for state, (cost, trail) in layer.items():
+            expected = _EXPECTED[state]
+            row = _NEXT[state]
+            for offset, joker in choices:
+                if not expected >> (offset + 3) & 1:
+                    continue
+                c = cost + joker
+                if budget is not None and c > budget:
+                    continue
+                target = row[offset + 3]
+                known = nxt.get(target)
+                if known is None or c < known[0]:
+                    nxt[target] = (c, (offset, joker, trail))
+        if not nxt:
+            break
+        layer = nxt
+        depth += 1
+        if budget is not None:
+            consider(depth)
+
+    if budget is None:
+        finals = [(cost, trail) for state, (cost, trail) in layer.items() if _RESET[state]]
+        if depth < prior + len(data) or not finals:
+            return None
+        trail = min(finals, key=lambda item: item[0])[1]
+        is_complete = True
+    elif best is None:
+        return None
+    else:
+        (depth, is_complete, _), _, trail = best
+
+    path, jokers = _trail_path(trail)
+    return JokerSuggestion(jokers=jokers, pattern=path, is_complete=is_complete, length=depth)
+
+
+def _trail_path(trail: Optional[tuple]) -> Tuple[List[int], List[int]]:
+    """(pattern, joker file indices) from a suggest_jokers back-pointer chain."""
+    steps = []
+    while trail is not None:
+        steps.append(trail[:2])
+        trail = trail[2]
+    steps.reverse()
+    return [offset for offset, _ in steps], [i for i, (_, joker) in enumerate(steps) if joker]
+
+
+def format_pattern_counts(counts: PatternCounts) -> str:
+    """HTML summary of count_patterns(): totals plus a final-state breakdown."""
+    if not counts.total:
+        return ""
+    rows = []
+    for (state, expected), c in sorted(counts.by_final.items(), key=lambda item: (-item[1], item[0])):
+        next_str = ", ".join(f"{o:+d}" if o != 0 else "0" for o in expected) or "none"
+        rows.append(f"<tr><td><code>{state}</code></td><td>{next_str}</td><td>{c}</td></tr>")
+    return (
+        f"<p><strong>🔢 Toplam {counts.total} pattern:</strong> "
+        f"{counts.complete} tamamlanmış (0 ile biten), {counts.incomplete} devam eden</p>"
+        "<table style='width:auto; margin-bottom:8px;'>"
+        "<thead><tr><th>Son durum</th><th>Sonraki</th><th>Adet</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table>"
+    )
+
+
+def format_pattern_results(
+    results: List[PatternResult], total: Optional[int] = None, start: int = 1, handle: Optional[str] = None,
+) -> str:
+    """
+    Format pattern results for HTML display.
+    
+    ``total`` is the full pattern count when ``results`` is only a part,
+    ``start`` the number of the first listed pattern and ``handle`` (from
+    store_pattern_handle) adds a link to the paged listing of all of them.
+    Returns HTML string with pattern analysis summary.
+    """
+    if not results:
+        return "<p><strong>❌ Pattern bulunamadı</strong> - Geçerli örüntü oluşturulamadı.</p>"
+    
+    # Build color map for groups (2-3 consecutive non-zero offsets)
+    # Skip 0s, group consecutive offsets (doublets or triplets), assign same color
+    group_map = {}  # (file1, file2, [file3], offset1, offset2, [offset3]) -> color
+    group_counter = 0
+    
+    # Predefined color palette (pastel colors for better readability)
+    colors = [
+        '#FFE5E5', '#E5F3FF', '#E5FFE5', '#FFF5E5', '#FFE5F5', '#F5E5FF',
+        '#E5FFFF', '#FFFFE5', '#F0E5FF', '#E5FFF0', '#FFE5EB', '#E5F0FF',
+        '#F5FFE5', '#FFE5F0', '#E5FFE8', '#FFF0E5', '#E5E5FF', '#FFFFE8',
+        '#FFE8E5', '#E5FFFA', '#FAE5FF', '#E5FAFF', '#FFEFA5', '#E5FFEF',
+    ]
+    
+    # Build group map (supports doublets and triplets)
+    for result in results:
+        i = 0
+        while i < len(result.pattern):
+            # Skip 0s
+            if result.pattern[i] == 0:
+                i += 1
+                continue
+            
+            # Collect group (2-3 consecutive non-zero offsets)
+            group_offsets = []
+            group_files = []
+            j = i
+            while j < len(result.pattern) and len(group_offsets) < 3:
+                if result.pattern[j] == 0:
+                    break
+                group_offsets.append(result.pattern[j])
+                if j < len(result.file_sequence):
+                    _, filename = result.file_sequence[j]
+                    group_files.append(filename)
+                j += 1
+            
+            # If we have a complete group (2 or 3 offsets), create a key
+            if len(group_offsets) >= 2 and len(group_files) >= 2:
+                group_key = tuple(group_files + group_offsets)
+                if group_key not in group_map:
+                    group_map[group_key] = colors[group_counter % len(colors)]
+                    group_counter += 1
+            
+            i = j if j > i else i + 1
+    
+    if total is not None and total > len(results):
+        if start == 1:
+            shown = f"ilk {len(results)} gösteriliyor"
+        else:
+            shown = f"{start}–{start + len(results) - 1} arası gösteriliyor"
+        html_parts = [f"<p><strong>✅ {total} geçerli pattern bulundu, {shown}:</strong>"]
+        if handle and start == 1:
+            html_parts.append(
+                f" <a href='/patterns?h={handle}'>Tümünü sayfa sayfa gör</a>"
+                f" · <a href='/patterns.json?h={handle}'>JSON</a>"
+            )
+        html_parts.append("</p>")
+    else:
+        html_parts = [f"<p><strong>✅ {len(results)} geçerli pattern bulundu:</strong></p>"]
+    html_parts.append(f"<ol start='{start}'>")
+    
+    for idx, result in enumerate(results, start):
+        # Build pattern string with hover tooltips and group-based color coding
+        pattern_parts = []
+        
+        # Build group membership for this pattern
+        offset_to_color = {}  # offset_index -> color
+        i = 0
+        while i < len(result.pattern):
+            # Skip 0s
+            if result.pattern[i] == 0:
+                i += 1
+                continue
+            
+            # Collect group (2-3 offsets)
+            group_offsets = []
+            group_files = []
+            group_indices = []
+            j = i
+            while j < len(result.pattern) and len(group_offsets) < 3:
+                if result.pattern[j] == 0:
+                    break
+                group_offsets.append(result.pattern[j])
+                group_indices.append(j)
+                if j < len(result.file_sequence):
+                    _, filename = result.file_sequence[j]
+                    group_files.append(filename)
+                j += 1
+            
+            # If complete group (2 or 3), assign color to all offsets
+            if len(group_offsets) >= 2 and len(group_files) >= 2:
+                group_key = tuple(group_files + group_offsets)
+                color = group_map.get(group_key, 'transparent')
+                for gi in group_indices:
+                    offset_to_color[gi] = color
+            
+            i = j if j > i else i + 1
+        
+        # Now build the pattern string with continuous group blocks
+        i = 0
+        while i < len(result.pattern):
+            offset = result.pattern[i]
+            offset_str = f"{offset:+d}" if offset != 0 else "0"
+            
+            # Check if this is start of a colored triplet
+            if i in offset_to_color and offset != 0:
+                # Find the triplet boundaries
+                triplet_start = i
+                triplet_color = offset_to_color[i]
+                triplet_end = i
+                
+                # Find where this triplet ends (same color)
+                while triplet_end < len(result.pattern) and offset_to_color.get(triplet_end) == triplet_color:
+                    triplet_end += 1
+                
+                # Build continuous triplet block
+                triplet_parts = []
+                for j in range(triplet_start, triplet_end):
+                    o = result.pattern[j]
+                    o_str = f"{o:+d}" if o != 0 else "0"
+                    
+                    # Get filename for tooltip
+                    if j < len(result.file_sequence):
+                        _, full_filename = result.file_sequence[j]
+                        filename = full_filename.rsplit('.', 1)[0] if '.' in full_filename else full_filename
+                        triplet_parts.append(f'<span title="{filename}" style="cursor:help;">{o_str}</span>')
+                    else:
+                        triplet_parts.append(o_str)
+                
+                # Wrap entire triplet in colored block
+                triplet_html = ' → '.join(triplet_parts)
+                pattern_parts.append(
+                    f'<span style="'
+                    f'background-color:{triplet_color}; padding:4px 8px; border-radius:4px; '
+                    f'display:inline-block; margin:0 4px;'
+                    f'">{triplet_html}</span>'
+                )
+                
+                i = triplet_end
+            else:
+                # Single offset (0 or not in triplet)
+                if i < len(result.file_sequence):
+                    _, full_filename = result.file_sequence[i]
+                    filename = full_filename.rsplit('.', 1)[0] if '.' in full_filename else full_filename
+                    pattern_parts.append(
+                        f'<span title="{filename}" style="cursor:help; border-bottom:1px dotted #999;">{offset_str}</span>'
+                    )
+                else:
+                    pattern_parts.append(offset_str)
+                i += 1
+        
+        pattern_str = " → ".join(pattern_parts)
+        
+        # Format expected next offsets
+        if result.expected_next:
+            next_offsets = sorted(result.expected_next)
+            next_str = ", ".join([f"{o:+d}" if o != 0 else "0" for o in next_offsets])
+            status_html = f'<span style="color: {"green" if result.is_complete else "orange"};">(→ next: {next_str})</span>'
+        else:
+            status_html = '<span style="color: gray;">(→ next: none)</span>'
+        
+        html_parts.append(f"""
+        <li>
+            <strong>Pattern {idx}:</strong> <code style="font-size:14px;">{pattern_str}</code> {status_html}
+        </li>
+        """)
+    
+    html_parts.append("</ol>")
+    
+    return "".join(html_parts)
+
+
+def format_pattern_page(result_page: PatternPage) -> str:
+    """HTML for one /patterns page: pager, the page's patterns, pager."""
+    def link(page: int, label: str) -> str:
+        return f"<a href='/patterns?h={result_page.handle}&page={page}&size={result_page.size}'>{label}</a>"
+
+    nav = [f"Sayfa {result_page.page} / {result_page.pages}"]
+    if result_page.page > 1:
+        nav.insert(0, link(1, "« İlk") + " " + link(result_page.page - 1, "‹ Önceki"))
+    if result_page.page < result_page.pages:
+        nav.append(link(result_page.page + 1, "Sonraki ›") + " " + link(result_page.pages, "Son »"))
+    nav.append(
+        f"<a href='/patterns.json?h={result_page.handle}&page={result_page.page}&size={result_page.size}'>JSON</a>"
+    )
+    pager = f"<p style='margin:8px 0;'>{' · '.join(nav)}</p>"
+    return pager + format_pattern_results(
+        result_page.results, total=result_page.total, start=result_page.start + 1
+    ) + pager
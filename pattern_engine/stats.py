@@ -0,0 +1,306 @@
+"""
+Pattern statistics over an archive of weekly XYZ sets.
+
+The upload form analyzes one week at a time. This module reads an archive of
+(week, file, xyz) records and, in one streaming pass, computes for every
+week what the pattern engine would report, without enumerating patterns:
+
+- pattern completion: complete / total patterns, weeks with a complete one
+- triplet lengths: offsets per closed run (non-zero offsets up to a 0),
+  summed over every pattern of every week
+- expected-next distributions: share of each week's patterns per final
+  expected_next set, averaged over the weeks
+
+Each week is a forward pass over the bitmask transition table (_STARTS,
+_EXPECTED, _NEXT) keyed by (state, current run length), so a record costs at
+most 13 x 4 x 7 steps whatever the number of patterns.
+
+Archive formats (records grouped by week, files in pattern order):
+    JSONL: {"week": "2025-W03", "file": "EURUSD_w03.csv", "xyz": "0x49"}
+    CSV:   week,file,xyz  (xyz: hex mask, "-3,0,3" or "-3 0 3")
+xyz may also be an integer mask or a list of offsets in JSONL. Empty sets
+become jokers, as in the web UI.
+
+    archive = read_archive("xyz_archive.jsonl")
+    stats = archive_stats(archive)
+    stats.completion_rate, stats.average_triplet_length, stats.top_expected(5)
+
+    python -m pattern_engine.stats xyz_archive.jsonl --top 5
+"""
+
+import argparse
+import csv
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .engine import (
+    _EXPECTED,
+    _MASK_OFFSETS,
+    _NEXT,
+    _RESET,
+    _STARTS,
+    XyzSet,
+    _auto_jokers,
+    parse_xyz_field,
+)
+
+
+# (week, file, xyz) as read from an archive
+ArchiveRecord = Tuple[str, str, XyzSet]
+
+
+@dataclass
+class WeekStats:
+    """Pattern totals of one week (same numbers as count_patterns on its files)."""
+    week: str
+    files: int
+    total: int
+    complete: int
+    # run length (1-3) -> closed runs of that length, summed over the patterns
+    run_lengths: Dict[int, int]
+    # final expected_next mask -> patterns ending with it
+    expected: Dict[int, int]
+
+
+@dataclass
+class ArchiveStats:
+    """Totals over every week of an archive (see archive_stats)."""
+    weeks: int = 0
+    files: int = 0
+    weeks_with_patterns: int = 0
+    weeks_complete: int = 0  # weeks with at least one complete pattern
+    patterns: int = 0
+    complete_patterns: int = 0
+    run_lengths: Dict[int, int] = field(default_factory=dict)
+    # expected_next mask -> summed share of the week's patterns, and weeks seen
+    expected_share: Dict[int, float] = field(default_factory=dict)
+    expected_weeks: Dict[int, int] = field(default_factory=dict)
+
+    def add(self, week: WeekStats) -> None:
+        self.weeks += 1
+        self.files += week.files
+        self.patterns += week.total
+        self.complete_patterns += week.complete
+        if week.total:
+            self.weeks_with_patterns += 1
+        if week.complete:
+            self.weeks_complete += 1
+        for length, n in week.run_lengths.items():
+            self.run_lengths[length] = self.run_lengths.get(length, 0) + n
+        for mask, n in week.expected.items():
+            self.expected_share[mask] = self.expected_share.get(mask, 0.0) + n / week.total
+            self.expected_weeks[mask] = self.expected_weeks.get(mask, 0) + 1
+
+    @property
+    def completion_rate(self) -> float:
+        """Complete patterns / all patterns."""
+        return self.complete_patterns / self.patterns if self.patterns else 0.0
+
+    @property
+    def week_completion_rate(self) -> float:
+        """Weeks with a complete pattern / weeks."""
+        return self.weeks_complete / self.weeks if self.weeks else 0.0
+
+    @property
+    def average_triplet_length(self) -> float:
+        runs = sum(self.run_lengths.values())
+        return sum(length * n for length, n in self.run_lengths.items()) / runs if runs else 0.0
+
+    def top_expected(self, n: int = 5) -> List[Tuple[List[int], float, int]]:
+        """(expected_next offsets, average share per week, weeks) of the n most common sets."""
+        ranked = sorted(self.expected_share.items(), key=lambda item: (-item[1], item[0]))[:n]
+        weeks = self.weeks_with_patterns or 1
+        return [(list(_MASK_OFFSETS[mask]), share / weeks, self.expected_weeks[mask]) for mask, share in ranked]
+
+
+class _WeekPass:
+    """
+    Forward DP of one week. Cells are (state id, run length) -> [paths,
+    closed runs of length 1, 2, 3 summed over those paths].
+    """
+
+    def __init__(self, week: str):
+        self.week = week
+        self.files = 0
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def add(self, mask: int) -> None:
+        nxt: Dict[Tuple[int, int], List[int]] = {}
+        if not self.files:
+            for offset in _MASK_OFFSETS[mask]:
+                for state in _STARTS[offset + 3]:
+                    # A start like +3 → 0 closes a run whose first offsets were in earlier data
+                    cell = nxt.setdefault((state, 1 if offset else 0), [0, 0, 0, 0])
+                    cell[0] += 1
+        else:
+            for (state, run), cell in self.cells.items():
+                row = _NEXT[state]
+                for offset in _MASK_OFFSETS[_EXPECTED[state] & mask]:
+                    key = (row[offset + 3], run + 1 if offset else 0)
+                    target = nxt.get(key)
+                    if target is None:
+                        target = nxt[key] = [0, 0, 0, 0]
+                    for i in range(4):
+                        target[i] += cell[i]
+                    if not offset and run:
+                        target[run] += cell[0]
+        self.cells = nxt
+        self.files += 1
+
+    def result(self) -> WeekStats:
+        total = complete = 0
+        runs = [0, 0, 0, 0]
+        expected: Dict[int, int] = {}
+        for (state, _), cell in self.cells.items():
+            paths = cell[0]
+            if not paths:
+                continue
+            total += paths
+            if _RESET[state]:
+                complete += paths
+            for i in range(1, 4):
+                runs[i] += cell[i]
+            expected[_EXPECTED[state]] = expected.get(_EXPECTED[state], 0) + paths
+        return WeekStats(
+            week=self.week, files=self.files, total=total, complete=complete,
+            run_lengths={i: runs[i] for i in range(1, 4) if runs[i]}, expected=expected,
+        )
+
+
+def iter_week_stats(records: Iterable[ArchiveRecord]) -> Iterator[WeekStats]:
+    """
+    WeekStats per week, in archive order. Records must be grouped by week;
+    a week that shows up again after another one raises ValueError.
+    """
+    current: Optional[_WeekPass] = None
+    done = set()
+    for week, filename, xyz in records:
+        if current is None or week != current.week:
+            if current is not None:
+                done.add(current.week)
+                yield current.result()
+            if week in done:
+                raise ValueError(f"Arşiv haftaya göre gruplanmamış: {week} tekrar başlıyor")
+            current = _WeekPass(week)
+        current.add(_auto_jokers([(filename, xyz)])[0][1])
+    if current is not None:
+        yield current.result()
+
+
+def archive_stats(records: Iterable[ArchiveRecord]) -> ArchiveStats:
+    """All statistics of an archive in one pass (records are not kept)."""
+    stats = ArchiveStats()
+    for week in iter_week_stats(records):
+        stats.add(week)
+    return stats
+
+
+def _parse_xyz(value: Any) -> XyzSet:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, bool) or not isinstance(item, int):
+                raise ValueError(f"xyz offsetleri tam sayı olmalı: {item!r}")
+        return value
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"xyz bir maske, offset listesi ya da metin olmalı: {value!r}")
+    text = str(value or "").strip()
+    if " " in text and "," not in text:
+        text = ",".join(text.split())
+    return parse_xyz_field(text)
+
+
+def read_archive(path: str) -> Iterator[ArchiveRecord]:
+    """
+    Records of a JSONL (.jsonl / .json) or CSV archive, streamed line by
+    line; "-" reads JSONL from stdin.
+    """
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    try:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+            missing = {"week", "file", "xyz"} - set(reader.fieldnames)
+            if missing:
+                raise ValueError(f"CSV başlığında eksik sütun: {', '.join(sorted(missing))}")
+            for row in reader:
+                yield row["week"].strip(), row["file"].strip(), _parse_xyz(row["xyz"])
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    yield str(record["week"]), str(record["file"]), _parse_xyz(record["xyz"])
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path}:{line_no}: geçersiz kayıt ({e})") from None
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _offsets_str(offsets: List[int]) -> str:
+    return ", ".join(f"{o:+d}" if o != 0 else "0" for o in offsets) or "none"
+
+
+def stats_to_record(stats: ArchiveStats, top: int = 5) -> Dict[str, Any]:
+    return {
+        "weeks": stats.weeks,
+        "files": stats.files,
+        "patterns": stats.patterns,
+        "complete_patterns": stats.complete_patterns,
+        "completion_rate": stats.completion_rate,
+        "weeks_complete": stats.weeks_complete,
+        "week_completion_rate": stats.week_completion_rate,
+        "average_triplet_length": stats.average_triplet_length,
+        "triplet_lengths": {str(length): n for length, n in sorted(stats.run_lengths.items())},
+        "top_expected_next": [
+            {"expected_next": offsets, "average_share": share, "weeks": weeks}
+            for offsets, share, weeks in stats.top_expected(top)
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        prog="pattern_engine.stats",
+        description="Haftalık XYZ arşivi üzerinde pattern istatistikleri (tek geçiş)",
+    )
+    p.add_argument("archive", help="JSONL ya da CSV arşiv (week, file, xyz); - = stdin (JSONL)")
+    p.add_argument("--top", type=int, default=5, help="Listelenecek expected_next kümesi (varsayılan: 5)")
+    p.add_argument("--weeks", action="store_true", help="Her haftanın satırını da yaz")
+    p.add_argument("--format", choices=["text", "json"], default="text", help="Çıktı formatı")
+    args = p.parse_args(argv)
+
+    stats = ArchiveStats()
+    try:
+        for week in iter_week_stats(read_archive(args.archive)):
+            stats.add(week)
+            if args.weeks and args.format == "text":
+                print(f"{week.week}: {week.files} dosya, {week.total} pattern, {week.complete} tamamlanmış")
+    except (OSError, ValueError) as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 1
+
+    if args.format == "json":
+        print(json.dumps(stats_to_record(stats, args.top), ensure_ascii=False, indent=2))
+        return 0
+    print(f"Hafta: {stats.weeks}  Dosya: {stats.files}  Pattern: {stats.patterns}")
+    print(
+        f"Tamamlanma: {stats.complete_patterns}/{stats.patterns} pattern ({stats.completion_rate:.1%}), "
+        f"{stats.weeks_complete}/{stats.weeks} hafta ({stats.week_completion_rate:.1%})"
+    )
+    lengths = ", ".join(f"{length}: {n}" for length, n in sorted(stats.run_lengths.items())) or "-"
+    print(f"Ortalama triplet uzunluğu: {stats.average_triplet_length:.2f}  (uzunluk: adet → {lengths})")
+    print("En sık expected_next kümeleri (hafta başına ortalama pay):")
+    for offsets, share, weeks in stats.top_expected(args.top):
+        print(f"  {_offsets_str(offsets)}: {share:.1%}  ({weeks} hafta)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())